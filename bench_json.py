@@ -0,0 +1,106 @@
+"""
+Microbenchmark del proveedor JSON (src/services/json_provider.py) frente al
+proveedor por defecto de Flask, con payloads realistas:
+
+- catálogo: GET /api/products (to_frontend_dict de los productos de la DB,
+  ES + EN, replicado para simular un catálogo más grande).
+- pedidos: listado admin de pedidos (Order.to_dict con items JSON y fechas).
+
+Uso: python bench_json.py [--repeat 200] [--catalog-copies 5] [--orders 300]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask.json.provider import DefaultJSONProvider
+
+from src.main import app
+from src.models.order import Order
+from src.models.web_product import WebProduct
+from src.services import json_provider
+from src.services.catalog_cache import CATEGORIES, TAGS
+from src.services.json_provider import FastJSONProvider
+
+
+def catalog_payload(copies):
+    products = WebProduct.query.filter_by(active=True).order_by(WebProduct.display_order).all()
+    payload = {}
+    for lang in ('es', 'en'):
+        items = [p.to_frontend_dict(lang=lang) for p in products] * copies
+        payload[lang] = {'products': items, 'categories': CATEGORIES[lang], 'tags': TAGS}
+    return payload
+
+
+def orders_payload(count):
+    rng = random.Random(42)
+    start = datetime(2026, 1, 1)
+    orders = []
+    for i in range(count):
+        items = [
+            {'id': rng.randint(1, 30), 'name': f'Producto {n}', 'slug': f'producto-{n}',
+             'price': round(rng.uniform(5, 60), 2), 'quantity': rng.randint(1, 4),
+             'image': f'/images/producto-{n}.jpg', 'weight': '500g'}
+            for n in range(rng.randint(1, 6))
+        ]
+        created = start + timedelta(minutes=37 * i)
+        order = Order(
+            id=i + 1, order_number=f'ME-{100000 + i}', customer_email=f'cliente{i}@example.com',
+            customer_name=f'Cliente {i}', customer_phone='600000000',
+            shipping_address='Calle Mayor 1', shipping_city='Madrid', shipping_postal_code='28001',
+            shipping_country='España', items=items,
+            subtotal=sum(it['price'] * it['quantity'] for it in items), shipping_cost=4.95,
+            total=0, currency='EUR', payment_status='paid', order_status='processing',
+            created_at=created, updated_at=created, paid_at=created,
+        )
+        orders.append(order.to_dict())
+    return {'orders': orders, 'total': count}
+
+
+def _with_isoformat(obj):
+    """El camino antiguo: to_dict() devolvía las fechas ya convertidas."""
+    if isinstance(obj, dict):
+        return {k: _with_isoformat(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_with_isoformat(v) for v in obj]
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return obj
+
+
+def bench(label, func, repeat):
+    func()  # calentar
+    start = time.perf_counter()
+    for _ in range(repeat):
+        size = len(func())
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    print(f"  {label:<28} {elapsed:8.3f} ms/op  {size / 1024:8.1f} KB")
+    return elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--catalog-copies', type=int, default=5)
+    parser.add_argument('--orders', type=int, default=300)
+    args = parser.parse_args()
+
+    with app.app_context():
+        payloads = {
+            'catálogo': catalog_payload(args.catalog_copies),
+            'pedidos': orders_payload(args.orders),
+        }
+        default_provider = DefaultJSONProvider(app)
+        fast_provider = FastJSONProvider(app)
+        backend = 'orjson' if json_provider.orjson is not None else 'stdlib (orjson no instalado)'
+        print(f"FastJSONProvider usa: {backend}\n")
+
+        for name, payload in payloads.items():
+            print(f"{name}:")
+            old = bench('Flask por defecto', lambda: default_provider.response(_with_isoformat(payload)).get_data(), args.repeat)
+            new = bench('FastJSONProvider', lambda: fast_provider.response(payload).get_data(), args.repeat)
+            print(f"  {'mejora':<28} {old / new:8.1f}x\n")
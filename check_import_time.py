@@ -0,0 +1,53 @@
+"""
+Mide el tiempo de importación de src.main con `python -X importtime` y falla
+si supera el presupuesto de arranque.
+
+Uso: python check_import_time.py [--budget-ms 900] [--top 15]
+Devuelve código de salida 1 si el arranque supera el presupuesto.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+DEFAULT_BUDGET_MS = 900
+
+
+def measure():
+    """Devuelve [(cumulative_us, self_us, module)] de un import en frío de src.main."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import src.main'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        sys.exit(result.returncode)
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), module.rstrip()))
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--budget-ms', type=int, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    rows = measure()
+    total_ms = next(c for c, _, m in rows if m.strip() == 'src.main') / 1000
+
+    print(f"Top {args.top} imports por tiempo acumulado:")
+    for cumulative_us, self_us, module in sorted(rows, reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {module}")
+
+    print(f"\nsrc.main: {total_ms:.0f} ms (presupuesto {args.budget_ms} ms)")
+    if total_ms > args.budget_ms:
+        print("❌ El arranque supera el presupuesto")
+        sys.exit(1)
+    print("✅ Dentro del presupuesto")
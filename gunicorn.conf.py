@@ -0,0 +1,37 @@
+"""
+Configuración de gunicorn (se carga automáticamente desde el directorio raíz).
+
+preload_app importa la aplicación una sola vez en el master y los workers se
+crean con fork: el código y los módulos importados se comparten copy-on-write
+en lugar de cargarse en cada worker.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+timeout = 120
+preload_app = True
+
+
+def when_ready(server):
+    # Mover los objetos del import a la generación permanente: el GC de los
+    # workers no los recorre, así no escribe en sus páginas y no rompe el COW.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # El pool de conexiones no debe compartirse entre procesos: cada worker
+    # abre las suyas (close=False para no cerrar las del master desde el hijo).
+    from src.main import app
+    from src.models.user import db
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+    # Escuchar invalidaciones antes del warmup para no perder las que lleguen mientras tanto
+    from src.services.cache_bus import start_listener
+    start_listener(app)
+
+    # Calentar antes de aceptar conexiones: mientras tanto atienden los demás workers
+    from src.services.warmup import run_warmup
+    run_warmup(app)
@@ -0,0 +1,116 @@
+"""
+Comprueba con EXPLAIN que las consultas calientes usan los índices secundarios
+definidos en versions/0002_secondary_indexes.sql (solo PostgreSQL).
+
+Para cada consulta:
+- OK: el planificador ya usa el índice esperado.
+- OK (tabla pequeña): con pocas filas Postgres prefiere un Seq Scan, pero el
+  índice se usa en cuanto se desactiva enable_seqscan (es decir, es aplicable).
+- FAIL: el índice no existe o no sirve para la consulta.
+
+Uso: python migrations/check_index_plans.py
+Devuelve código de salida 1 si alguna consulta falla.
+"""
+import json
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import app
+from src.models.user import db
+from sqlalchemy import text
+
+# (descripción, índice esperado, SQL, parámetros)
+CHECKS = [
+    (
+        'Webhook de reembolso/cancelación por payment_intent',
+        'ix_orders_stripe_payment_intent_id',
+        "SELECT * FROM orders WHERE stripe_payment_intent_id = :pi LIMIT 1",
+        {'pi': 'pi_check'},
+    ),
+    (
+        'Detalle de cliente web (pedidos por email)',
+        'ix_orders_customer_email_created_at',
+        "SELECT * FROM orders WHERE customer_email = :email ORDER BY created_at DESC",
+        {'email': 'check@mikels.es'},
+    ),
+    (
+        'Verificación de compra en reseñas',
+        'ix_orders_customer_email_created_at',
+        "SELECT * FROM orders WHERE customer_email = :email AND payment_status = 'paid' LIMIT 1",
+        {'email': 'check@mikels.es'},
+    ),
+    (
+        'Últimos pedidos (admin / dashboard)',
+        'ix_orders_created_at',
+        "SELECT * FROM orders ORDER BY created_at DESC LIMIT 5",
+        {},
+    ),
+    (
+        'Reseñas aprobadas de un producto',
+        'ix_reviews_status_product_slug_created_at',
+        "SELECT * FROM reviews WHERE status = 'approved' AND product_slug = :slug ORDER BY created_at DESC LIMIT 20",
+        {'slug': 'aceite-temprano-sin-filtrar'},
+    ),
+    (
+        'Reseñas destacadas',
+        'ix_reviews_status_created_at',
+        "SELECT * FROM reviews WHERE status = 'approved' AND rating >= 4 ORDER BY created_at DESC LIMIT 8",
+        {},
+    ),
+    (
+        'Carritos abandonados no convertidos por email',
+        'ix_abandoned_carts_email_converted_created_at',
+        "SELECT * FROM abandoned_carts WHERE email = :email AND converted = false",
+        {'email': 'check@mikels.es'},
+    ),
+    (
+        'Suscriptores pendientes de un producto',
+        'ix_product_notifications_product_id_notified',
+        "SELECT * FROM product_notifications WHERE product_id = :pid AND notified = false",
+        {'pid': 'check'},
+    ),
+]
+
+
+def _plan_indexes(plan_node):
+    """Devuelve los nombres de índices usados en un nodo del plan (recursivo)."""
+    found = set()
+    if plan_node.get('Index Name'):
+        found.add(plan_node['Index Name'])
+    for child in plan_node.get('Plans', []):
+        found |= _plan_indexes(child)
+    return found
+
+
+def _explain(sql, params):
+    result = db.session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+    plan = result if isinstance(result, list) else json.loads(result)
+    return _plan_indexes(plan[0]['Plan'])
+
+
+with app.app_context():
+    if db.engine.dialect.name != 'postgresql':
+        print(f"⚠️ EXPLAIN solo se comprueba en PostgreSQL (dialecto actual: {db.engine.dialect.name})")
+        sys.exit(0)
+
+    failures = 0
+    for description, index_name, sql, params in CHECKS:
+        used = _explain(sql, params)
+        if index_name in used:
+            print(f"  ✅ {description}: {index_name}")
+            continue
+
+        # Con pocas filas el planificador prefiere Seq Scan: comprobar que el índice es aplicable
+        db.session.execute(text("SET LOCAL enable_seqscan = off"))
+        forced = _explain(sql, params)
+        db.session.rollback()
+
+        if index_name in forced:
+            print(f"  ✅ {description}: {index_name} (tabla pequeña, el planificador prefiere Seq Scan)")
+        else:
+            failures += 1
+            print(f"  ❌ {description}: se esperaba {index_name}, plan usa {sorted(used | forced) or 'Seq Scan'}")
+
+    print(f"\n{len(CHECKS) - failures}/{len(CHECKS)} consultas usan el índice esperado")
+    sys.exit(1 if failures else 0)
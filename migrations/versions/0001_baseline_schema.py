@@ -0,0 +1,271 @@
+"""
+Baseline: esquema que antes se creaba en el before_request de main.py.
+
+Las tablas se definen aquí tal como eran los modelos en ese momento, no se
+importan de src.models: los cambios posteriores de los modelos los añade su
+propia migración (0004 en adelante) y esta no cambia nunca.
+
+Idempotente para poder marcar como aplicada una base de datos de producción
+que ya tiene estas tablas/columnas (CREATE ... IF NOT EXISTS / checkfirst).
+"""
+from sqlalchemy import JSON, Boolean, Column, DateTime, Float, Integer, MetaData, String, Table, Text, text
+
+from src.services.migration_runner import column_exists
+
+metadata = MetaData()
+
+Table(
+    'user', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('username', String(80), unique=True, nullable=False),
+    Column('email', String(120), unique=True, nullable=False),
+)
+
+Table(
+    'abandoned_carts', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('cart_token', String(64), unique=True, nullable=False, index=True),
+    Column('email', String(255), nullable=False, index=True),
+    Column('customer_name', String(255)),
+    Column('items_json', Text, nullable=False),
+    Column('total', Float, nullable=False),
+    Column('discount_code', String(50)),
+    Column('created_at', DateTime, nullable=False),
+    Column('updated_at', DateTime),
+    Column('recovered', Boolean, nullable=False),
+    Column('recovered_at', DateTime),
+    Column('converted', Boolean, nullable=False),
+)
+
+Table(
+    'admin_users', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('microsoft_id', String(255), unique=True, nullable=False),
+    Column('email', String(255), unique=True, nullable=False),
+    Column('name', String(255), nullable=False),
+    Column('role', String(50), nullable=False),
+    Column('is_active', Boolean),
+    Column('last_login', DateTime),
+    Column('created_at', DateTime),
+)
+
+Table(
+    'blog_posts', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('title', String(200), nullable=False),
+    Column('slug', String(200), unique=True, nullable=False),
+    Column('content', Text, nullable=False),
+    Column('excerpt', Text),
+    Column('author', String(100)),
+    Column('featured_image', String(500)),
+    Column('status', String(20)),
+    Column('category', String(50)),
+    Column('tags', String(200)),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime),
+    Column('published_at', DateTime),
+)
+
+Table(
+    'coupons', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('code', String(100), unique=True, nullable=False, index=True),
+    Column('description', String(500)),
+    Column('discount_type', String(20), nullable=False),
+    Column('discount_value', Float, nullable=False),
+    Column('min_order_amount', Float),
+    Column('max_uses', Integer),
+    Column('current_uses', Integer),
+    Column('max_uses_per_customer', Integer),
+    Column('active', Boolean),
+    Column('expires_at', DateTime),
+    Column('created_at', DateTime),
+    Column('email', String(255), index=True),
+    Column('used', Boolean),
+    Column('used_at', DateTime),
+)
+
+Table(
+    'orders', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('order_number', String(50), unique=True, nullable=False),
+    Column('customer_email', String(120), nullable=False),
+    Column('customer_name', String(120), nullable=False),
+    Column('customer_phone', String(20)),
+    Column('shipping_address', String(200), nullable=False),
+    Column('shipping_city', String(100), nullable=False),
+    Column('shipping_postal_code', String(20), nullable=False),
+    Column('shipping_country', String(50), nullable=False),
+    Column('items', JSON, nullable=False),
+    Column('subtotal', Float, nullable=False),
+    Column('shipping_cost', Float),
+    Column('total', Float, nullable=False),
+    Column('currency', String(3)),
+    Column('stripe_payment_intent_id', String(100)),
+    Column('stripe_checkout_session_id', String(100)),
+    Column('payment_status', String(20)),
+    Column('order_status', String(20)),
+    Column('needs_invoice', Boolean),
+    Column('fiscal_name', String(200)),
+    Column('fiscal_nif', String(20)),
+    Column('fiscal_address', String(200)),
+    Column('fiscal_city', String(100)),
+    Column('fiscal_postal_code', String(20)),
+    Column('holded_id', String(100)),
+    Column('holded_invoice_id', String(100)),
+    Column('holded_doc_number', String(50)),
+    Column('email_sent', Boolean),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime),
+    Column('paid_at', DateTime),
+    Column('customer_notes', Text),
+    Column('admin_notes', Text),
+)
+
+Table(
+    'subscriptions', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('subscription_number', String(50), unique=True, nullable=False),
+    Column('customer_email', String(120), nullable=False),
+    Column('customer_name', String(120), nullable=False),
+    Column('product_id', Integer, nullable=False),
+    Column('product_name', String(200), nullable=False),
+    Column('product_slug', String(200), nullable=False),
+    Column('quantity', Integer),
+    Column('unit_price', Float, nullable=False),
+    Column('frequency', String(20), nullable=False),
+    Column('stripe_subscription_id', String(100), unique=True),
+    Column('stripe_customer_id', String(100)),
+    Column('stripe_price_id', String(100)),
+    Column('status', String(20)),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime),
+    Column('next_billing_date', DateTime),
+    Column('cancelled_at', DateTime),
+)
+
+Table(
+    'product_notifications', metadata,
+    Column('id', String(36), primary_key=True),
+    Column('email', String(255), nullable=False),
+    Column('name', String(100)),
+    Column('product_name', String(255), nullable=False),
+    Column('product_id', String(100), nullable=False),
+    Column('notified', Boolean),
+    Column('created_at', DateTime),
+)
+
+Table(
+    'reviews', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('customer_email', String(255), nullable=False, index=True),
+    Column('customer_name', String(120), nullable=False),
+    Column('product_slug', String(200), nullable=False, index=True),
+    Column('product_name', String(200), nullable=False),
+    Column('rating', Integer, nullable=False),
+    Column('title', String(200)),
+    Column('comment', Text, nullable=False),
+    Column('status', String(20), nullable=False),
+    Column('is_verified_purchase', Boolean, nullable=False),
+    Column('order_number', String(50)),
+    Column('reward_coupon_code', String(50)),
+    Column('created_at', DateTime, nullable=False),
+    Column('updated_at', DateTime),
+)
+
+Table(
+    'web_products', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(200), nullable=False),
+    Column('slug', String(200), unique=True, nullable=False),
+    Column('sku', String(50), unique=True),
+    Column('description', Text),
+    Column('long_description', Text),
+    Column('name_en', String(200)),
+    Column('description_en', Text),
+    Column('long_description_en', Text),
+    Column('price', Float, nullable=False),
+    Column('original_price', Float),
+    Column('currency', String(3)),
+    Column('image', String(500)),
+    Column('images', JSON),
+    Column('category', String(50), nullable=False),
+    Column('tags', JSON),
+    Column('stock', Integer),
+    Column('weight', String(100)),
+    Column('sold_out', Boolean),
+    Column('sold_out_message', String(200)),
+    Column('ingredients', Text),
+    Column('nutritional_info', JSON),
+    Column('subscription_available', Boolean),
+    Column('subscription_discount', Integer),
+    Column('subscription_frequencies', JSON),
+    Column('subscription_terms', JSON),
+    Column('volume_discount', JSON),
+    Column('tiered_discount', JSON),
+    Column('addons', JSON),
+    Column('variants', JSON),
+    Column('includes', JSON),
+    Column('related_products', JSON),
+    Column('claims', JSON),
+    Column('badges', JSON),
+    Column('featured', Boolean),
+    Column('free_shipping', Boolean),
+    Column('limited_edition', Boolean),
+    Column('award', String(200)),
+    Column('active', Boolean),
+    Column('shipping_cost', Float),
+    Column('preparation_cost', Float),
+    Column('display_order', Integer),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(bind=conn)
+
+    # Los ALTER siguientes solo aplican a bases de datos PostgreSQL creadas con
+    # versiones antiguas de los modelos; en una base nueva create_all ya los cubre.
+    if conn.dialect.name != 'postgresql':
+        return
+
+    # Permitir múltiples cupones por email (newsletter + post-compra + reseña)
+    conn.execute(text('ALTER TABLE coupons DROP CONSTRAINT IF EXISTS coupons_email_key'))
+    conn.execute(text('ALTER TABLE coupons DROP CONSTRAINT IF EXISTS uq_coupons_email'))
+    # Cupones públicos sin email
+    conn.execute(text('ALTER TABLE coupons ALTER COLUMN email DROP NOT NULL'))
+
+    # Campos de facturación y Holded en orders
+    conn.execute(text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS needs_invoice BOOLEAN DEFAULT FALSE'))
+    conn.execute(text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS fiscal_name VARCHAR(200)'))
+    conn.execute(text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS fiscal_nif VARCHAR(20)'))
+    conn.execute(text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS fiscal_address VARCHAR(200)'))
+    conn.execute(text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS fiscal_city VARCHAR(100)'))
+    conn.execute(text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS fiscal_postal_code VARCHAR(20)'))
+    conn.execute(text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS holded_id VARCHAR(100)'))
+    conn.execute(text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS holded_invoice_id VARCHAR(100)'))
+    conn.execute(text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS holded_doc_number VARCHAR(50)'))
+    conn.execute(text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS email_sent BOOLEAN DEFAULT FALSE'))
+
+    # Costes logísticos en web_products
+    conn.execute(text('ALTER TABLE web_products ADD COLUMN IF NOT EXISTS shipping_cost FLOAT DEFAULT 0.0'))
+    conn.execute(text('ALTER TABLE web_products ADD COLUMN IF NOT EXISTS preparation_cost FLOAT DEFAULT 0.0'))
+
+    # Campos de gestión de cupones
+    conn.execute(text('ALTER TABLE coupons ADD COLUMN IF NOT EXISTS description VARCHAR(500)'))
+    conn.execute(text("ALTER TABLE coupons ADD COLUMN IF NOT EXISTS discount_type VARCHAR(20) DEFAULT 'percentage'"))
+    conn.execute(text('ALTER TABLE coupons ADD COLUMN IF NOT EXISTS discount_value FLOAT DEFAULT 10'))
+    conn.execute(text('ALTER TABLE coupons ADD COLUMN IF NOT EXISTS min_order_amount FLOAT DEFAULT 0'))
+    conn.execute(text('ALTER TABLE coupons ADD COLUMN IF NOT EXISTS max_uses INTEGER'))
+    conn.execute(text('ALTER TABLE coupons ADD COLUMN IF NOT EXISTS current_uses INTEGER DEFAULT 0'))
+    conn.execute(text('ALTER TABLE coupons ADD COLUMN IF NOT EXISTS max_uses_per_customer INTEGER'))
+    conn.execute(text('ALTER TABLE coupons ADD COLUMN IF NOT EXISTS active BOOLEAN DEFAULT TRUE'))
+    conn.execute(text('ALTER TABLE coupons ADD COLUMN IF NOT EXISTS expires_at TIMESTAMP'))
+    if column_exists(conn, 'coupons', 'discount_percent'):
+        conn.execute(text('UPDATE coupons SET discount_value = discount_percent WHERE discount_value IS NULL AND discount_percent IS NOT NULL'))
+
+    # Traducciones EN en web_products
+    conn.execute(text('ALTER TABLE web_products ADD COLUMN IF NOT EXISTS name_en VARCHAR(200)'))
+    conn.execute(text('ALTER TABLE web_products ADD COLUMN IF NOT EXISTS description_en TEXT'))
+    conn.execute(text('ALTER TABLE web_products ADD COLUMN IF NOT EXISTS long_description_en TEXT'))
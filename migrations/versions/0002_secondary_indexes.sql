@@ -0,0 +1,37 @@
+-- Migration: Índices secundarios para las consultas calientes
+-- Date: 2026-10-19
+-- Description: Evita sequential scans en webhooks de Stripe y endpoints públicos.
+-- Cada índice indica la consulta existente que lo justifica.
+-- Verificar los planes con: python migrations/check_index_plans.py
+
+-- stripe_routes.stripe_webhook (charge.refunded, payment_intent.canceled):
+--   Order.query.filter_by(stripe_payment_intent_id=...).first()
+CREATE INDEX IF NOT EXISTS ix_orders_stripe_payment_intent_id ON orders (stripe_payment_intent_id);
+
+-- admin_panel_routes._get_client_detail_inner:
+--   Order.query.filter_by(customer_email=...).order_by(Order.created_at.desc())
+-- review_routes.create_review (verificación de compra por email):
+--   Order.query.filter_by(customer_email=..., payment_status='paid').first()
+CREATE INDEX IF NOT EXISTS ix_orders_customer_email_created_at ON orders (customer_email, created_at);
+
+-- admin_panel_routes.get_orders / get_dashboard:
+--   Order.query.order_by(Order.created_at.desc()) [.limit(5)]
+CREATE INDEX IF NOT EXISTS ix_orders_created_at ON orders (created_at);
+
+-- review_routes.get_reviews / get_review_stats con product_slug:
+--   Review.query.filter_by(status='approved', product_slug=...).order_by(Review.created_at.desc())
+CREATE INDEX IF NOT EXISTS ix_reviews_status_product_slug_created_at ON reviews (status, product_slug, created_at);
+
+-- review_routes.get_reviews sin producto / get_featured_reviews:
+--   Review.query.filter(Review.status == 'approved', ...).order_by(Review.created_at.desc())
+CREATE INDEX IF NOT EXISTS ix_reviews_status_created_at ON reviews (status, created_at);
+
+-- AbandonedCart.create_or_update:
+--   filter(email == ..., converted == False, created_at > cutoff)
+-- stripe_routes.stripe_webhook (marcar carritos convertidos):
+--   AbandonedCart.query.filter_by(email=..., converted=False)
+CREATE INDEX IF NOT EXISTS ix_abandoned_carts_email_converted_created_at ON abandoned_carts (email, converted, created_at);
+
+-- product_notify_routes.notify_product_available / subscribe_product_notification:
+--   ProductNotification.query.filter_by(product_id=..., notified=False)
+CREATE INDEX IF NOT EXISTS ix_product_notifications_product_id_notified ON product_notifications (product_id, notified);
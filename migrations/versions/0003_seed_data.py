@@ -0,0 +1,106 @@
+"""
+Seeds y correcciones de datos que antes se ejecutaban en cada arranque:
+catálogo inicial de productos, traducciones EN, cupones manuales,
+desactivación de cupones agotados y secuencia de IDs de web_products.
+
+Las tablas se leen de la propia base (reflexión), no de src.models: el
+seed inserta en el esquema que ha dejado 0001, con los valores por defecto
+que tenían los modelos entonces.
+"""
+from datetime import datetime
+
+from sqlalchemy import MetaData, Table, func, select, text
+
+TRANSLATIONS = {
+    'paraguayo-almibar': ('Flat Peach in Syrup', 'Artisanal flat peach in light syrup, handpicked from our orchards in Lleida.', 'Our flat peaches are carefully selected at their optimal ripeness point and preserved in a light syrup that enhances their natural sweetness. A family recipe passed down through seven generations since 1819.'),
+    'nectarina-almibar': ('Nectarine in Syrup', 'Artisanal nectarine in light syrup, handpicked from our orchards in Lleida. Sweet, juicy and full of flavour.', 'Our nectarines are harvested at their peak ripeness and preserved in a delicate light syrup. Each jar captures the essence of Mediterranean summer fruit.'),
+    'aceite-temprano-sin-filtrar': ('Unfiltered Early Harvest Extra Virgin Olive Oil 500ml', 'Premium unfiltered early harvest EVOO with intense green colour and robust flavour.', 'Our early harvest olive oil is pressed from green olives collected in October-November, before full ripeness. Higher polyphenol content and intense flavour.'),
+    'aceite-oliva-ecologico': ('Award-Winning Organic Extra Virgin Olive Oil', 'Certified organic EVOO, internationally awarded. Cold-pressed from organically grown olives.', 'Our organic extra virgin olive oil comes from certified organic olive groves in Córdoba. Produced using sustainable farming practices.'),
+    'aceite-5l-caja-3': ('Extra Virgin Olive Oil 5L', 'Family-size 5L container of premium EVOO. Perfect for daily cooking and generous use.', 'Our 5-litre format is designed for families and professionals who appreciate quality olive oil for everyday use.'),
+    'pack-mermelada-aceites': ('Premium Tasting Pack', 'A curated selection of our finest products. The perfect introduction to Mikels Earth.', 'Our Premium Tasting Pack brings together a carefully curated selection of our best products.'),
+    'pack-navidad-completo': ('Mikels Earth Complete Pack', 'The complete Mikels Earth experience. All our signature products in one exclusive pack.', 'Our Complete Pack includes every signature product from our range.'),
+    'pack-fruta-premium': ('Premium Fruit Pack', 'A selection of our finest fruit preserves. Artisanal flat peach and nectarine in syrup.', 'Our Premium Fruit Pack combines our signature fruit preserves: flat peach and nectarine in syrup.'),
+    'pack-temprano-premium': ('Premium Early Harvest Pack', 'Our finest early harvest olive oils together. The ultimate olive oil experience.', 'The Premium Early Harvest Pack features our most exclusive olive oils from the first green olives of the season.'),
+    'pack-aceite-ecologico-premium-estuche-regalo': ('Premium Organic Olive Oil Gift Box', 'Award-winning organic EVOO in an elegant gift box. The perfect present.', 'Our Premium Organic Olive Oil comes beautifully presented in an elegant gift box.')
+}
+
+# Valores por defecto de los modelos en el baseline (las tablas reflejadas no los tienen)
+PRODUCT_DEFAULTS = {
+    'currency': 'EUR', 'stock': 0, 'sold_out': False, 'subscription_available': False, 'featured': False,
+    'free_shipping': False, 'limited_edition': False, 'active': True, 'shipping_cost': 0.0,
+    'preparation_cost': 0.0, 'display_order': 0,
+}
+COUPON_DEFAULTS = {'min_order_amount': 0, 'current_uses': 0, 'active': True, 'used': False}
+
+MANUAL_COUPONS = [
+    {'code': 'dr.gemmavalls', 'description': 'Cupón colaborador - Dr. Gemma Valls', 'discount_value': 10},
+    {'code': 'ME2025', 'description': 'Cupón manual - Evento ME2025', 'discount_value': 10},
+    {'code': 'MIKELSFRIENDS', 'description': 'Cupón manual - Friends & Family (amigos)', 'discount_value': 10},
+    {'code': 'MIKELSFAMILY', 'description': 'Cupón manual - Friends & Family (familia)', 'discount_value': 20},
+    {'code': 'BIENVENIDA10', 'description': 'Cupón manual - Bienvenida genérica', 'discount_value': 10},
+    {'code': 'IRVIANCESTRAL', 'description': 'Cupón colaborador - Irvi Ancestral', 'discount_value': 10},
+]
+
+
+def _table(conn, name):
+    return Table(name, MetaData(), autoload_with=conn)
+
+
+def _seed_products(conn):
+    """Catálogo inicial: solo si web_products está vacía."""
+    products = _table(conn, 'web_products')
+    if conn.execute(select(func.count()).select_from(products)).scalar():
+        return
+    from seed_products import PRODUCTS
+    now = datetime.utcnow()
+    # Fila a fila: cada producto define un subconjunto distinto de columnas
+    for p in PRODUCTS:
+        values = {**PRODUCT_DEFAULTS, 'created_at': now, 'updated_at': now}
+        values.update({k: v for k, v in p.items() if k in products.c})
+        values['active'] = True
+        conn.execute(products.insert().values(**values))
+    print(f"Seed: {len(PRODUCTS)} productos insertados en web_products")
+
+
+def _seed_translations(conn):
+    """Traducciones EN (solo donde name_en es NULL)."""
+    for slug, (name_en, desc_en, long_desc_en) in TRANSLATIONS.items():
+        conn.execute(text(
+            "UPDATE web_products SET name_en = :n, description_en = :d, long_description_en = :ld WHERE slug = :s AND name_en IS NULL"
+        ), {'n': name_en, 'd': desc_en, 'ld': long_desc_en, 's': slug})
+
+
+def _seed_manual_coupons(conn):
+    coupons = _table(conn, 'coupons')
+    existing = {code.lower() for code in conn.execute(select(coupons.c.code)).scalars()}
+    now = datetime.utcnow()
+    rows = [
+        {**COUPON_DEFAULTS, 'code': mc['code'], 'description': mc['description'], 'discount_type': 'percentage',
+         'discount_value': mc['discount_value'], 'created_at': now}
+        for mc in MANUAL_COUPONS if mc['code'].lower() not in existing
+    ]
+    if rows:
+        conn.execute(coupons.insert(), rows)
+        print(f"Seed: {len(rows)} cupones manuales creados")
+
+
+def _fix_used_coupons(conn):
+    """Desactivar cupones usados o con max_uses alcanzado que siguen activos."""
+    coupons = _table(conn, 'coupons')
+    conn.execute(coupons.update().where(coupons.c.active == True, coupons.c.used == True).values(active=False))  # noqa: E712
+    conn.execute(
+        coupons.update()
+        .where(coupons.c.active == True, coupons.c.max_uses != None, coupons.c.current_uses >= coupons.c.max_uses)  # noqa: E711,E712
+        .values(active=False, used=True)
+    )
+
+
+def upgrade(conn):
+    _seed_products(conn)
+    _seed_translations(conn)
+    _seed_manual_coupons(conn)
+    _fix_used_coupons(conn)
+
+    # Los IDs del seed son explícitos: resetear la secuencia para evitar conflictos
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text("SELECT setval('web_products_id_seq', (SELECT COALESCE(MAX(id), 0) + 1 FROM web_products), false)"))
@@ -0,0 +1,6 @@
+"""Tabla cache_versions para el bus de invalidación de cachés en SQLite."""
+from src.models.cache_version import CacheVersion
+
+
+def upgrade(conn):
+    CacheVersion.__table__.create(bind=conn, checkfirst=True)
@@ -0,0 +1,6 @@
+"""Tabla translation_cache (traducciones por hash de contenido + idioma)."""
+from src.models.translation_cache import TranslationCache
+
+
+def upgrade(conn):
+    TranslationCache.__table__.create(bind=conn, checkfirst=True)
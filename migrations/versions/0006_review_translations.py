@@ -0,0 +1,19 @@
+"""Idioma original y traducciones precalculadas en reviews."""
+from sqlalchemy import text
+
+from src.services.migration_runner import column_exists
+
+COLUMNS = [
+    ('lang', "VARCHAR(5) DEFAULT 'es'"),
+    ('title_en', 'VARCHAR(200)'),
+    ('comment_en', 'TEXT'),
+    ('title_es', 'VARCHAR(200)'),
+    ('comment_es', 'TEXT'),
+    ('translated_at', 'TIMESTAMP'),
+]
+
+
+def upgrade(conn):
+    for name, ddl in COLUMNS:
+        if not column_exists(conn, 'reviews', name):
+            conn.execute(text(f'ALTER TABLE reviews ADD COLUMN {name} {ddl}'))
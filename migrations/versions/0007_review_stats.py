@@ -0,0 +1,22 @@
+"""Tabla review_stats con los agregados de las reseñas existentes."""
+from sqlalchemy import text
+
+from src.models.review_stats import ReviewStats
+
+
+def upgrade(conn):
+    ReviewStats.__table__.create(bind=conn, checkfirst=True)
+    conn.execute(text('DELETE FROM review_stats'))
+    conn.execute(text('''
+        INSERT INTO review_stats (product_slug, status, review_count, rating_sum,
+                                  rating_1, rating_2, rating_3, rating_4, rating_5, updated_at)
+        SELECT product_slug, status, COUNT(*), COALESCE(SUM(rating), 0),
+               SUM(CASE WHEN rating = 1 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 2 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 3 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 4 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 5 THEN 1 ELSE 0 END),
+               CURRENT_TIMESTAMP
+        FROM reviews
+        GROUP BY product_slug, status
+    '''))
@@ -0,0 +1,12 @@
+-- Migration: Índices para la paginación por cursor de GET /api/reviews
+-- Date: 2026-10-19
+-- Description: sort=highest/lowest recorre (rating, created_at, id) sin ordenar en memoria.
+-- sort=newest ya usa ix_reviews_status_[product_slug_]created_at (0002).
+
+-- review_routes.get_reviews?product_slug=...&sort=highest|lowest:
+--   filter_by(status='approved', product_slug=...).order_by(rating, created_at desc, id desc)
+CREATE INDEX IF NOT EXISTS ix_reviews_status_product_slug_rating_created_at ON reviews (status, product_slug, rating, created_at);
+
+-- review_routes.get_reviews?sort=highest|lowest sin producto:
+--   filter_by(status='approved').order_by(rating, created_at desc, id desc)
+CREATE INDEX IF NOT EXISTS ix_reviews_status_rating_created_at ON reviews (status, rating, created_at);
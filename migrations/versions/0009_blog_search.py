@@ -0,0 +1,64 @@
+"""
+Búsqueda de texto completo en el blog.
+
+- blog_posts.content_text: contenido sin HTML (se rellena para los posts existentes).
+- PostgreSQL: columna generada search_vector (español + inglés, con pesos
+  título > extracto/tags > contenido) e índice GIN.
+- SQLite: tabla FTS5 blog_posts_fts sincronizada con triggers.
+"""
+from sqlalchemy import text
+
+from src.models.blog import BlogPost
+from src.services.migration_runner import column_exists
+
+# Pesos: A título, B extracto y tags, C contenido
+_WEIGHTED = " || ".join(
+    f"setweight(to_tsvector('{config}', coalesce({column}, '')), '{weight}')"
+    for config in ('spanish', 'english')
+    for column, weight in (('title', 'A'), ('excerpt', 'B'), ('tags', 'B'), ('content_text', 'C'))
+)
+
+SQLITE_FTS = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS blog_posts_fts USING fts5(
+        title, excerpt, tags, content_text,
+        content='blog_posts', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS blog_posts_fts_ai AFTER INSERT ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts(rowid, title, excerpt, tags, content_text)
+        VALUES (new.id, new.title, new.excerpt, new.tags, new.content_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blog_posts_fts_ad AFTER DELETE ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts(blog_posts_fts, rowid, title, excerpt, tags, content_text)
+        VALUES ('delete', old.id, old.title, old.excerpt, old.tags, old.content_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blog_posts_fts_au AFTER UPDATE ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts(blog_posts_fts, rowid, title, excerpt, tags, content_text)
+        VALUES ('delete', old.id, old.title, old.excerpt, old.tags, old.content_text);
+        INSERT INTO blog_posts_fts(rowid, title, excerpt, tags, content_text)
+        VALUES (new.id, new.title, new.excerpt, new.tags, new.content_text);
+    END""",
+    "INSERT INTO blog_posts_fts(blog_posts_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade(conn):
+    if not column_exists(conn, 'blog_posts', 'content_text'):
+        conn.execute(text('ALTER TABLE blog_posts ADD COLUMN content_text TEXT'))
+
+    rows = conn.execute(text('SELECT id, content FROM blog_posts WHERE content_text IS NULL')).fetchall()
+    for post_id, content in rows:
+        conn.execute(text('UPDATE blog_posts SET content_text = :t WHERE id = :id'),
+                     {'t': BlogPost.html_to_text(content), 'id': post_id})
+
+    if conn.dialect.name == 'postgresql':
+        if not column_exists(conn, 'blog_posts', 'search_vector'):
+            conn.execute(text(
+                f'ALTER TABLE blog_posts ADD COLUMN search_vector tsvector '
+                f'GENERATED ALWAYS AS ({_WEIGHTED}) STORED'
+            ))
+        conn.execute(text(
+            'CREATE INDEX IF NOT EXISTS ix_blog_posts_search_vector ON blog_posts USING GIN (search_vector)'
+        ))
+    else:
+        for statement in SQLITE_FTS:
+            conn.execute(text(statement))
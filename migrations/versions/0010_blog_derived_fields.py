@@ -0,0 +1,33 @@
+"""
+Campos derivados del blog (reading_time, toc) y re-ingesta de los posts existentes.
+El HTML original se guarda antes en content_source: content pasa a ser la versión saneada.
+"""
+import json
+
+from sqlalchemy import text
+
+from src.services.blog_ingest import ingest_html
+from src.services.migration_runner import column_exists
+
+COLUMNS = [
+    ('reading_time', 'INTEGER'),
+    ('toc', 'JSON'),
+    ('content_source', 'TEXT'),
+]
+
+
+def upgrade(conn):
+    for name, ddl in COLUMNS:
+        if not column_exists(conn, 'blog_posts', name):
+            conn.execute(text(f'ALTER TABLE blog_posts ADD COLUMN {name} {ddl}'))
+
+    rows = conn.execute(text('SELECT id, COALESCE(content_source, content) FROM blog_posts')).fetchall()
+    for post_id, source in rows:
+        derived = ingest_html(source)
+        conn.execute(text('''
+            UPDATE blog_posts
+            SET content_source = :source, content = :content, content_text = :content_text, excerpt = :excerpt,
+                reading_time = :reading_time, toc = :toc,
+                featured_image = COALESCE(NULLIF(featured_image, ''), :first_image)
+            WHERE id = :id
+        '''), {**derived, 'source': source, 'toc': json.dumps(derived['toc']), 'id': post_id})
@@ -0,0 +1,7 @@
+"""Inventario local: inventory_levels e inventory_ledger (se llenan con flask sync-stock)."""
+from src.models.inventory import InventoryLevel, InventoryMovement
+
+
+def upgrade(conn):
+    InventoryLevel.__table__.create(bind=conn, checkfirst=True)
+    InventoryMovement.__table__.create(bind=conn, checkfirst=True)
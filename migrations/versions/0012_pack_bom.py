@@ -0,0 +1,64 @@
+"""Composición de packs (pack_components) y costes manuales (component_costs) en la DB."""
+from sqlalchemy import func, select
+
+from src.models.pack_component import ComponentCost, PackComponent
+
+# Composición que vivía en PACK_COMPONENTS: (componente, nombre, cantidad, manual)
+PACKS = {
+    'MIKPACK01': [
+        ('MIKPARJ250', 'Mermelada de Paraguayo 250g', 1, False),
+        ('botellas_degustacion', '4x Botellas aceite 14ml (muestras)', 1, True),
+    ],
+    'MIKEST01': [
+        ('estuche_cilindrico', 'Estuche cilíndrico cartón', 1, True),
+    ],
+    'MIKPACKFR': [
+        ('MIKPARA450', 'Paraguayo en Almíbar 720g', 1, False),
+        ('MIKNECT450', 'Nectarina en Almíbar 720g', 1, False),
+        ('MIKPARJ250', 'Mermelada de Paraguayo 250g', 1, False),
+        ('estuche_madera', 'Estuche de madera premium', 1, True),
+    ],
+    'MIKPACKTP': [
+        ('MIKVET500', 'Aceite Temprano 500ml sin filtrar', 1, False),
+        ('MIKEST01', 'Estuche premium temprano', 1, False),
+    ],
+    'MIKPACKCO': [
+        ('MIKVE5LP', 'Aceite de Oliva Virgen Extra 5L', 1, False),
+        ('MIKVET500', 'Aceite Temprano 500ml sin filtrar', 1, False),
+        ('MIKPARA450', 'Paraguayo en Almíbar 720g', 1, False),
+        ('MIKNECT450', 'Nectarina en Almíbar 720g', 1, False),
+        ('MIKPARJ250', 'Mermelada de Paraguayo 250g', 1, False),
+        ('botellas_degustacion', '4x Botellas aceite 14ml (muestras)', 1, True),
+        ('estuche_kraft', 'Estuche kraft premium', 1, True),
+    ],
+}
+
+
+# Costes que vivían en pack_component_costs.json
+COSTS = {
+    'botellas_degustacion': 0,
+    'estuche_cilindrico': 0,
+    'estuche_madera': 0,
+    'estuche_kraft': 0,
+}
+
+
+def upgrade(conn):
+    PackComponent.__table__.create(bind=conn, checkfirst=True)
+    ComponentCost.__table__.create(bind=conn, checkfirst=True)
+
+    costs = ComponentCost.__table__
+    existing = set(conn.execute(select(costs.c.component)).scalars())
+    rows = [{'component': component, 'cost': cost} for component, cost in COSTS.items() if component not in existing]
+    if rows:
+        conn.execute(costs.insert(), rows)
+
+    table = PackComponent.__table__
+    if conn.execute(select(func.count()).select_from(table)).scalar():
+        return
+    conn.execute(table.insert(), [
+        {'pack_sku': pack_sku, 'component': component, 'name': name, 'quantity': quantity,
+          'manual': manual, 'position': position}
+        for pack_sku, components in PACKS.items()
+        for position, (component, name, quantity, manual) in enumerate(components)
+    ])
@@ -0,0 +1,30 @@
+"""Tabla order_lines con las líneas resueltas (SKU, producto, IVA) de los pedidos existentes."""
+from sqlalchemy import text
+
+from src.models.order import OrderLine
+from src.services.order_lines import build_product_index, resolve_items
+
+
+def upgrade(conn):
+    OrderLine.__table__.create(bind=conn, checkfirst=True)
+
+    products = conn.execute(text('SELECT id, sku, name, name_en, category FROM web_products')).fetchall()
+    index = build_product_index(products)
+    orders = conn.execute(text('''
+        SELECT id, items FROM orders
+        WHERE NOT EXISTS (SELECT 1 FROM order_lines WHERE order_lines.order_id = orders.id)
+    ''')).fetchall()
+    for order_id, items in orders:
+        lines = resolve_items(items, index)
+        if not lines:
+            continue
+        conn.execute(OrderLine.__table__.insert(), [{
+            'order_id': order_id,
+            'position': position,
+            'product_id': line['product_id'],
+            'sku': line['sku'],
+            'name': line.get('name') or line['sku'] or '',
+            'quantity': line['quantity'],
+            'unit_price': line['price'] or 0,
+            'tax_rate': line['tax_rate'],
+        } for position, line in enumerate(lines)])
@@ -0,0 +1,15 @@
+"""Intentos de traducción de reseñas (reintentos con espera, ver review_translator)."""
+from sqlalchemy import text
+
+from src.services.migration_runner import column_exists
+
+COLUMNS = [
+    ('translation_attempts', 'INTEGER NOT NULL DEFAULT 0'),
+    ('translation_attempted_at', 'TIMESTAMP'),
+]
+
+
+def upgrade(conn):
+    for name, ddl in COLUMNS:
+        if not column_exists(conn, 'reviews', name):
+            conn.execute(text(f'ALTER TABLE reviews ADD COLUMN {name} {ddl}'))
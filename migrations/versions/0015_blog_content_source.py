@@ -0,0 +1,17 @@
+"""
+HTML original de los posts (content_source) y estilos en línea conservados.
+
+En las bases donde 0010 ya re-ingirió los posts con el saneado antiguo,
+que quitaba los atributos style, el original no se puede recuperar: se toma
+el content actual como original. Los posts que llegan a partir de ahora
+guardan el HTML tal cual en content_source.
+"""
+from sqlalchemy import text
+
+from src.services.migration_runner import column_exists
+
+
+def upgrade(conn):
+    if not column_exists(conn, 'blog_posts', 'content_source'):
+        conn.execute(text('ALTER TABLE blog_posts ADD COLUMN content_source TEXT'))
+    conn.execute(text('UPDATE blog_posts SET content_source = content WHERE content_source IS NULL'))
@@ -0,0 +1,53 @@
+"""
+Genera las variantes precomprimidas (.gz y, si está instalado brotli, .br)
+de los ficheros de texto de src/static, que main.serve envía según el
+Accept-Encoding del cliente (ver src/services/static_assets.py).
+
+Ejecutar después de copiar el build del frontend a src/static:
+    python precompress_static.py [directorio]
+"""
+import gzip
+import os
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'static')
+COMPRESSIBLE = ('.html', '.js', '.mjs', '.css', '.json', '.svg', '.xml', '.txt', '.map', '.ico', '.webmanifest')
+MIN_SIZE = 1024  # por debajo de esto no compensa
+
+
+def _write_if_smaller(path, data, original_size):
+    if len(data) < original_size:
+        with open(path, 'wb') as f:
+            f.write(data)
+        return True
+    if os.path.exists(path):
+        os.remove(path)  # variante obsoleta de una versión anterior
+    return False
+
+
+def precompress(root):
+    written = 0
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if not filename.endswith(COMPRESSIBLE):
+                continue
+            path = os.path.join(directory, filename)
+            with open(path, 'rb') as f:
+                data = f.read()
+            if len(data) < MIN_SIZE:
+                continue
+            written += _write_if_smaller(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0), len(data))
+            if brotli is not None:
+                written += _write_if_smaller(path + '.br', brotli.compress(data, quality=11), len(data))
+    return written
+
+
+if __name__ == '__main__':
+    root = sys.argv[1] if len(sys.argv) > 1 else STATIC_DIR
+    count = precompress(root)
+    print(f"{count} variantes generadas en {root}" + ('' if brotli else ' (brotli no instalado: solo .gz)'))
@@ -3,10 +3,15 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory, jsonify, request
+import click
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 from dotenv import load_dotenv
 from datetime import datetime
+
+# Cargar .env antes de importar blueprints/servicios: varios leen variables al importarse
+load_dotenv()
+
 from src.models.user import db
 from src.models.order import Order, Subscription
 from src.models.coupon import Coupon
@@ -27,18 +32,24 @@ from src.routes.auth_routes import auth_bp  # Autenticación Microsoft Entra ID
 from src.routes.admin_panel_routes import admin_panel_bp  # Panel de administración
 from src.routes.product_routes import product_bp  # Catálogo público de productos
 from src.routes.translate_routes import translate_bp  # Traducción de reseñas
+from src.routes.seo_routes import seo_bp  # Sitemap para crawlers
 from src.models.blog import BlogPost  # Modelo del blog
 from src.models.review import Review  # Modelo de reseñas
+from src.models.review_stats import ReviewStats  # Agregados de reseñas (listeners del mapper)
 from src.models.abandoned_cart import AbandonedCart  # Modelo de carrito abandonado
 from src.models.product_notification import ProductNotification  # Modelo notificación producto
 from src.models.admin_user import AdminUser  # Modelo usuarios admin
 from src.models.web_product import WebProduct  # Catálogo de productos web
-
-# Load environment variables
-load_dotenv()
+from src.models.inventory import InventoryLevel, InventoryMovement  # Inventario local
+from src.models.pack_component import PackComponent, ComponentCost  # Composición de packs
+from src.services import static_assets  # Ficheros del frontend (src/static)
+from src.services.compression import init_compression  # Compresión de respuestas
+from src.services.json_provider import FastJSONProvider  # Serialización JSON rápida
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT')
+# orjson (si está instalado) y fechas en ISO 8601 (ver services/json_provider.py)
+app.json = FastJSONProvider(app)
 
 # Enable CORS
 # Permitir múltiples orígenes: producción, Vercel preview, y desarrollo local
@@ -64,6 +75,9 @@ CORS(app, resources={
     }
 })
 
+# Compresión brotli/gzip de las respuestas de texto (ver services/compression.py)
+init_compression(app)
+
 # Error handler global para que los 500 incluyan CORS headers
 @app.errorhandler(500)
 def handle_500(e):
@@ -79,235 +93,6 @@ def handle_exception(e):
     response.status_code = 500
     return response
 
-# Mover creación de tablas a la primera solicitud para evitar timeout
-@app.before_request
-def create_tables():
-    if not hasattr(app, 'tables_created'):
-        try:
-            db.create_all()
-            print("Database tables created successfully")
-            # Migración: quitar unique constraint del email en coupons
-            # para permitir múltiples cupones por email (newsletter + post-compra + reseña)
-            try:
-                db.session.execute(db.text('ALTER TABLE coupons DROP CONSTRAINT IF EXISTS coupons_email_key'))
-                db.session.execute(db.text('ALTER TABLE coupons DROP CONSTRAINT IF EXISTS uq_coupons_email'))
-                db.session.commit()
-            except Exception as mig_err:
-                db.session.rollback()
-                print(f"Migration note (non-critical): {mig_err}")
-            # Migración: añadir campos de facturación y Holded a orders
-            try:
-                db.session.execute(db.text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS needs_invoice BOOLEAN DEFAULT FALSE'))
-                db.session.execute(db.text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS fiscal_name VARCHAR(200)'))
-                db.session.execute(db.text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS fiscal_nif VARCHAR(20)'))
-                db.session.execute(db.text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS fiscal_address VARCHAR(200)'))
-                db.session.execute(db.text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS fiscal_city VARCHAR(100)'))
-                db.session.execute(db.text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS fiscal_postal_code VARCHAR(20)'))
-                db.session.execute(db.text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS holded_id VARCHAR(100)'))
-                db.session.execute(db.text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS holded_invoice_id VARCHAR(100)'))
-                db.session.execute(db.text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS holded_doc_number VARCHAR(50)'))
-                db.session.execute(db.text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS email_sent BOOLEAN DEFAULT FALSE'))
-                db.session.commit()
-                print("Migration: invoice/holded fields added to orders")
-            except Exception as mig_err2:
-                db.session.rollback()
-                print(f"Migration invoice fields (non-critical): {mig_err2}")
-            # Migración: añadir campos de costes logísticos a web_products
-            try:
-                db.session.execute(db.text('ALTER TABLE web_products ADD COLUMN IF NOT EXISTS shipping_cost FLOAT DEFAULT 0.0'))
-                db.session.execute(db.text('ALTER TABLE web_products ADD COLUMN IF NOT EXISTS preparation_cost FLOAT DEFAULT 0.0'))
-                db.session.commit()
-                print("Migration: shipping_cost/preparation_cost added to web_products")
-            except Exception as mig_err3:
-                db.session.rollback()
-                print(f"Migration costs fields (non-critical): {mig_err3}")
-            # Migración: quitar NOT NULL de email en coupons (para cupones públicos sin email)
-            try:
-                db.session.execute(db.text('ALTER TABLE coupons ALTER COLUMN email DROP NOT NULL'))
-                db.session.commit()
-                print("Migration: email column now nullable in coupons")
-            except Exception as mig_err_email:
-                db.session.rollback()
-                print(f"Migration email nullable (non-critical): {mig_err_email}")
-            # Migración: añadir nuevos campos a coupons para sistema completo de cupones
-            try:
-                db.session.execute(db.text('ALTER TABLE coupons ADD COLUMN IF NOT EXISTS description VARCHAR(500)'))
-                db.session.execute(db.text('ALTER TABLE coupons ADD COLUMN IF NOT EXISTS discount_type VARCHAR(20) DEFAULT \'percentage\''))
-                db.session.execute(db.text('ALTER TABLE coupons ADD COLUMN IF NOT EXISTS discount_value FLOAT DEFAULT 10'))
-                db.session.execute(db.text('ALTER TABLE coupons ADD COLUMN IF NOT EXISTS min_order_amount FLOAT DEFAULT 0'))
-                db.session.execute(db.text('ALTER TABLE coupons ADD COLUMN IF NOT EXISTS max_uses INTEGER'))
-                db.session.execute(db.text('ALTER TABLE coupons ADD COLUMN IF NOT EXISTS current_uses INTEGER DEFAULT 0'))
-                db.session.execute(db.text('ALTER TABLE coupons ADD COLUMN IF NOT EXISTS max_uses_per_customer INTEGER'))
-                db.session.execute(db.text('ALTER TABLE coupons ADD COLUMN IF NOT EXISTS active BOOLEAN DEFAULT TRUE'))
-                db.session.execute(db.text('ALTER TABLE coupons ADD COLUMN IF NOT EXISTS expires_at TIMESTAMP'))
-                # Migrar datos existentes: copiar discount_percent a discount_value
-                db.session.execute(db.text('UPDATE coupons SET discount_value = discount_percent WHERE discount_value IS NULL AND discount_percent IS NOT NULL'))
-                db.session.commit()
-                print("Migration: coupon management fields added")
-            except Exception as mig_err4:
-                db.session.rollback()
-                print(f"Migration coupons fields (non-critical): {mig_err4}")
-            # Migración: añadir campos de traducción EN a web_products
-            try:
-                db.session.execute(db.text('ALTER TABLE web_products ADD COLUMN IF NOT EXISTS name_en VARCHAR(200)'))
-                db.session.execute(db.text('ALTER TABLE web_products ADD COLUMN IF NOT EXISTS description_en TEXT'))
-                db.session.execute(db.text('ALTER TABLE web_products ADD COLUMN IF NOT EXISTS long_description_en TEXT'))
-                db.session.commit()
-                print("Migration: translation fields (name_en, description_en, long_description_en) added to web_products")
-            except Exception as mig_err_i18n:
-                db.session.rollback()
-                print(f"Migration i18n fields (non-critical): {mig_err_i18n}")
-            # Seed de traducciones EN (idempotente - solo actualiza si name_en es NULL)
-            try:
-                translations_data = {
-                    'paraguayo-almibar': ('Flat Peach in Syrup', 'Artisanal flat peach in light syrup, handpicked from our orchards in Lleida.', 'Our flat peaches are carefully selected at their optimal ripeness point and preserved in a light syrup that enhances their natural sweetness. A family recipe passed down through seven generations since 1819.'),
-                    'nectarina-almibar': ('Nectarine in Syrup', 'Artisanal nectarine in light syrup, handpicked from our orchards in Lleida. Sweet, juicy and full of flavour.', 'Our nectarines are harvested at their peak ripeness and preserved in a delicate light syrup. Each jar captures the essence of Mediterranean summer fruit.'),
-                    'aceite-temprano-sin-filtrar': ('Unfiltered Early Harvest Extra Virgin Olive Oil 500ml', 'Premium unfiltered early harvest EVOO with intense green colour and robust flavour.', 'Our early harvest olive oil is pressed from green olives collected in October-November, before full ripeness. Higher polyphenol content and intense flavour.'),
-                    'aceite-oliva-ecologico': ('Award-Winning Organic Extra Virgin Olive Oil', 'Certified organic EVOO, internationally awarded. Cold-pressed from organically grown olives.', 'Our organic extra virgin olive oil comes from certified organic olive groves in C\u00f3rdoba. Produced using sustainable farming practices.'),
-                    'aceite-5l-caja-3': ('Extra Virgin Olive Oil 5L', 'Family-size 5L container of premium EVOO. Perfect for daily cooking and generous use.', 'Our 5-litre format is designed for families and professionals who appreciate quality olive oil for everyday use.'),
-                    'pack-mermelada-aceites': ('Premium Tasting Pack', 'A curated selection of our finest products. The perfect introduction to Mikels Earth.', 'Our Premium Tasting Pack brings together a carefully curated selection of our best products.'),
-                    'pack-navidad-completo': ('Mikels Earth Complete Pack', 'The complete Mikels Earth experience. All our signature products in one exclusive pack.', 'Our Complete Pack includes every signature product from our range.'),
-                    'pack-fruta-premium': ('Premium Fruit Pack', 'A selection of our finest fruit preserves. Artisanal flat peach and nectarine in syrup.', 'Our Premium Fruit Pack combines our signature fruit preserves: flat peach and nectarine in syrup.'),
-                    'pack-temprano-premium': ('Premium Early Harvest Pack', 'Our finest early harvest olive oils together. The ultimate olive oil experience.', 'The Premium Early Harvest Pack features our most exclusive olive oils from the first green olives of the season.'),
-                    'pack-aceite-ecologico-premium-estuche-regalo': ('Premium Organic Olive Oil Gift Box', 'Award-winning organic EVOO in an elegant gift box. The perfect present.', 'Our Premium Organic Olive Oil comes beautifully presented in an elegant gift box.')
-                }
-                seed_count = 0
-                for slug, (name_en, desc_en, long_desc_en) in translations_data.items():
-                    result = db.session.execute(db.text(
-                        "UPDATE web_products SET name_en = :n, description_en = :d, long_description_en = :ld WHERE slug = :s AND name_en IS NULL"
-                    ), {'n': name_en, 'd': desc_en, 'ld': long_desc_en, 's': slug})
-                    if result.rowcount > 0:
-                        seed_count += 1
-                db.session.commit()
-                if seed_count > 0:
-                    print(f"Seed: {seed_count} product translations added")
-            except Exception as mig_err_seed:
-                db.session.rollback()
-                print(f"Seed translations (non-critical): {mig_err_seed}")
-            # Seed de cupones manuales (idempotente - no duplica)
-            try:
-                from src.models.coupon import Coupon
-                manual_coupons = [
-                    {'code': 'dr.gemmavalls', 'description': 'Cupón colaborador - Dr. Gemma Valls', 'discount_value': 10},
-                    {'code': 'ME2025', 'description': 'Cupón manual - Evento ME2025', 'discount_value': 10},
-                    {'code': 'MIKELSFRIENDS', 'description': 'Cupón manual - Friends & Family (amigos)', 'discount_value': 10},
-                    {'code': 'MIKELSFAMILY', 'description': 'Cupón manual - Friends & Family (familia)', 'discount_value': 20},
-                    {'code': 'BIENVENIDA10', 'description': 'Cupón manual - Bienvenida genérica', 'discount_value': 10},
-                    {'code': 'IRVIANCESTRAL', 'description': 'Cupón colaborador - Irvi Ancestral', 'discount_value': 10},
-                ]
-                created_count = 0
-                for mc in manual_coupons:
-                    existing = Coupon.query.filter(db.func.lower(Coupon.code) == mc['code'].lower()).first()
-                    if not existing:
-                        new_coupon = Coupon(
-                            code=mc['code'],
-                            description=mc['description'],
-                            discount_type='percentage',
-                            discount_value=mc['discount_value'],
-                            active=True
-                        )
-                        db.session.add(new_coupon)
-                        created_count += 1
-                if created_count > 0:
-                    db.session.commit()
-                    print(f"Seed: {created_count} cupones manuales creados")
-                else:
-                    print("Seed: cupones manuales ya existen")
-            except Exception as seed_mc_err:
-                db.session.rollback()
-                print(f"Seed manual coupons (non-critical): {seed_mc_err}")
-            
-            # Fix: desactivar cupones que ya fueron usados pero siguen como active=True
-            try:
-                used_but_active = Coupon.query.filter(
-                    Coupon.active == True,
-                    Coupon.used == True
-                ).all()
-                fixed_count = 0
-                for c in used_but_active:
-                    c.active = False
-                    fixed_count += 1
-                # También desactivar los que tienen max_uses alcanzado
-                maxed_out = Coupon.query.filter(
-                    Coupon.active == True,
-                    Coupon.max_uses != None,
-                    Coupon.current_uses >= Coupon.max_uses
-                ).all()
-                for c in maxed_out:
-                    c.active = False
-                    c.used = True
-                    fixed_count += 1
-                if fixed_count > 0:
-                    db.session.commit()
-                    print(f"Fix: {fixed_count} cupones usados desactivados")
-            except Exception as fix_err:
-                db.session.rollback()
-                print(f"Fix used coupons (non-critical): {fix_err}")
-            # Seed de productos: solo si la tabla web_products está vacía
-            try:
-                product_count = WebProduct.query.count()
-                if product_count == 0:
-                    from seed_products import PRODUCTS
-                    for p_data in PRODUCTS:
-                        product = WebProduct(
-                            id=p_data['id'],
-                            name=p_data['name'],
-                            slug=p_data['slug'],
-                            sku=p_data.get('sku'),
-                            description=p_data.get('description'),
-                            long_description=p_data.get('long_description'),
-                            price=p_data['price'],
-                            original_price=p_data.get('original_price'),
-                            currency=p_data.get('currency', 'EUR'),
-                            image=p_data.get('image'),
-                            images=p_data.get('images'),
-                            category=p_data['category'],
-                            tags=p_data.get('tags'),
-                            stock=p_data.get('stock', 0),
-                            weight=p_data.get('weight'),
-                            sold_out=p_data.get('sold_out', False),
-                            sold_out_message=p_data.get('sold_out_message'),
-                            ingredients=p_data.get('ingredients'),
-                            nutritional_info=p_data.get('nutritional_info'),
-                            subscription_available=p_data.get('subscription_available', False),
-                            subscription_discount=p_data.get('subscription_discount'),
-                            subscription_frequencies=p_data.get('subscription_frequencies'),
-                            subscription_terms=p_data.get('subscription_terms'),
-                            volume_discount=p_data.get('volume_discount'),
-                            tiered_discount=p_data.get('tiered_discount'),
-                            addons=p_data.get('addons'),
-                            variants=p_data.get('variants'),
-                            includes=p_data.get('includes'),
-                            related_products=p_data.get('related_products'),
-                            claims=p_data.get('claims'),
-                            badges=p_data.get('badges'),
-                            featured=p_data.get('featured', False),
-                            free_shipping=p_data.get('free_shipping', False),
-                            limited_edition=p_data.get('limited_edition', False),
-                            award=p_data.get('award'),
-                            active=True,
-                            display_order=p_data.get('display_order', 0)
-                        )
-                        db.session.add(product)
-                    db.session.commit()
-                    print(f"Seed: {len(PRODUCTS)} productos insertados en web_products")
-                else:
-                    print(f"web_products ya tiene {product_count} productos, skip seed")
-            except Exception as seed_err:
-                db.session.rollback()
-                print(f"Seed products (non-critical): {seed_err}")
-            # Fix: resetear secuencia de IDs de web_products para evitar conflictos
-            try:
-                db.session.execute(db.text("SELECT setval('web_products_id_seq', (SELECT COALESCE(MAX(id), 0) + 1 FROM web_products), false)"))
-                db.session.commit()
-            except Exception as seq_err:
-                db.session.rollback()
-                print(f"Sequence fix (non-critical): {seq_err}")
-
-            app.tables_created = True
-        except Exception as e:
-            print(f"Error creating tables: {e}")
-
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(stripe_bp)
 app.register_blueprint(notification_bp)
@@ -325,6 +110,7 @@ app.register_blueprint(auth_bp, url_prefix='/api/auth')  # Auth Microsoft Entra
 app.register_blueprint(admin_panel_bp, url_prefix='/api/admin')  # Panel Admin
 app.register_blueprint(product_bp, url_prefix='/api')  # Catálogo público de productos
 app.register_blueprint(translate_bp, url_prefix='/api/translate')  # Traducción de reseñas
+app.register_blueprint(seo_bp)  # /sitemap.xml
 
 # Database configuration for coupons and user management
 # Use DATABASE_URL from Railway (PostgreSQL) or fallback to SQLite for local dev
@@ -342,7 +128,66 @@ else:
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 
-# Las tablas se crean en la primera solicitud (ver @app.before_request)
+
+# El esquema se gestiona con migraciones versionadas (migrations/versions/),
+# aplicadas en el release de Railway, no en el primer request de cada worker.
+@app.cli.command('migrate')
+@click.option('--status', is_flag=True, help='Solo lista las migraciones pendientes.')
+def migrate_command(status):
+    """Aplica las migraciones pendientes de migrations/versions/."""
+    from src.services.migration_runner import pending_migrations, run_migrations
+    if status:
+        pending = pending_migrations(db.engine)
+        for version, name, _ in pending:
+            print(f"  pendiente: {version:04d}_{name}")
+        print(f"{len(pending)} migraciones pendientes")
+        return
+    run_migrations(db.engine)
+
+
+@app.cli.command('translate-reviews')
+def translate_reviews_command():
+    """Traduce todas las reseñas aprobadas pendientes (backfill)."""
+    from src.services.review_translator import translate_pending_reviews
+    total = 0
+    while True:
+        claimed, translated = translate_pending_reviews()
+        if not claimed:
+            break
+        total += translated
+    print(f"{total} reseñas traducidas")
+
+
+@app.cli.command('sync-stock')
+def sync_stock_command():
+    """Reconcilia el inventario local con el stock de Holded (cron)."""
+    from src.services.inventory import reconcile_from_holded
+    result = reconcile_from_holded()
+    if result is None:
+        raise click.ClickException('Holded no ha devuelto productos')
+    print(f"{result['skus']} SKUs sincronizados, {result['adjusted']} ajustados")
+
+
+@app.cli.command('invoice-orders')
+@click.option('--month', help='Mes de cobro YYYY-MM (cierre de mes).')
+@click.option('--order-id', 'order_ids', type=int, multiple=True, help='Pedido concreto (repetible).')
+@click.option('--dry-run', is_flag=True, help='Solo lista los documentos que se crearían.')
+def invoice_orders_command(month, order_ids, dry_run):
+    """Crea en Holded las facturas/tickets de los pedidos cobrados sin documento."""
+    from src.services.holded_invoicing import InvoicingBusy, invoice_orders, pending_orders_query
+    if not month and not order_ids:
+        raise click.ClickException('Indica --month o --order-id')
+    orders = pending_orders_query(list(order_ids) or None, month).all()
+    try:
+        summary = invoice_orders(orders, dry_run=dry_run)
+    except InvoicingBusy as e:
+        raise click.ClickException(str(e))
+    for document in summary['documents']:
+        print(f"  {document['order_number']}: {document['doc_type']} {document.get('doc_number') or ''}")
+    for error in summary['errors']:
+        print(f"  {error['order_number']}: ERROR {error['error']}")
+    print(f"{summary['total']} pedidos, {summary['created']} creados, {summary['adopted']} adoptados, "
+          f"{summary['failed']} con error")
 
 # Health check endpoint para Railway
 @app.route('/api/health', methods=['GET'])
@@ -356,6 +201,19 @@ def health_check():
     }), 200
 
 
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """
+    Readiness para Railway: 503 hasta que el worker ha hecho el warmup
+    (pool de DB, snapshot del catálogo). Si el warmup falló al arrancar
+    (p.ej. DB no disponible), se reintenta aquí.
+    """
+    from src.services.warmup import is_ready, last_timings, run_warmup
+    if not is_ready() and not run_warmup(app):
+        return jsonify({'status': 'warming_up'}), 503
+    return jsonify({'status': 'ready', 'warmup': last_timings}), 200
+
+
 
 
 @app.route('/api/test-cloudinary', methods=['GET'])
@@ -624,6 +482,10 @@ def test_email():
         'timestamp': datetime.now().isoformat()
     }), 200
 
+# Índice de src/static (una vez, en el master antes del fork): serve no hace stat por petición
+static_assets.reindex(app.static_folder)
+
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
@@ -631,15 +493,20 @@ def serve(path):
     if static_folder_path is None:
             return "Static folder not configured", 404
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+    # Fichero estático (con variante .br/.gz si el cliente la acepta) o index.html (SPA)
+    response = static_assets.serve_static(request, static_folder_path, path, debug=app.debug)
+    if response is None:
+        return "index.html not found", 404
+    return response
 
 
 if __name__ == '__main__':
+    # En desarrollo local no hay fase de release: migrar antes de arrancar
+    from src.services.migration_runner import run_migrations
+    with app.app_context():
+        run_migrations(db.engine)
+    from src.services.cache_bus import start_listener
+    from src.services.warmup import run_warmup
+    start_listener(app)
+    run_warmup(app)
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -19,6 +19,10 @@ class AbandonedCart(db.Model):
     La URL de recuperación usa el cart_token como identificador único.
     """
     __tablename__ = 'abandoned_carts'
+    __table_args__ = (
+        # create_or_update (email, no convertido, recientes) y webhook de pago (email, no convertido)
+        db.Index('ix_abandoned_carts_email_converted_created_at', 'email', 'converted', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     cart_token = db.Column(db.String(64), unique=True, nullable=False, index=True)
@@ -99,7 +103,7 @@ class AbandonedCart(db.Model):
             'total': self.total,
             'discount_code': self.discount_code,
             'checkout_url': self.get_checkout_url(),
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': self.created_at,
             'recovered': self.recovered,
             'converted': self.converted
         }
@@ -26,8 +26,8 @@ class AdminUser(db.Model):
             'name': self.name,
             'role': self.role,
             'is_active': self.is_active,
-            'last_login': self.last_login.isoformat() if self.last_login else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'last_login': self.last_login,
+            'created_at': self.created_at
         }
 
     @staticmethod
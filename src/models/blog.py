@@ -1,7 +1,14 @@
 """
 Modelo BlogPost para el sistema de blog de Mikel's Earth
+
+content_text, excerpt, reading_time y toc se calculan al guardar el
+contenido (ver services/blog_ingest.py); los listados solo cargan
+SUMMARY_COLUMNS.
 """
 from datetime import datetime
+
+from sqlalchemy import event
+
 from src.models.user import db
 
 
@@ -13,12 +20,16 @@ class BlogPost(db.Model):
     title = db.Column(db.String(200), nullable=False)
     slug = db.Column(db.String(200), unique=True, nullable=False)
     content = db.Column(db.Text, nullable=False)
+    content_source = db.Column(db.Text, nullable=True)  # HTML tal como llegó (content es la versión saneada)
+    content_text = db.Column(db.Text, nullable=True)  # contenido sin HTML (búsqueda)
     excerpt = db.Column(db.Text, nullable=True)
     author = db.Column(db.String(100), default="Mikel's Earth")
     featured_image = db.Column(db.String(500), nullable=True)
     status = db.Column(db.String(20), default='published')  # 'draft' o 'published'
     category = db.Column(db.String(50), nullable=True)
     tags = db.Column(db.String(200), nullable=True)
+    reading_time = db.Column(db.Integer, nullable=True)  # minutos
+    toc = db.Column(db.JSON, nullable=True)  # [{level, id, text}] de los h2/h3
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     published_at = db.Column(db.DateTime, nullable=True)
@@ -39,9 +50,11 @@ class BlogPost(db.Model):
             'status': self.status,
             'category': self.category,
             'tags': self.tags.split(',') if self.tags else [],
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'published_at': self.published_at.isoformat() if self.published_at else None
+            'reading_time': self.reading_time,
+            'toc': self.toc or [],
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'published_at': self.published_at
         }
     
     def to_summary(self):
@@ -55,7 +68,8 @@ class BlogPost(db.Model):
             'featured_image': self.featured_image,
             'status': self.status,
             'category': self.category,
-            'published_at': self.published_at.isoformat() if self.published_at else None
+            'reading_time': self.reading_time,
+            'published_at': self.published_at
         }
     
     @staticmethod
@@ -83,19 +97,41 @@ class BlogPost(db.Model):
         return slug
     
     @staticmethod
-    def generate_excerpt(content, max_length=200):
-        """Genera un extracto del contenido"""
+    def html_to_text(content):
+        """Texto plano del HTML, con los espacios normalizados"""
         from bs4 import BeautifulSoup
         
-        # Eliminar HTML
-        soup = BeautifulSoup(content, 'html.parser')
-        text = soup.get_text()
-        
-        # Limpiar espacios
-        text = ' '.join(text.split())
+        soup = BeautifulSoup(content or '', 'html.parser')
+        return ' '.join(soup.get_text(' ').split())
+    
+    @staticmethod
+    def generate_excerpt(content, max_length=200):
+        """Genera un extracto del contenido"""
+        # Eliminar HTML y limpiar espacios
+        text = BlogPost.html_to_text(content)
         
         # Truncar
         if len(text) > max_length:
             text = text[:max_length].rsplit(' ', 1)[0] + '...'
         
         return text
+
+
+# Columnas que usa to_summary(): los listados cargan solo estas (load_only)
+SUMMARY_COLUMNS = (
+    BlogPost.id, BlogPost.title, BlogPost.slug, BlogPost.excerpt, BlogPost.author,
+    BlogPost.featured_image, BlogPost.status, BlogPost.category, BlogPost.reading_time,
+    BlogPost.published_at,
+)
+
+
+@event.listens_for(BlogPost, 'before_insert')
+@event.listens_for(BlogPost, 'before_update')
+def _ingest_content(mapper, connection, target):
+    # Red de seguridad para escrituras que asignan content sin pasar por
+    # blog_ingest.apply_ingest (scripts, consola): calcular los derivados
+    state = db.inspect(target)
+    content_changed = target.content_text is None or state.attrs.content.history.has_changes()
+    if content_changed and not state.attrs.content_text.history.has_changes():
+        from src.services.blog_ingest import apply_ingest
+        apply_ingest(target, target.content)
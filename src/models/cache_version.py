@@ -0,0 +1,16 @@
+from src.models.user import db
+from datetime import datetime
+
+
+class CacheVersion(db.Model):
+    """
+    Versión por namespace de caché. Sirve de bus de invalidación cuando no
+    hay LISTEN/NOTIFY (SQLite): cada worker sondea esta tabla y vacía las
+    cachés cuya versión ha cambiado. La versión 'blog' (ver blog_cache) se
+    incrementa con cada escritura de posts también en PostgreSQL.
+    """
+    __tablename__ = 'cache_versions'
+
+    name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -114,11 +114,11 @@ class Coupon(db.Model):
             'max_uses_per_customer': self.max_uses_per_customer,
             'active': self.active,
             'is_expired': self.is_expired,
-            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'expires_at': self.expires_at,
+            'created_at': self.created_at,
             'email': self.email,
             'used': self.used,
-            'used_at': self.used_at.isoformat() if self.used_at else None,
+            'used_at': self.used_at,
         }
     
     @staticmethod
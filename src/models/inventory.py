@@ -0,0 +1,66 @@
+"""
+Inventario local por SKU.
+
+- InventoryLevel: stock disponible de cada SKU (una fila por SKU). Es lo que
+  lee el catálogo público, sin llamar a Holded.
+- InventoryMovement: libro de movimientos (ventas, anulaciones, ajustes de
+  la reconciliación con Holded). Cada cambio de InventoryLevel deja su fila.
+
+Ver src/services/inventory.py.
+"""
+from datetime import datetime
+
+from src.models.user import db
+
+
+class InventoryLevel(db.Model):
+    __tablename__ = 'inventory_levels'
+
+    sku = db.Column(db.String(50), primary_key=True)
+    on_hand = db.Column(db.Integer, nullable=False, default=0)
+    holded_stock = db.Column(db.Integer)  # Último stock leído de Holded
+    synced_at = db.Column(db.DateTime)  # Última reconciliación con Holded
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<InventoryLevel {self.sku}: {self.on_hand}>'
+
+    def to_dict(self):
+        return {
+            'sku': self.sku,
+            'on_hand': self.on_hand,
+            'holded_stock': self.holded_stock,
+            'synced_at': self.synced_at,
+            'updated_at': self.updated_at,
+        }
+
+
+class InventoryMovement(db.Model):
+    __tablename__ = 'inventory_ledger'
+    __table_args__ = (
+        # Un pedido descuenta (o libera) cada SKU una sola vez: reintentos del webhook
+        db.Index('ux_inventory_ledger_order_sku_reason', 'order_number', 'sku', 'reason', unique=True),
+        db.Index('ix_inventory_ledger_sku_created_at', 'sku', 'created_at'),
+    )
+
+    REASONS = ('sale', 'release', 'reconcile', 'manual')
+
+    id = db.Column(db.Integer, primary_key=True)
+    sku = db.Column(db.String(50), nullable=False)
+    delta = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(20), nullable=False)  # sale, release, reconcile, manual
+    order_number = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<InventoryMovement {self.sku} {self.delta:+d} ({self.reason})>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'sku': self.sku,
+            'delta': self.delta,
+            'reason': self.reason,
+            'order_number': self.order_number,
+            'created_at': self.created_at,
+        }
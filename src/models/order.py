@@ -4,6 +4,14 @@ from src.models.user import db
 
 class Order(db.Model):
     __tablename__ = 'orders'
+    __table_args__ = (
+        # Webhooks charge.refunded / payment_intent.canceled buscan por payment_intent
+        db.Index('ix_orders_stripe_payment_intent_id', 'stripe_payment_intent_id'),
+        # Detalle de cliente web (email + orden por fecha) y verificación de compra en reseñas
+        db.Index('ix_orders_customer_email_created_at', 'customer_email', 'created_at'),
+        # Listado de pedidos del admin y últimos pedidos del dashboard
+        db.Index('ix_orders_created_at', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     order_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -57,6 +65,12 @@ class Order(db.Model):
     customer_notes = db.Column(db.Text)
     admin_notes = db.Column(db.Text)
     
+    # Líneas resueltas (SKU, producto, IVA) guardadas al cobrar el pedido
+    lines = db.relationship(
+        'OrderLine', backref='order', order_by='OrderLine.position',
+        cascade='all, delete-orphan', lazy='select'
+    )
+    
     def __repr__(self):
         return f'<Order {self.order_number}>'
     
@@ -98,9 +112,48 @@ class Order(db.Model):
             'holded_invoice_id': self.holded_invoice_id,
             'holded_doc_number': self.holded_doc_number,
             'email_sent': self.email_sent or False,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'paid_at': self.paid_at.isoformat() if self.paid_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'paid_at': self.paid_at
+        }
+
+
+class OrderLine(db.Model):
+    """
+    Línea de un pedido con el producto ya resuelto (ver services/order_lines).
+    Facturación, analítica e inventario van por SKU en lugar de por nombre.
+    """
+    __tablename__ = 'order_lines'
+    __table_args__ = (
+        db.Index('ix_order_lines_sku', 'sku'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id', ondelete='CASCADE'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    product_id = db.Column(db.Integer)  # web_products.id (None si no se pudo resolver)
+    sku = db.Column(db.String(50))
+    name = db.Column(db.String(200), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=1)
+    unit_price = db.Column(db.Float, nullable=False)  # Precio unitario CON IVA (el cobrado en Stripe)
+    tax_rate = db.Column(db.Float, nullable=False)  # 0.04, 0.10, 0.21
+    
+    def __repr__(self):
+        return f'<OrderLine {self.sku or self.name} x{self.quantity}>'
+    
+    @property
+    def net_unit_price(self):
+        """Precio unitario SIN IVA (lo que espera Holded en 'subtotal')"""
+        return round(self.unit_price / (1 + self.tax_rate), 2)
+    
+    def to_dict(self):
+        return {
+            'product_id': self.product_id,
+            'sku': self.sku,
+            'name': self.name,
+            'quantity': self.quantity,
+            'price': self.unit_price,
+            'tax_rate': self.tax_rate
         }
 
 
@@ -152,6 +205,6 @@ class Subscription(db.Model):
             'unit_price': self.unit_price,
             'frequency': self.frequency,
             'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'next_billing_date': self.next_billing_date.isoformat() if self.next_billing_date else None
+            'created_at': self.created_at,
+            'next_billing_date': self.next_billing_date
         }
@@ -0,0 +1,49 @@
+"""
+Composición de packs (BOM) y costes manuales de componentes.
+
+- PackComponent: una fila por componente de un pack. `component` es un SKU
+  (producto de Holded, que puede ser a su vez un pack) o, si manual=True,
+  el id de un componente sin SKU (estuches, botellas de muestra...).
+- ComponentCost: coste manual por id de componente o por SKU sin coste en
+  Holded. Sustituye a pack_component_costs.json.
+
+Ver src/services/pack_bom.py.
+"""
+from datetime import datetime
+
+from src.models.user import db
+
+
+class PackComponent(db.Model):
+    __tablename__ = 'pack_components'
+    __table_args__ = (
+        db.UniqueConstraint('pack_sku', 'component', name='uq_pack_components_pack_component'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    pack_sku = db.Column(db.String(50), nullable=False, index=True)
+    component = db.Column(db.String(100), nullable=False)  # SKU o id del componente manual
+    name = db.Column(db.String(200), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=1)
+    manual = db.Column(db.Boolean, nullable=False, default=False)
+    position = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<PackComponent {self.pack_sku} <- {self.quantity}x {self.component}>'
+
+    def to_dict(self):
+        """Mismo formato que el antiguo PACK_COMPONENTS: sku, o id + manual."""
+        if self.manual:
+            return {'id': self.component, 'name': self.name, 'quantity': self.quantity, 'manual': True}
+        return {'sku': self.component, 'name': self.name, 'quantity': self.quantity}
+
+
+class ComponentCost(db.Model):
+    __tablename__ = 'component_costs'
+
+    component = db.Column(db.String(100), primary_key=True)
+    cost = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ComponentCost {self.component}: {self.cost}>'
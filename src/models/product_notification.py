@@ -5,6 +5,10 @@ import uuid
 
 class ProductNotification(db.Model):
     __tablename__ = 'product_notifications'
+    __table_args__ = (
+        # Aviso de disponibilidad y listado de suscriptores pendientes por producto
+        db.Index('ix_product_notifications_product_id_notified', 'product_id', 'notified'),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     email = db.Column(db.String(255), nullable=False)
@@ -22,5 +26,5 @@ class ProductNotification(db.Model):
             'product_name': self.product_name,
             'product_id': self.product_id,
             'notified': self.notified,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
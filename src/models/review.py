@@ -15,6 +15,15 @@ class Review(db.Model):
     Cada reseña está asociada a un email, un producto, y opcionalmente a un pedido.
     """
     __tablename__ = 'reviews'
+    __table_args__ = (
+        # GET /api/reviews?product_slug=... y /stats (status + producto, orden por fecha)
+        db.Index('ix_reviews_status_product_slug_created_at', 'status', 'product_slug', 'created_at'),
+        # GET /api/reviews sin producto y /featured (status, orden por fecha)
+        db.Index('ix_reviews_status_created_at', 'status', 'created_at'),
+        # GET /api/reviews?sort=highest|lowest (cursor sobre rating, created_at, id)
+        db.Index('ix_reviews_status_product_slug_rating_created_at', 'status', 'product_slug', 'rating', 'created_at'),
+        db.Index('ix_reviews_status_rating_created_at', 'status', 'rating', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -31,6 +40,16 @@ class Review(db.Model):
     title = db.Column(db.String(200), nullable=True)
     comment = db.Column(db.Text, nullable=False)
     
+    # Idioma original y traducciones (las rellena review_translator en segundo plano)
+    lang = db.Column(db.String(5), default='es', nullable=True)
+    title_en = db.Column(db.String(200), nullable=True)
+    comment_en = db.Column(db.Text, nullable=True)
+    title_es = db.Column(db.String(200), nullable=True)
+    comment_es = db.Column(db.Text, nullable=True)
+    translated_at = db.Column(db.DateTime, nullable=True)
+    translation_attempts = db.Column(db.Integer, default=0, nullable=False)
+    translation_attempted_at = db.Column(db.DateTime, nullable=True)
+    
     # Estado y moderación
     status = db.Column(db.String(20), default='approved', nullable=False)  # pending, approved, rejected
     is_verified_purchase = db.Column(db.Boolean, default=False, nullable=False)
@@ -63,7 +82,7 @@ class Review(db.Model):
             'is_verified_purchase': self.is_verified_purchase,
             'order_number': self.order_number,
             'reward_coupon_code': self.reward_coupon_code,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
     
     def to_public_dict(self):
@@ -77,5 +96,24 @@ class Review(db.Model):
             'title': self.title,
             'comment': self.comment,
             'is_verified_purchase': self.is_verified_purchase,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at,
+            'lang': self.lang or 'es',
+            'translations': self.translations()
         }
+    
+    def translations(self):
+        """Traducciones disponibles: {'en': {'title': ..., 'comment': ...}}"""
+        result = {}
+        if self.comment_en:
+            result['en'] = {'title': self.title_en or '', 'comment': self.comment_en}
+        if self.comment_es:
+            result['es'] = {'title': self.title_es or '', 'comment': self.comment_es}
+        return result
+    
+    def clear_translations(self):
+        """Al editar el texto las traducciones dejan de ser válidas."""
+        self.title_en = self.comment_en = None
+        self.title_es = self.comment_es = None
+        self.translated_at = None
+        self.translation_attempts = 0
+        self.translation_attempted_at = None
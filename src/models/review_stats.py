@@ -0,0 +1,123 @@
+"""
+Modelo ReviewStats - Agregados de reseñas por (producto, estado).
+
+Se mantiene de forma incremental con eventos del mapper de Review (en la
+misma transacción que la escritura de la reseña), así las estrellas del
+catálogo y los totales de /api/reviews no tienen que recorrer las reseñas.
+"""
+from datetime import datetime
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from src.models.user import db
+from src.models.review import Review
+
+
+class ReviewStats(db.Model):
+    __tablename__ = 'review_stats'
+
+    product_slug = db.Column(db.String(200), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_1 = db.Column(db.Integer, nullable=False, default=0)
+    rating_2 = db.Column(db.Integer, nullable=False, default=0)
+    rating_3 = db.Column(db.Integer, nullable=False, default=0)
+    rating_4 = db.Column(db.Integer, nullable=False, default=0)
+    rating_5 = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def average_rating(self):
+        return round(self.rating_sum / self.review_count, 1) if self.review_count else 0
+
+    @property
+    def rating_distribution(self):
+        return {n: getattr(self, f'rating_{n}') for n in range(1, 6)}
+
+    @classmethod
+    def approved(cls, product_slug=None):
+        """Totales de reseñas aprobadas de un producto (o de todos si no se indica)."""
+        query = cls.query.filter_by(status='approved')
+        if product_slug:
+            query = query.filter_by(product_slug=product_slug)
+        totals = cls(review_count=0, rating_sum=0, **{f'rating_{n}': 0 for n in range(1, 6)})
+        for stats in query.all():
+            totals.review_count += stats.review_count
+            totals.rating_sum += stats.rating_sum
+            for n in range(1, 6):
+                setattr(totals, f'rating_{n}', getattr(totals, f'rating_{n}') + getattr(stats, f'rating_{n}'))
+        return totals
+
+    def to_dict(self):
+        """Mismo formato que GET /api/reviews/stats"""
+        return {
+            'total_reviews': self.review_count,
+            'average_rating': self.average_rating,
+            'rating_distribution': self.rating_distribution
+        }
+
+
+def _adjust(connection, slug, status, rating, delta):
+    """Suma `delta` reseñas con `rating` a la fila (slug, status), creándola si no existe."""
+    if connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    table = ReviewStats.__table__
+    rating = int(rating) if rating is not None else None
+    increments = {'review_count': delta, 'rating_sum': (rating or 0) * delta}
+    if rating in (1, 2, 3, 4, 5):
+        increments[f'rating_{rating}'] = delta
+
+    initial = {f'rating_{n}': 0 for n in range(1, 6)}
+    initial.update(increments)
+    stmt = insert(table).values(product_slug=slug, status=status, updated_at=datetime.utcnow(), **initial)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['product_slug', 'status'],
+        set_={**{k: table.c[k] + v for k, v in increments.items()}, 'updated_at': datetime.utcnow()}
+    )
+    connection.execute(stmt)
+
+
+def _mark_changed(target):
+    # catalog_cache lo consulta en after_commit para refrescar las estrellas del catálogo
+    Session.object_session(target).info['review_stats_changed'] = True
+
+
+@event.listens_for(Review, 'after_insert')
+def _review_inserted(mapper, connection, target):
+    _adjust(connection, target.product_slug, target.status, target.rating, 1)
+    _mark_changed(target)
+
+
+@event.listens_for(Review, 'after_delete')
+def _review_deleted(mapper, connection, target):
+    _adjust(connection, target.product_slug, target.status, target.rating, -1)
+    _mark_changed(target)
+
+
+def _load_previous(target, value, oldvalue, initiator):
+    return value
+
+
+# active_history: al asignar sobre una instancia expirada (p.ej. tras un commit)
+# se carga el valor anterior, que after_update necesita para restarlo
+for _attr in (Review.product_slug, Review.status, Review.rating):
+    event.listen(_attr, 'set', _load_previous, active_history=True, retval=True)
+
+
+@event.listens_for(Review, 'after_update')
+def _review_updated(mapper, connection, target):
+    state = inspect(target)
+    old = {}
+    for attr in ('product_slug', 'status', 'rating'):
+        history = state.attrs[attr].history
+        old[attr] = history.deleted[0] if history.deleted else getattr(target, attr)
+    if old == {'product_slug': target.product_slug, 'status': target.status, 'rating': target.rating}:
+        return  # p.ej. solo cambió la traducción
+    _adjust(connection, old['product_slug'], old['status'], old['rating'], -1)
+    _adjust(connection, target.product_slug, target.status, target.rating, 1)
+    _mark_changed(target)
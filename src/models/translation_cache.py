@@ -0,0 +1,24 @@
+"""
+Modelo TranslationCache - Traducciones ya generadas por OpenAI.
+Clave: hash del contenido original (título + texto) + idioma destino, de modo
+que el mismo texto se traduce una sola vez aunque lo pidan muchos visitantes.
+"""
+from datetime import datetime
+from src.models.user import db
+
+
+class TranslationCache(db.Model):
+    __tablename__ = 'translation_cache'
+    __table_args__ = (
+        db.UniqueConstraint('content_hash', 'target_lang', name='uq_translation_cache_hash_lang'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False)  # sha256 hex
+    target_lang = db.Column(db.String(5), nullable=False)
+    translated_title = db.Column(db.Text)
+    translated_text = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<TranslationCache {self.content_hash[:12]} -> {self.target_lang}>'
@@ -88,74 +88,44 @@ class WebProduct(db.Model):
     def __repr__(self):
         return f'<WebProduct {self.name}>'
     
-    def to_frontend_dict(self, lang='es'):
+    def to_frontend_dict(self, lang='es', rating=None, fields=None, stock=None):
         """
         Devuelve el producto en el formato exacto que espera el frontend (products.js).
         Esto garantiza compatibilidad total con el carrito, la tienda y las páginas de producto.
         Si lang='en' y hay traducción disponible, devuelve el contenido en inglés.
+        rating: {'average', 'count'} de review_stats (el catálogo lo pasa ya calculado).
+        fields: claves del frontend a incluir (None = todas); solo se leen sus
+        columnas, así funciona con load_only(*WebProduct.columns_for(fields)).
+        stock: unidades del inventario local (inventory_levels); si se indica
+        sustituye a la columna stock y sin unidades el producto sale agotado.
         """
-        # Seleccionar nombre y descripciones según idioma
-        name = (self.name_en if lang == 'en' and self.name_en else self.name)
-        description = (self.description_en if lang == 'en' and self.description_en else self.description)
-        long_description = (self.long_description_en if lang == 'en' and self.long_description_en else self.long_description)
-        
-        result = {
-            'id': self.id,
-            'name': name,
-            'slug': self.slug,
-            'description': description,
-            'longDescription': long_description,
-            'price': self.price,
-            'currency': self.currency,
-            'image': self.image,
-            'images': self.images or [],
-            'category': self.category,
-            'tags': self.tags or [],
-            'stock': self.stock,
-            'weight': self.weight,
-            'ingredients': self.ingredients,
-            'nutritionalInfo': self.nutritional_info,
-            'subscriptionAvailable': self.subscription_available or False,
-            'subscriptionDiscount': self.subscription_discount,
-            'subscriptionFrequencies': self.subscription_frequencies or [],
-        }
-        
-        # Campos opcionales - solo incluir si tienen valor
-        if self.sold_out:
-            result['soldOut'] = True
-        if self.sold_out_message:
-            result['soldOutMessage'] = self.sold_out_message
-        if self.original_price:
-            result['originalPrice'] = self.original_price
-        if self.volume_discount:
-            result['volumeDiscount'] = self.volume_discount
-        if self.tiered_discount:
-            result['tieredDiscount'] = self.tiered_discount
-        if self.addons:
-            result['addons'] = self.addons
-        if self.variants:
-            result['variants'] = self.variants
-        if self.includes:
-            result['includes'] = self.includes
-        if self.related_products:
-            result['relatedProducts'] = self.related_products
-        if self.claims:
-            result['claims'] = self.claims
-        if self.badges:
-            result['badges'] = self.badges
-        if self.featured:
-            result['featured'] = True
-        if self.free_shipping:
-            result['freeShipping'] = True
-        if self.limited_edition:
-            result['limitedEdition'] = True
-        if self.award:
-            result['award'] = self.award
-        if self.subscription_terms:
-            result['subscriptionTerms'] = self.subscription_terms
-        
+        result = {}
+        for key, _, value, optional in FRONTEND_FIELDS:
+            if fields is not None and key not in fields:
+                continue
+            if key == 'rating':
+                result['rating'] = rating or {'average': 0, 'count': 0}
+                continue
+            value = value(self, lang)
+            if stock is not None and key == 'stock':
+                value = stock
+            elif stock is not None and key == 'soldOut':
+                value = value or stock <= 0
+            # Campos opcionales - solo incluir si tienen valor
+            if optional and not value:
+                continue
+            result[key] = value
         return result
     
+    @staticmethod
+    def columns_for(fields):
+        """Columnas del modelo que necesita to_frontend_dict(fields=...)."""
+        names = {'id', 'slug'}
+        for key, columns, _, _ in FRONTEND_FIELDS:
+            if fields is None or key in fields:
+                names.update(columns)
+        return [getattr(WebProduct, name) for name in sorted(names)]
+    
     def to_admin_dict(self):
         """Devuelve el producto con todos los campos para el panel admin."""
         d = self.to_frontend_dict()
@@ -164,6 +134,58 @@ class WebProduct(db.Model):
         d['displayOrder'] = self.display_order
         d['shippingCost'] = self.shipping_cost or 0
         d['preparationCost'] = self.preparation_cost or 0
-        d['createdAt'] = self.created_at.isoformat() if self.created_at else None
-        d['updatedAt'] = self.updated_at.isoformat() if self.updated_at else None
+        d['createdAt'] = self.created_at
+        d['updatedAt'] = self.updated_at
         return d
+
+
+def _localized(field):
+    # Versión en inglés si lang='en' y hay traducción
+    def value(product, lang):
+        translated = getattr(product, f'{field}_en')
+        return translated if lang == 'en' and translated else getattr(product, field)
+    return value
+
+
+def _column(name, empty=None):
+    return lambda product, lang: getattr(product, name) if empty is None else (getattr(product, name) or empty)
+
+
+# (clave del frontend, columnas que necesita, valor, solo si tiene valor)
+FRONTEND_FIELDS = [
+    ('id', ('id',), _column('id'), False),
+    ('name', ('name', 'name_en'), _localized('name'), False),
+    ('slug', ('slug',), _column('slug'), False),
+    ('description', ('description', 'description_en'), _localized('description'), False),
+    ('longDescription', ('long_description', 'long_description_en'), _localized('long_description'), False),
+    ('price', ('price',), _column('price'), False),
+    ('currency', ('currency',), _column('currency'), False),
+    ('image', ('image',), _column('image'), False),
+    ('images', ('images',), _column('images', []), False),
+    ('category', ('category',), _column('category'), False),
+    ('tags', ('tags',), _column('tags', []), False),
+    ('stock', ('stock', 'sku'), _column('stock'), False),
+    ('weight', ('weight',), _column('weight'), False),
+    ('ingredients', ('ingredients',), _column('ingredients'), False),
+    ('nutritionalInfo', ('nutritional_info',), _column('nutritional_info'), False),
+    ('subscriptionAvailable', ('subscription_available',), _column('subscription_available', False), False),
+    ('subscriptionDiscount', ('subscription_discount',), _column('subscription_discount'), False),
+    ('subscriptionFrequencies', ('subscription_frequencies',), _column('subscription_frequencies', []), False),
+    ('rating', (), None, False),
+    ('soldOut', ('sold_out', 'sku'), lambda product, lang: bool(product.sold_out), True),
+    ('soldOutMessage', ('sold_out_message',), _column('sold_out_message'), True),
+    ('originalPrice', ('original_price',), _column('original_price'), True),
+    ('volumeDiscount', ('volume_discount',), _column('volume_discount'), True),
+    ('tieredDiscount', ('tiered_discount',), _column('tiered_discount'), True),
+    ('addons', ('addons',), _column('addons'), True),
+    ('variants', ('variants',), _column('variants'), True),
+    ('includes', ('includes',), _column('includes'), True),
+    ('relatedProducts', ('related_products',), _column('related_products'), True),
+    ('claims', ('claims',), _column('claims'), True),
+    ('badges', ('badges',), _column('badges'), True),
+    ('featured', ('featured',), lambda product, lang: bool(product.featured), True),
+    ('freeShipping', ('free_shipping',), lambda product, lang: bool(product.free_shipping), True),
+    ('limitedEdition', ('limited_edition',), lambda product, lang: bool(product.limited_edition), True),
+    ('award', ('award',), _column('award'), True),
+    ('subscriptionTerms', ('subscription_terms',), _column('subscription_terms'), True),
+]
@@ -88,7 +88,12 @@ def save_abandoned_cart():
 def recover_cart(token):
     """
     Recuperar un carrito abandonado por su token.
-    Devuelve los items del carrito para que el frontend lo cargue.
+    Devuelve los items del carrito para que el frontend lo cargue, junto con
+    los datos actuales de sus productos ('products', del catálogo en memoria)
+    para no tener que pedirlos uno a uno.
+    
+    Query params:
+    - lang: idioma de los productos ('es' por defecto)
     """
     try:
         cart = AbandonedCart.query.filter_by(cart_token=token).first()
@@ -106,9 +111,18 @@ def recover_cart(token):
             from src.models.user import db
             db.session.commit()
         
+        from src.services.catalog_cache import lookup_products
+        items = [item for item in (cart.items or []) if isinstance(item, dict)]
+        # En el orden del carrito: slug si lo tiene, si no id
+        refs = [item['slug'] if item.get('slug') else item['id'] for item in items
+                if item.get('slug') or isinstance(item.get('id'), int)]
+        products, missing = lookup_products(request.args.get('lang', 'es'), refs)
+        
         return jsonify({
             'success': True,
-            'cart': cart.to_dict()
+            'cart': cart.to_dict(),
+            'products': products,
+            'missing_products': missing
         }), 200
         
     except Exception as e:
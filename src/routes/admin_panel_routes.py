@@ -2,7 +2,7 @@
 Rutas del Panel de Administración - Gestión de productos, precios, stock y pedidos.
 Requiere autenticación Microsoft Entra ID.
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, send_file
 from src.routes.auth_routes import admin_required, role_required
 from src.services.holded_service import (
     holded_get_products,
@@ -12,9 +12,6 @@ from src.services.holded_service import (
     holded_get_contact,
     holded_find_contact_by_email,
     holded_create_sales_order,
-    holded_create_invoice,
-    holded_create_salesreceipt,
-    holded_get_invoice_pdf,
     holded_get_warehouses,
     holded_get_or_create_contact,
     holded_get_contact_invoices,
@@ -27,12 +24,16 @@ from src.services.holded_service import (
     HOLDED_API_KEY
 )
 from src.models.user import db
+from src.services.catalog_cache import invalidate_catalog
+from src.services.tax_rates import net_price, rate_for, rate_from_holded_taxes
 from datetime import datetime
-import json
 import os
 
 admin_panel_bp = Blueprint('admin_panel', __name__)
 
+# Facturación por lotes desde el panel: por debajo del timeout de gunicorn (120 s)
+INVOICE_BATCH_TIME_BUDGET = float(os.getenv('INVOICE_BATCH_TIME_BUDGET', '90'))
+
 
 # ============================================================
 # PRODUCTOS Y PRECIOS
@@ -55,8 +56,9 @@ def get_products():
     # Leer costes de portes y preparación
     product_costs = _get_product_costs()
 
-    # Calcular costes de packs basados en componentes
-    pack_costs = _calculate_pack_costs(holded_products)
+    # Calcular costes de packs basados en componentes (memorizado, ver pack_bom)
+    from src.services.pack_bom import pack_costs as calculate_pack_costs
+    pack_costs = calculate_pack_costs(holded_products)
 
     result = []
     matched_web_skus = set()
@@ -67,20 +69,9 @@ def get_products():
         if web_match:
             matched_web_skus.add(sku)
 
-        # Determinar IVA: aceites alimentarios 4%, conservas 10%, otros 21%
-        iva_rate = 0.04  # Por defecto 4% para AOVE
+        # Determinar IVA: si tiene info de impuestos en Holded, usarla (4% por defecto)
         taxes = p.get('taxes', [])
-        if taxes:
-            # Si tiene info de impuestos en Holded, usarla
-            for tax in taxes:
-                if isinstance(tax, dict):
-                    tax_val = tax.get('tax', '')
-                    if '10' in str(tax_val):
-                        iva_rate = 0.10
-                    elif '21' in str(tax_val):
-                        iva_rate = 0.21
-                    elif '4' in str(tax_val):
-                        iva_rate = 0.04
+        iva_rate = rate_from_holded_taxes(taxes)
 
         sku_costs = product_costs.get(sku, {})
         # Para packs: usar coste calculado de componentes si es mayor que el coste de Holded
@@ -118,14 +109,8 @@ def get_products():
     # Añadir productos web que NO tienen match en Holded
     for sku, wp in web_prices.items():
         if sku not in matched_web_skus:
-            # Determinar IVA por categoría
-            cat = wp.get('category', '').lower()
-            if cat in ('conservas',):
-                iva_rate = 0.10
-            elif cat in ('aceites',):
-                iva_rate = 0.04
-            else:
-                iva_rate = 0.04  # Packs de aceite/conserva → 4% por defecto
+            # Determinar IVA por SKU o categoría (packs de aceite/conserva → 4%)
+            iva_rate = rate_for(sku, wp.get('category'))
 
             sku_costs = product_costs.get(sku, {})
             # Para packs web_only: usar coste calculado de componentes
@@ -204,7 +189,7 @@ def sync_prices_from_holded():
     Trae los precios de Holded y los muestra para que el admin decida
     si quiere actualizarlos en la web.
     """
-    holded_products = holded_get_products()
+    holded_products = holded_get_products(use_cache=False)
     web_prices = _get_web_prices()
 
     differences = []
@@ -317,67 +302,39 @@ def update_product_costs(sku):
 def get_pack_components():
     """
     Devuelve la composición de todos los packs con sus costes.
-    Para componentes con SKU: coste de Holded.
-    Para componentes manuales: coste de pack_component_costs.json.
+    Para componentes con SKU: coste de Holded (o del pack, si el componente es un pack).
+    Para componentes manuales o sin coste en Holded: coste manual (component_costs).
     """
-    holded_products = holded_get_products()
-    
-    # Mapa de costes por SKU desde Holded
-    cost_by_sku = {}
-    for p in holded_products:
-        sku = p.get('sku', '')
-        if sku:
-            cost_by_sku[sku] = p.get('cost', 0) or 0
-
-    # Costes manuales
-    manual_costs = _get_pack_component_costs()
-
-    result = {}
-    for pack_sku, components in PACK_COMPONENTS.items():
-        pack_detail = []
-        total_cost = 0
-        for comp in components:
-            if comp.get('manual'):
-                comp_id = comp.get('id', '')
-                comp_cost = manual_costs.get(comp_id, 0)
-                pack_detail.append({
-                    'id': comp_id,
-                    'name': comp.get('name', ''),
-                    'quantity': comp.get('quantity', 1),
-                    'cost': comp_cost,
-                    'source': 'manual',
-                    'editable': True
-                })
-            else:
-                comp_sku = comp.get('sku', '')
-                holded_cost = cost_by_sku.get(comp_sku, 0)
-                # Si Holded tiene coste > 0, usarlo. Si no, buscar coste manual.
-                if holded_cost > 0:
-                    comp_cost = holded_cost
-                    source = 'holded'
-                    editable = False
-                else:
-                    # Sin coste en Holded: permitir edición manual
-                    comp_cost = manual_costs.get(comp_sku, 0)
-                    source = 'manual' if comp_cost > 0 else 'sin_coste'
-                    editable = True
-                pack_detail.append({
-                    'id': comp_sku,  # Usar SKU como id para guardar coste manual
-                    'sku': comp_sku,
-                    'name': comp.get('name', ''),
-                    'quantity': comp.get('quantity', 1),
-                    'cost': comp_cost,
-                    'source': source,
-                    'editable': editable
-                })
-            total_cost += comp_cost * comp.get('quantity', 1)
-        
-        result[pack_sku] = {
-            'components': pack_detail,
-            'total_cost': round(total_cost, 2)
-        }
+    from src.services.pack_bom import pack_breakdown
+    try:
+        return jsonify({'packs': pack_breakdown(holded_get_products())})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 500
 
-    return jsonify({'packs': result})
+
+@admin_panel_bp.route('/products/pack-components/<pack_sku>', methods=['PUT'])
+@admin_required
+@role_required('admin')
+def update_pack_components(pack_sku):
+    """
+    Sustituye la composición de un pack.
+    Body: { components: [{sku, name, quantity} | {id, name, quantity, manual: true}] }
+    Un pack puede contener otros packs, pero no a sí mismo (directa o indirectamente).
+    """
+    from src.services.pack_bom import get_bom, set_pack_components
+    data = request.get_json() or {}
+    components = data.get('components')
+    if not isinstance(components, list):
+        return jsonify({'error': 'components debe ser una lista'}), 400
+    try:
+        set_pack_components(pack_sku, components)
+    except (TypeError, ValueError) as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    return jsonify({'success': True, 'pack_sku': pack_sku, 'components': get_bom().get(pack_sku, [])})
 
 
 @admin_panel_bp.route('/products/pack-component-cost', methods=['PUT'])
@@ -388,6 +345,7 @@ def update_pack_component_cost():
     Actualiza el coste manual de un componente de pack.
     Body: { component_id: string, cost: float }
     """
+    from src.services.pack_bom import set_component_cost
     try:
         data = request.get_json()
         component_id = data.get('component_id', '')
@@ -396,9 +354,7 @@ def update_pack_component_cost():
         if not component_id:
             return jsonify({'error': 'component_id es obligatorio'}), 400
 
-        costs = _get_pack_component_costs()
-        costs[component_id] = cost
-        _save_pack_component_costs(costs)
+        set_component_cost(component_id, cost)
 
         return jsonify({
             'success': True,
@@ -406,6 +362,7 @@ def update_pack_component_cost():
             'cost': cost
         })
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
@@ -435,6 +392,7 @@ def update_web_price(sku):
         old_price = product.price
         product.price = new_price
         db.session.commit()
+        invalidate_catalog()
 
         # Sincronizar precio con Holded
         holded_updated = False
@@ -471,17 +429,6 @@ HOLDED_PRODUCT_IDS = {
     'MIKNECT450': '6a057b1c8111f9de8e0f0ab8',
 }
 
-# IVA por tipo de producto para calcular precio base (sin IVA) desde precio web (con IVA)
-IVA_RATES_BY_SKU = {
-    'MIKBIO19': 0.04,    # Aceite ecológico → 4%
-    'MIKVE500': 0.04,    # Aceite equilibrado → 4%
-    'MIKVE5LP': 0.04,    # Aceite 5L → 4%
-    'MIKVET500': 0.04,   # Aceite temprano → 4%
-    'MIKPARA450': 0.10,  # Paraguayo conserva → 10%
-    'MIKNECT450': 0.10,  # Nectarina conserva → 10%
-    'MIKPARJ250': 0.10,  # Mermelada → 10%
-    'MIKPACKYPO': 0.04,  # Pack degustación → 4%
-}
 
 def _sync_price_to_holded(sku, web_price_with_iva):
     """
@@ -494,8 +441,7 @@ def _sync_price_to_holded(sku, web_price_with_iva):
     if not holded_id:
         return False  # Producto no está en Holded (ej: packs sin SKU en Holded)
 
-    iva_rate = IVA_RATES_BY_SKU.get(sku, 0.04)
-    price_without_iva = round(web_price_with_iva / (1 + iva_rate), 5)
+    price_without_iva = net_price(web_price_with_iva, rate_for(sku), digits=5)
 
     response = req.put(
         f'https://api.holded.com/api/invoicing/v1/products/{holded_id}',
@@ -597,6 +543,7 @@ def create_web_product():
         
         db.session.add(product)
         db.session.commit()
+        invalidate_catalog()
         
         return jsonify({
             'success': True,
@@ -704,6 +651,7 @@ def update_web_product(product_id):
             product.preparation_cost = float(data['preparationCost'])
         
         db.session.commit()
+        invalidate_catalog()
         
         return jsonify({
             'success': True,
@@ -727,6 +675,7 @@ def delete_web_product(product_id):
         
         product.active = False
         db.session.commit()
+        invalidate_catalog()
         
         return jsonify({
             'success': True,
@@ -751,6 +700,7 @@ def toggle_web_product_active(product_id):
         
         product.active = not product.active
         db.session.commit()
+        invalidate_catalog()
         
         return jsonify({
             'success': True,
@@ -771,6 +721,7 @@ def auto_translate_product(product_id):
     Guarda el resultado en los campos name_en, description_en, long_description_en.
     """
     from src.models.web_product import WebProduct
+    from src.services.product_translator import parse_labeled_fields
     import requests as http_requests
     try:
         product = WebProduct.query.get(product_id)
@@ -826,56 +777,10 @@ def auto_translate_product(product_id):
         result = response.json()['choices'][0]['message']['content'].strip()
         
         # Parse the response
-        name_en = ''
-        description_en = ''
-        long_description_en = ''
-        
-        lines = result.split('\n')
-        current_field = None
-        current_content = []
-        
-        for line in lines:
-            if line.startswith('Name:'):
-                if current_field and current_content:
-                    if current_field == 'name':
-                        name_en = '\n'.join(current_content).strip()
-                    elif current_field == 'short':
-                        description_en = '\n'.join(current_content).strip()
-                    elif current_field == 'long':
-                        long_description_en = '\n'.join(current_content).strip()
-                current_field = 'name'
-                current_content = [line.replace('Name:', '').strip()]
-            elif line.startswith('Short description:'):
-                if current_field and current_content:
-                    if current_field == 'name':
-                        name_en = '\n'.join(current_content).strip()
-                    elif current_field == 'short':
-                        description_en = '\n'.join(current_content).strip()
-                    elif current_field == 'long':
-                        long_description_en = '\n'.join(current_content).strip()
-                current_field = 'short'
-                current_content = [line.replace('Short description:', '').strip()]
-            elif line.startswith('Long description:'):
-                if current_field and current_content:
-                    if current_field == 'name':
-                        name_en = '\n'.join(current_content).strip()
-                    elif current_field == 'short':
-                        description_en = '\n'.join(current_content).strip()
-                    elif current_field == 'long':
-                        long_description_en = '\n'.join(current_content).strip()
-                current_field = 'long'
-                current_content = [line.replace('Long description:', '').strip()]
-            else:
-                current_content.append(line)
-        
-        # Save last field
-        if current_field and current_content:
-            if current_field == 'name':
-                name_en = '\n'.join(current_content).strip()
-            elif current_field == 'short':
-                description_en = '\n'.join(current_content).strip()
-            elif current_field == 'long':
-                long_description_en = '\n'.join(current_content).strip()
+        fields = parse_labeled_fields(result)
+        name_en = fields.get('Name', '')
+        description_en = fields.get('Short description', '')
+        long_description_en = fields.get('Long description', '')
         
         # Update product
         if name_en:
@@ -886,6 +791,7 @@ def auto_translate_product(product_id):
             product.long_description_en = long_description_en
         
         db.session.commit()
+        invalidate_catalog()
         
         return jsonify({
             'success': True,
@@ -901,6 +807,27 @@ def auto_translate_product(product_id):
         return jsonify({'error': str(e)}), 500
 
 
+@admin_panel_bp.route('/web-products/auto-translate-missing', methods=['POST'])
+@admin_required
+@role_required('admin')
+def auto_translate_missing_products():
+    """
+    Traduce al inglés todos los productos con name_en/description_en/long_description_en vacíos.
+    Lotes de varios productos por llamada a OpenAI y caché por hash de contenido.
+    """
+    from src.services.product_translator import translate_missing_products
+    try:
+        if not os.getenv('OPENAI_API_KEY'):
+            return jsonify({'error': 'OPENAI_API_KEY no configurada en el servidor'}), 500
+        summary = translate_missing_products()
+        if summary['updated_products']:
+            invalidate_catalog()
+        return jsonify({'success': True, **summary})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @admin_panel_bp.route('/web-products/<int:product_id>/image', methods=['POST'])
 @admin_required
 @role_required('admin')
@@ -971,6 +898,7 @@ def upload_product_image(product_id):
             product.images = current_images
         
         db.session.commit()
+        invalidate_catalog()
         
         return jsonify({
             'success': True,
@@ -991,8 +919,38 @@ def upload_product_image(product_id):
 @admin_panel_bp.route('/stock', methods=['GET'])
 @admin_required
 def get_stock():
-    """Devuelve el stock actual de todos los productos desde Holded"""
-    holded_products = holded_get_products()
+    """
+    Devuelve el stock de todos los SKUs desde el inventario local (inventory_levels).
+    ?source=holded devuelve el stock en vivo de Holded, como antes.
+    """
+    if request.args.get('source') == 'holded':
+        return _get_holded_stock()
+
+    from src.models.inventory import InventoryLevel
+    from src.models.web_product import WebProduct
+    from src.services.inventory import pending_units
+
+    names = dict(db.session.query(WebProduct.sku, WebProduct.name).filter(WebProduct.sku.isnot(None)))
+    pending = pending_units()
+    stock_data = [{
+        **level.to_dict(),
+        'name': names.get(level.sku, level.sku),
+        'stock': level.on_hand,
+        'pending_holded': pending.get(level.sku, 0),
+        'status': _get_stock_status(level.on_hand)
+    } for level in InventoryLevel.query.order_by(InventoryLevel.sku)]
+
+    return jsonify({
+        'stock': stock_data,
+        'source': 'local',
+        'last_synced': max((level['synced_at'] for level in stock_data if level['synced_at']), default=None),
+        'last_updated': datetime.utcnow().isoformat()
+    })
+
+
+def _get_holded_stock():
+    """Stock en vivo de Holded (productos con control de stock)"""
+    holded_products = holded_get_products(use_cache=False)
     warehouses = holded_get_warehouses()
 
     stock_data = []
@@ -1008,11 +966,62 @@ def get_stock():
 
     return jsonify({
         'stock': stock_data,
+        'source': 'holded',
         'warehouses': [{'id': w.get('id'), 'name': w.get('name')} for w in warehouses],
         'last_updated': datetime.utcnow().isoformat()
     })
 
 
+@admin_panel_bp.route('/stock/sync', methods=['POST'])
+@admin_required
+def sync_stock():
+    """Reconcilia el inventario local con el stock de Holded (también: flask sync-stock)"""
+    from src.services.inventory import reconcile_from_holded
+    try:
+        result = reconcile_from_holded()
+        if result is None:
+            return jsonify({'error': 'Holded no ha devuelto productos'}), 502
+        return jsonify({'success': True, **result})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_panel_bp.route('/stock/<sku>/adjust', methods=['POST'])
+@admin_required
+def adjust_stock(sku):
+    """Ajuste manual del stock local de un SKU: {"delta": -3}"""
+    from src.services.inventory import adjust
+    data = request.get_json() or {}
+    try:
+        delta = int(data.get('delta', 0))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'delta debe ser un entero'}), 400
+    if not delta:
+        return jsonify({'error': 'delta no puede ser 0'}), 400
+    try:
+        adjust(sku, delta)
+        return jsonify({'success': True, 'sku': sku, 'delta': delta})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_panel_bp.route('/stock/ledger', methods=['GET'])
+@admin_required
+def get_stock_ledger():
+    """Movimientos de inventario (?sku=, ?order_number=, ?limit=)"""
+    from src.models.inventory import InventoryMovement
+    query = InventoryMovement.query
+    if request.args.get('sku'):
+        query = query.filter_by(sku=request.args['sku'])
+    if request.args.get('order_number'):
+        query = query.filter_by(order_number=request.args['order_number'])
+    limit = min(request.args.get('limit', 100, type=int), 500)
+    movements = query.order_by(InventoryMovement.created_at.desc(), InventoryMovement.id.desc()).limit(limit).all()
+    return jsonify({'movements': [m.to_dict() for m in movements]})
+
+
 # ============================================================
 # PEDIDOS
 # ============================================================
@@ -1058,24 +1067,9 @@ def create_order_in_holded(order_id):
         if not contact_id:
             return jsonify({'error': 'No se pudo crear/encontrar el contacto en Holded'}), 500
 
-        # Preparar items del pedido
-        # item['price'] es el precio unitario CON IVA (viene de Stripe)
-        # Holded espera el precio unitario SIN IVA en 'subtotal'
-        items = []
-        if order.items:
-            order_items = json.loads(order.items) if isinstance(order.items, str) else order.items
-            for item in order_items:
-                price_with_iva = item.get('price', 0)
-                # Quitar IVA (4% para AOVE/conservas)
-                price_without_iva = round(price_with_iva / 1.04, 2)
-                items.append({
-                    'name': item.get('name', ''),
-                    'description': item.get('description', ''),
-                    'units': item.get('quantity', 1),
-                    'subtotal': price_without_iva,
-                    'tax': 's_iva_4',
-                    'sku': item.get('sku', '')
-                })
+        # Items con SKU e IVA de las líneas resueltas del pedido (ver order_lines)
+        from src.services.order_lines import holded_document_items
+        items = holded_document_items(order)
 
         success, result = holded_create_sales_order(
             contact_id=contact_id,
@@ -1122,141 +1116,22 @@ def create_invoice_in_holded(order_id):
                 'doc_number': order.holded_doc_number
             }), 409
 
-        # Determinar tipo de documento
-        doc_type = 'invoice' if (order.needs_invoice and order.fiscal_nif) else 'salesreceipt'
-        
-        # Buscar o crear contacto en Holded
-        # Si tiene datos fiscales, usar razón social; si no, nombre del cliente
-        contact_name = order.fiscal_name if (order.needs_invoice and order.fiscal_name) else order.customer_name
-        address_data = None
-        if order.needs_invoice and order.fiscal_address:
-            address_data = {
-                'address': order.fiscal_address,
-                'city': order.fiscal_city or order.shipping_city or '',
-                'postal_code': order.fiscal_postal_code or order.shipping_postal_code or '',
-                'country': 'España'
-            }
-        else:
-            address_data = {
-                'address': order.shipping_address or '',
-                'city': order.shipping_city or '',
-                'postal_code': order.shipping_postal_code or '',
-                'country': order.shipping_country or 'España'
-            }
-        
-        contact_id = holded_get_or_create_contact(
-            email=order.customer_email,
-            name=contact_name,
-            phone=order.customer_phone or '',
-            address_data=address_data
-        )
-
-        if not contact_id:
-            return jsonify({'error': 'No se pudo crear/encontrar el contacto en Holded'}), 500
-
-        # Si es factura y tiene NIF, actualizar el contacto con el NIF
-        if doc_type == 'invoice' and order.fiscal_nif:
-            try:
-                import requests as req
-                req.put(
-                    f'{HOLDED_BASE_URL}/contacts/{contact_id}',
-                    headers={'key': HOLDED_API_KEY, 'Content-Type': 'application/json'},
-                    json={'vatnumber': order.fiscal_nif},
-                    timeout=10
-                )
-            except Exception:
-                pass  # No bloquear si falla actualizar NIF
-
-        # Preparar items
-        # item['price'] es el precio unitario CON IVA (viene de Stripe)
-        # Holded espera el precio unitario SIN IVA en 'subtotal'
-        # IVA por tipo de producto:
-        #   - Aceites AOVE → 4% (s_iva_4)
-        #   - Conservas (paraguayo, nectarina, mermelada) → 10% (s_iva_10)
-        #   - Estuches/packaging → 21% (s_iva_21)
-        #   - Packs mixtos → 4% (mayoría aceite)
-        items = []
-        if order.items:
-            order_items = json.loads(order.items) if isinstance(order.items, str) else order.items
-            for item in order_items:
-                price_with_iva = item.get('price', 0)
-                item_name = (item.get('name', '') or '').lower()
-                
-                # Determinar IVA según producto
-                if any(kw in item_name for kw in ['paraguayo', 'nectarina', 'mermelada', 'almíbar', 'almibar', 'conserva']):
-                    iva_rate = 0.10
-                    tax_id = 's_iva_10'
-                elif any(kw in item_name for kw in ['estuche']):
-                    iva_rate = 0.21
-                    tax_id = 's_iva_21'
-                else:
-                    # Aceites y packs (mayoría aceite) → 4%
-                    iva_rate = 0.04
-                    tax_id = 's_iva_4'
-                
-                price_without_iva = round(price_with_iva / (1 + iva_rate), 2)
-                items.append({
-                    'name': item.get('name', ''),
-                    'units': item.get('quantity', 1),
-                    'subtotal': price_without_iva,
-                    'tax': tax_id,
-                    'sku': item.get('sku', '')
-                })
-
-        # Crear documento según tipo
-        if doc_type == 'invoice':
-            notes = f'Factura pedido web #{order.order_number} | NIF: {order.fiscal_nif}'
-            success, result = holded_create_invoice(
-                contact_id=contact_id,
-                items=items,
-                notes=notes
-            )
-        else:
-            notes = f'Ticket pedido web #{order.order_number}'
-            success, result = holded_create_salesreceipt(
-                contact_id=contact_id,
-                items=items,
-                notes=notes
-            )
+        from src.services.holded_invoicing import InvoicingBusy, create_order_document
+        try:
+            success, result = create_order_document(order)
+        except InvoicingBusy as e:
+            return jsonify({'error': str(e)}), 409
+        if not success:
+            return jsonify({'error': result}), 500
 
-        if success:
-            # Guardar referencia en la DB
-            doc_id = result.get('id', '')
-            doc_number = result.get('docNumber', '') or result.get('num', '') or result.get('invoiceNum', '')
-            
-            # Si no viene docNumber en la respuesta, obtenerlo con GET al documento
-            if not doc_number and doc_id:
-                try:
-                    import requests as req
-                    doc_detail = req.get(
-                        f'{HOLDED_BASE_URL}/documents/{doc_type}/{doc_id}',
-                        headers={'key': HOLDED_API_KEY, 'Content-Type': 'application/json'},
-                        timeout=10
-                    )
-                    if doc_detail.status_code == 200:
-                        detail_data = doc_detail.json()
-                        doc_number = detail_data.get('docNumber', '') or detail_data.get('invoiceNum', '') or detail_data.get('num', '')
-                        print(f"[Holded] DocNumber obtenido via GET: {doc_number}")
-                except Exception as detail_err:
-                    print(f"[Holded] No se pudo obtener docNumber: {detail_err}")
-            
-            order.holded_invoice_id = doc_id
-            order.holded_doc_number = doc_number
-            try:
-                db.session.commit()
-                print(f"✅ Order {order.order_number} - {doc_type} created in Holded: {doc_number}")
-            except Exception as db_err:
-                print(f"⚠️ Error saving holded ref to DB: {db_err}")
-            
-            return jsonify({
-                'success': True,
-                'doc_type': doc_type,
-                'doc_type_label': 'Factura' if doc_type == 'invoice' else 'Ticket',
-                'doc_number': doc_number,
-                'holded_id': doc_id
-            })
-        else:
-            return jsonify({'error': f'Error creando {"factura" if doc_type == "invoice" else "ticket"} en Holded: {result}'}), 500
+        return jsonify({
+            'success': True,
+            'doc_type': result['doc_type'],
+            'doc_type_label': 'Factura' if result['doc_type'] == 'invoice' else 'Ticket',
+            'doc_number': result['doc_number'],
+            'holded_id': result['holded_id'],
+            'adopted': result['adopted']
+        })
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -1282,6 +1157,29 @@ def reset_order_holded(order_id):
         return jsonify({'error': str(e)}), 500
 
 
+@admin_panel_bp.route('/orders/<int:order_id>/document.pdf', methods=['GET'])
+@admin_required
+@role_required('admin', 'sales')
+def get_order_document_pdf(order_id):
+    """Descarga el PDF de la factura/ticket del pedido (con el número de documento como nombre)."""
+    try:
+        from src.models.order import Order
+        from src.services.holded_invoicing import document_type
+        order = Order.query.get(order_id)
+
+        if not order:
+            return jsonify({'error': 'Pedido no encontrado'}), 404
+        if not order.holded_invoice_id:
+            return jsonify({'error': 'Este pedido no tiene documento en Holded. Genera la factura/ticket primero.'}), 400
+
+        filename = f'{order.holded_doc_number or order.order_number}.pdf'
+        return _send_document_pdf(document_type(order), order.holded_invoice_id, filename)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': f'Error interno: {str(e)}'}), 500
+
+
 @admin_panel_bp.route('/orders/<int:order_id>/send-email', methods=['POST'])
 @admin_required
 @role_required('admin', 'sales')
@@ -1301,7 +1199,8 @@ def send_order_document_email(order_id):
             return jsonify({'error': 'Este pedido no tiene documento en Holded. Genera la factura/ticket primero.'}), 400
 
         # Determinar tipo de documento
-        doc_type = 'invoice' if (order.needs_invoice and order.fiscal_nif) else 'salesreceipt'
+        from src.services.holded_invoicing import document_type
+        doc_type = document_type(order)
 
         # Email del cliente
         customer_email = order.customer_email
@@ -1479,7 +1378,8 @@ def fix_order_prices():
                     })
                 
                 if new_items:
-                    order.items = new_items
+                    from src.services.order_lines import set_order_lines
+                    set_order_lines(order, new_items)
                     fixed += 1
                     
             except Exception as e:
@@ -1500,6 +1400,54 @@ def fix_order_prices():
         return jsonify({'error': str(e)}), 500
 
 
+@admin_panel_bp.route('/orders/invoice-batch', methods=['POST'])
+@admin_required
+@role_required('admin')
+def create_invoices_batch():
+    """
+    Crea en Holded las facturas/tickets de muchos pedidos de una vez (cierre de mes).
+
+    Body (JSON), una de las dos selecciones:
+    - order_ids: [ids]
+    - month: 'YYYY-MM' (o date_from/date_to: 'YYYY-MM-DD', fin excluido)
+    Opcional: dry_run (solo lista lo que se crearía).
+
+    Solo entran pedidos cobrados, no cancelados y sin documento en Holded;
+    repetir la llamada no duplica documentos (ver services/holded_invoicing.py).
+    Si el lote no cabe en el tiempo de la petición, 'remaining' indica los
+    pedidos que quedan para la siguiente llamada.
+    """
+    try:
+        from src.services.holded_invoicing import InvoicingBusy, invoice_orders, pending_orders_query
+
+        data = request.get_json(silent=True) or {}
+        order_ids = data.get('order_ids')
+        month = data.get('month')
+        try:
+            date_from = datetime.strptime(data['date_from'], '%Y-%m-%d') if data.get('date_from') else None
+            date_to = datetime.strptime(data['date_to'], '%Y-%m-%d') if data.get('date_to') else None
+            if month:
+                datetime.strptime(month, '%Y-%m')
+            if order_ids is not None:
+                order_ids = [int(order_id) for order_id in order_ids]
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Formato inválido: order_ids [int], month YYYY-MM, date_from/date_to YYYY-MM-DD'}), 400
+        if order_ids is None and not (month or date_from or date_to):
+            return jsonify({'error': 'Indica order_ids o un periodo (month o date_from/date_to)'}), 400
+
+        orders = pending_orders_query(order_ids, month, date_from, date_to).all()
+        try:
+            summary = invoice_orders(orders, time_budget=INVOICE_BATCH_TIME_BUDGET,
+                                     dry_run=bool(data.get('dry_run')))
+        except InvoicingBusy as e:
+            return jsonify({'error': str(e)}), 409
+        return jsonify({'success': True, **summary})
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': f'Error interno: {str(e)}'}), 500
+
+
 @admin_panel_bp.route('/orders/sync-doc-numbers', methods=['POST'])
 @admin_required
 @role_required('admin')
@@ -1511,6 +1459,7 @@ def sync_doc_numbers():
     try:
         import requests as req
         from src.models.order import Order
+        from src.services.holded_invoicing import document_type
         
         orders = Order.query.filter(
             Order.holded_invoice_id.isnot(None),
@@ -1523,7 +1472,7 @@ def sync_doc_numbers():
         
         for order in orders:
             try:
-                doc_type = 'invoice' if (order.needs_invoice and order.fiscal_nif) else 'salesreceipt'
+                doc_type = document_type(order)
                 response = req.get(
                     f'{HOLDED_BASE_URL}/documents/{doc_type}/{order.holded_invoice_id}',
                     headers={'key': HOLDED_API_KEY, 'Content-Type': 'application/json'},
@@ -1874,6 +1823,35 @@ def get_document_detail(doc_type, doc_id):
         return jsonify({'error': str(e)}), 500
 
 
+def _send_document_pdf(doc_type, doc_id, filename):
+    """PDF de un documento de Holded, desde la caché en disco si no cambia (ver services/pdf_cache.py)."""
+    from src.services.pdf_cache import is_cacheable, open_pdf
+    try:
+        fileobj = open_pdf(doc_type, doc_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not fileobj:
+        return jsonify({'error': 'No se pudo obtener el PDF de Holded'}), 502
+    # send_file cierra el fichero al terminar la respuesta
+    response = send_file(fileobj, mimetype='application/pdf', as_attachment=True, download_name=filename)
+    if is_cacheable(doc_type):
+        # Un documento emitido no cambia, pero es privado: solo la caché del navegador
+        response.headers['Cache-Control'] = 'private, max-age=86400, immutable'
+    else:
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@admin_panel_bp.route('/documents/<doc_type>/<doc_id>/pdf', methods=['GET'])
+@admin_required
+def get_document_pdf(doc_type, doc_id):
+    """Descarga el PDF de un documento de Holded (invoice, salesreceipt, salesorder...)."""
+    try:
+        return _send_document_pdf(doc_type, doc_id, f'{doc_type}-{doc_id}.pdf')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 # ============================================================
 # DASHBOARD
 # ============================================================
@@ -1915,10 +1893,21 @@ def get_dashboard():
     holded_status = 'connected'
     try:
         holded_products = holded_get_products()
-        low_stock = [p for p in holded_products if p.get('hasStock') and p.get('stock', 0) < 50 and p.get('stock', 0) >= 0]
     except Exception as e:
         holded_status = 'error'
         print(f'[Dashboard] Error conectando con Holded: {e}')
+    try:
+        # Alertas desde el inventario local; si aún no se ha sincronizado, desde Holded
+        from src.models.inventory import InventoryLevel
+        from src.models.web_product import WebProduct
+        levels = InventoryLevel.query.filter(InventoryLevel.on_hand < 50).all()
+        if levels or InventoryLevel.query.first():
+            names = dict(db.session.query(WebProduct.sku, WebProduct.name).filter(WebProduct.sku.isnot(None)))
+            low_stock = [{'name': names.get(l.sku, l.sku), 'sku': l.sku, 'stock': l.on_hand} for l in levels if l.on_hand >= 0]
+        else:
+            low_stock = [p for p in holded_products if p.get('hasStock') and p.get('stock', 0) < 50 and p.get('stock', 0) >= 0]
+    except Exception as e:
+        print(f'[Dashboard] Error cargando stock: {e}')
 
     # Notificaciones de producto pendientes
     total_notifications = 0
@@ -2378,98 +2367,6 @@ def sync_coupons_used():
 # UTILIDADES INTERNAS
 # ============================================================
 
-# Composición de packs: SKU del pack → lista de componentes
-# Cada componente tiene: sku (o id para manuales), name, quantity
-# Si 'manual': True → el coste se guarda en pack_component_costs.json
-# Si tiene 'sku' válido → el coste se obtiene de Holded automáticamente
-PACK_COMPONENTS = {
-    'MIKPACK01': [  # Pack Degustación Premium (9€)
-        {'sku': 'MIKPARJ250', 'name': 'Mermelada de Paraguayo 250g', 'quantity': 1},
-        {'id': 'botellas_degustacion', 'name': '4x Botellas aceite 14ml (muestras)', 'quantity': 1, 'manual': True},
-    ],
-    'MIKEST01': [  # Estuche de Regalo Premium (5€)
-        {'id': 'estuche_cilindrico', 'name': 'Estuche cilíndrico cartón', 'quantity': 1, 'manual': True},
-    ],
-    'MIKPACKFR': [  # Pack Fruta Premium (35€)
-        {'sku': 'MIKPARA450', 'name': 'Paraguayo en Almíbar 720g', 'quantity': 1},
-        {'sku': 'MIKNECT450', 'name': 'Nectarina en Almíbar 720g', 'quantity': 1},
-        {'sku': 'MIKPARJ250', 'name': 'Mermelada de Paraguayo 250g', 'quantity': 1},
-        {'id': 'estuche_madera', 'name': 'Estuche de madera premium', 'quantity': 1, 'manual': True},
-    ],
-    'MIKPACKTP': [  # Pack Temprano Premium (19€)
-        {'sku': 'MIKVET500', 'name': 'Aceite Temprano 500ml sin filtrar', 'quantity': 1},
-        {'sku': 'MIKEST01', 'name': 'Estuche premium temprano', 'quantity': 1},
-    ],
-    'MIKPACKCO': [  # Pack Completo Mikel's Earth (81.90€)
-        {'sku': 'MIKVE5LP', 'name': 'Aceite de Oliva Virgen Extra 5L', 'quantity': 1},
-        {'sku': 'MIKVET500', 'name': 'Aceite Temprano 500ml sin filtrar', 'quantity': 1},
-        {'sku': 'MIKPARA450', 'name': 'Paraguayo en Almíbar 720g', 'quantity': 1},
-        {'sku': 'MIKNECT450', 'name': 'Nectarina en Almíbar 720g', 'quantity': 1},
-        {'sku': 'MIKPARJ250', 'name': 'Mermelada de Paraguayo 250g', 'quantity': 1},
-        {'id': 'botellas_degustacion', 'name': '4x Botellas aceite 14ml (muestras)', 'quantity': 1, 'manual': True},
-        {'id': 'estuche_kraft', 'name': 'Estuche kraft premium', 'quantity': 1, 'manual': True},
-    ],
-}
-
-
-def _get_pack_component_costs():
-    """Lee los costes manuales de componentes de pack desde JSON."""
-    costs_file = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'pack_component_costs.json')
-    try:
-        if os.path.exists(costs_file):
-            with open(costs_file, 'r') as f:
-                return json.load(f)
-    except Exception:
-        pass
-    return {}
-
-
-def _save_pack_component_costs(costs):
-    """Guarda los costes manuales de componentes de pack en JSON."""
-    costs_file = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'pack_component_costs.json')
-    with open(costs_file, 'w') as f:
-        json.dump(costs, f, indent=2)
-
-
-def _calculate_pack_costs(holded_products):
-    """
-    Calcula el coste de cada pack sumando:
-    - Costes de componentes con SKU en Holded (automático)
-    - Costes manuales de componentes sin SKU (desde pack_component_costs.json)
-    Devuelve un dict {pack_sku: coste_calculado}
-    """
-    # Crear mapa de costes por SKU desde Holded
-    cost_by_sku = {}
-    for p in holded_products:
-        sku = p.get('sku', '')
-        if sku:
-            cost_by_sku[sku] = p.get('cost', 0) or 0
-
-    # Leer costes manuales de componentes
-    manual_costs = _get_pack_component_costs()
-
-    pack_costs = {}
-    for pack_sku, components in PACK_COMPONENTS.items():
-        total_cost = 0
-        for comp in components:
-            if comp.get('manual'):
-                # Componente manual: buscar en pack_component_costs.json
-                comp_id = comp.get('id', '')
-                comp_cost = manual_costs.get(comp_id, 0)
-            else:
-                # Componente con SKU: buscar en Holded, si es 0 buscar manual
-                comp_sku = comp.get('sku', '')
-                holded_cost = cost_by_sku.get(comp_sku, 0)
-                if holded_cost > 0:
-                    comp_cost = holded_cost
-                else:
-                    comp_cost = manual_costs.get(comp_sku, 0)
-            total_cost += comp_cost * comp.get('quantity', 1)
-        pack_costs[pack_sku] = round(total_cost, 2)
-
-    return pack_costs
-
-
 def _get_web_prices():
     """
     Lee los precios actuales de la web desde la base de datos.
@@ -2616,4 +2513,5 @@ def run_translations_migration():
             errors.append(f"{slug}: {str(e)}")
     
     db.session.commit()
+    invalidate_catalog()
     return jsonify({'success': True, 'updated': updated, 'errors': errors})
@@ -1,30 +1,39 @@
 """
 Rutas del Blog para Mikel's Earth
-Incluye endpoints públicos, webhook de Brevo y panel admin
+Incluye endpoints públicos (con búsqueda), webhook de Brevo y panel admin
 """
 import os
 import hashlib
 import hmac
 import jwt
 import uuid
-try:
-    import boto3
-    BOTO3_AVAILABLE = True
-except ImportError:
-    BOTO3_AVAILABLE = False
-
-try:
-    import cloudinary
-    import cloudinary.uploader
-    CLOUDINARY_AVAILABLE = True
-except ImportError:
-    CLOUDINARY_AVAILABLE = False
+from importlib.util import find_spec
+# boto3 y cloudinary solo se usan al subir imágenes: comprobar que están
+# instalados sin importarlos (se importan en upload_image)
+BOTO3_AVAILABLE = find_spec('boto3') is not None
+CLOUDINARY_AVAILABLE = find_spec('cloudinary') is not None
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
 from src.models.user import db
 from src.models.blog import BlogPost
+from src.models.blog import SUMMARY_COLUMNS
+from src.services.blog_cache import (
+    BLOG_CACHE,
+    BLOG_CACHE_TTL,
+    KEY_ALL,
+    KEY_CATEGORIES,
+    KEY_POSTS,
+    blog_version,
+    post_key,
+    published_categories,
+)
+from src.services.blog_ingest import apply_ingest, unique_slug
+from src.services.http_cache import cached_json, cached_response
+from src.services.sitemap import render_blog_rss
+from src.services.blog_search import search_published_posts
+from sqlalchemy.orm import load_only
 
 blog_bp = Blueprint('blog', __name__)
 
@@ -45,14 +54,10 @@ CLOUDINARY_CLOUD_NAME = os.getenv('CLOUDINARY_CLOUD_NAME', 'danlztass')
 CLOUDINARY_API_KEY = os.getenv('CLOUDINARY_API_KEY', '741671141733431')
 CLOUDINARY_API_SECRET = os.getenv('CLOUDINARY_API_SECRET', 'N68-9Y8-9Y8-9Y8-9Y8-9Y8-9Y8-9Y8')
 
-# Configurar Cloudinary si hay credenciales
-if CLOUDINARY_AVAILABLE:
-    cloudinary.config(
-        cloud_name=CLOUDINARY_CLOUD_NAME,
-        api_key=CLOUDINARY_API_KEY,
-        api_secret=CLOUDINARY_API_SECRET,
-        secure=True
-    )
+# Listado público: los parámetros forman la clave de caché, así que se acotan
+MAX_PER_PAGE = 50
+MAX_PAGE = 1000
+CACHED_PAGES = 5  # solo las primeras páginas ocupan la caché del worker
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
@@ -111,30 +116,43 @@ def verify_brevo_webhook(request_data, signature):
 
 @blog_bp.route('/posts', methods=['GET'])
 def get_posts():
-    """Obtener lista de posts publicados (paginado)"""
+    """Obtener lista de posts publicados (paginado, cacheado; ver blog_cache)"""
     try:
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
+        per_page = max(1, min(request.args.get('per_page', 10, type=int), MAX_PER_PAGE))
         category = request.args.get('category', None)
+        if not 1 <= page <= MAX_PAGE:
+            return jsonify({'error': f'page debe estar entre 1 y {MAX_PAGE}'}), 400
+        # Una categoría sin posts publicados no va a la DB ni a la caché
+        known_category = not category or category in published_categories()
+        
+        def build():
+            if not known_category:
+                return {'posts': [], 'total': 0, 'pages': 0, 'current_page': page,
+                        'has_next': False, 'has_prev': page > 1}
+            # Solo las columnas del resumen: el listado no lee content
+            query = BlogPost.query.options(load_only(*SUMMARY_COLUMNS)).filter_by(status='published')
+            
+            if category:
+                query = query.filter_by(category=category)
+            
+            query = query.order_by(BlogPost.published_at.desc())
+            pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+            
+            posts = [post.to_summary() for post in pagination.items]
+            
+            return {
+                'posts': posts,
+                'total': pagination.total,
+                'pages': pagination.pages,
+                'current_page': page,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
         
-        query = BlogPost.query.filter_by(status='published')
-        
-        if category:
-            query = query.filter_by(category=category)
-        
-        query = query.order_by(BlogPost.published_at.desc())
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-        
-        posts = [post.to_summary() for post in pagination.items]
-        
-        return jsonify({
-            'posts': posts,
-            'total': pagination.total,
-            'pages': pagination.pages,
-            'current_page': page,
-            'has_next': pagination.has_next,
-            'has_prev': pagination.has_prev
-        })
+        return cached_json(BLOG_CACHE, f'posts:{page}:{per_page}:{category or ""}', build,
+                           surrogate_keys=(KEY_ALL, KEY_POSTS), version=blog_version, ttl=BLOG_CACHE_TTL,
+                           store=known_category and page <= CACHED_PAGES)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -142,39 +160,83 @@ def get_posts():
 
 @blog_bp.route('/posts/<slug>', methods=['GET'])
 def get_post(slug):
-    """Obtener un post por su slug"""
+    """Obtener un post por su slug (cacheado; ver blog_cache)"""
     try:
-        post = BlogPost.query.filter_by(slug=slug, status='published').first()
+        def build():
+            post = BlogPost.query.filter_by(slug=slug, status='published').first()
+            return post.to_dict() if post else None
         
-        if not post:
+        response = cached_json(BLOG_CACHE, f'post:{slug}', build,
+                               surrogate_keys=(KEY_ALL, post_key(slug)), version=blog_version, ttl=BLOG_CACHE_TTL)
+        if response is None:
             return jsonify({'error': 'Post no encontrado'}), 404
         
-        return jsonify(post.to_dict())
+        return response
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
-@blog_bp.route('/categories', methods=['GET'])
-def get_categories():
-    """Obtener lista de categorías con conteo de posts"""
+@blog_bp.route('/rss.xml', methods=['GET'])
+def get_rss():
+    """Feed RSS con los últimos posts publicados (cacheado; ver blog_cache)"""
     try:
-        categories = db.session.query(
-            BlogPost.category,
-            db.func.count(BlogPost.id).label('count')
-        ).filter(
-            BlogPost.status == 'published',
-            BlogPost.category.isnot(None)
-        ).group_by(BlogPost.category).all()
+        return cached_response(BLOG_CACHE, 'rss', render_blog_rss, 'application/rss+xml',
+                               surrogate_keys=(KEY_ALL, KEY_POSTS), version=blog_version, ttl=BLOG_CACHE_TTL)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@blog_bp.route('/search', methods=['GET'])
+def search_posts():
+    """Búsqueda de texto completo en los posts publicados (?q=...&limit=&offset=)"""
+    try:
+        query = request.args.get('q', '').strip()
+        limit = max(1, min(request.args.get('limit', 10, type=int), MAX_PER_PAGE))
+        offset = max(0, request.args.get('offset', 0, type=int))
+        
+        if not query:
+            return jsonify({'error': 'Falta el parámetro q'}), 400
+        
+        posts, total = search_published_posts(query, limit=limit, offset=offset)
         
         return jsonify({
-            'categories': [{'name': cat, 'count': count} for cat, count in categories]
+            'query': query,
+            'posts': posts,
+            'total': total,
+            'limit': limit,
+            'offset': offset
         })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@blog_bp.route('/categories', methods=['GET'])
+def get_categories():
+    """Obtener lista de categorías con conteo de posts (cacheado; ver blog_cache)"""
+    try:
+        def build():
+            categories = db.session.query(
+                BlogPost.category,
+                db.func.count(BlogPost.id).label('count')
+            ).filter(
+                BlogPost.status == 'published',
+                BlogPost.category.isnot(None)
+            ).group_by(BlogPost.category).all()
+            
+            return {
+                'categories': [{'name': cat, 'count': count} for cat, count in categories]
+            }
+        
+        return cached_json(BLOG_CACHE, 'categories', build,
+                           surrogate_keys=(KEY_ALL, KEY_CATEGORIES), version=blog_version, ttl=BLOG_CACHE_TTL)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 # ============================================
 # WEBHOOK DE BREVO
 # ============================================
@@ -224,8 +286,7 @@ def brevo_webhook():
         existing_post = BlogPost.query.filter_by(slug=slug).first()
         if existing_post:
             existing_post.title = subject
-            existing_post.content = content
-            existing_post.excerpt = BlogPost.generate_excerpt(content)
+            apply_ingest(existing_post, content)
             existing_post.category = category
             existing_post.updated_at = datetime.utcnow()
             
@@ -239,8 +300,6 @@ def brevo_webhook():
         new_post = BlogPost(
             title=subject,
             slug=slug,
-            content=content,
-            excerpt=BlogPost.generate_excerpt(content),
             category=category,
             status='draft' if is_draft else 'published',
             published_at=None if is_draft else datetime.utcnow()
@@ -251,6 +310,9 @@ def brevo_webhook():
             if isinstance(first_attachment, dict):
                 new_post.featured_image = first_attachment.get('url', first_attachment.get('Url', ''))
         
+        # Después del adjunto: la primera imagen del contenido solo es el fallback
+        apply_ingest(new_post, content)
+        
         db.session.add(new_post)
         db.session.commit()
         
@@ -303,7 +365,8 @@ def admin_get_posts(current_user):
         per_page = request.args.get('per_page', 20, type=int)
         status = request.args.get('status', None)
         
-        query = BlogPost.query
+        # Solo las columnas del resumen: el post completo está en /admin/posts/<id>
+        query = BlogPost.query.options(load_only(*SUMMARY_COLUMNS))
         
         if status:
             query = query.filter_by(status=status)
@@ -311,11 +374,13 @@ def admin_get_posts(current_user):
         query = query.order_by(BlogPost.created_at.desc())
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
         
-        posts = [post.to_dict() for post in pagination.items]
+        posts = [post.to_summary() for post in pagination.items]
         
-        total_posts = BlogPost.query.count()
-        published_count = BlogPost.query.filter_by(status='published').count()
-        draft_count = BlogPost.query.filter_by(status='draft').count()
+        # Conteos por estado en una sola consulta
+        counts = dict(db.session.query(BlogPost.status, db.func.count(BlogPost.id)).group_by(BlogPost.status).all())
+        total_posts = sum(counts.values())
+        published_count = counts.get('published', 0)
+        draft_count = counts.get('draft', 0)
         
         return jsonify({
             'posts': posts,
@@ -363,11 +428,10 @@ def admin_update_post(current_user, post_id):
         
         if 'title' in data:
             post.title = data['title']
-            post.slug = BlogPost.generate_slug(data['title'])
+            post.slug = unique_slug(data['title'], exclude_id=post.id)
         
         if 'content' in data:
-            post.content = data['content']
-            post.excerpt = BlogPost.generate_excerpt(data['content'])
+            apply_ingest(post, data['content'])
         
         if 'category' in data:
             post.category = data['category']
@@ -465,6 +529,14 @@ def admin_upload_image(current_user):
         
         # PRIORIDAD 1: Cloudinary (recomendado)
         if CLOUDINARY_AVAILABLE and CLOUDINARY_CLOUD_NAME and CLOUDINARY_API_KEY and CLOUDINARY_API_SECRET:
+            import cloudinary
+            import cloudinary.uploader
+            cloudinary.config(
+                cloud_name=CLOUDINARY_CLOUD_NAME,
+                api_key=CLOUDINARY_API_KEY,
+                api_secret=CLOUDINARY_API_SECRET,
+                secure=True
+            )
             result = cloudinary.uploader.upload(
                 file,
                 public_id=unique_filename,
@@ -476,6 +548,7 @@ def admin_upload_image(current_user):
             
         # PRIORIDAD 2: S3 si hay credenciales configuradas
         elif BOTO3_AVAILABLE and AWS_ACCESS_KEY and AWS_SECRET_KEY:
+            import boto3
             s3_client = boto3.client(
                 's3',
                 region_name=S3_REGION,
@@ -524,26 +597,19 @@ def admin_create_post(current_user):
         if not title or not content:
             return jsonify({'error': 'Título y contenido son requeridos'}), 400
         
-        slug = BlogPost.generate_slug(title)
-        
-        # Verificar si el slug ya existe y añadir un sufijo si es necesario
-        base_slug = slug
-        counter = 1
-        while BlogPost.query.filter_by(slug=slug).first():
-            slug = f"{base_slug}-{counter}"
-            counter += 1
+        # Si el slug ya existe se añade un sufijo (-1, -2...)
+        slug = unique_slug(title)
         
         new_post = BlogPost(
             title=title,
             slug=slug,
-            content=content,
-            excerpt=BlogPost.generate_excerpt(content),
             category=data.get('category'),
             tags=','.join(data.get('tags', [])) if isinstance(data.get('tags'), list) else data.get('tags'),
             featured_image=data.get('featured_image'),
             status=data.get('status', 'draft'),
             published_at=datetime.utcnow() if data.get('status') == 'published' else None
         )
+        apply_ingest(new_post, content)
         
         db.session.add(new_post)
         db.session.commit()
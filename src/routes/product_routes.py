@@ -3,9 +3,10 @@ Rutas públicas del catálogo de productos.
 Endpoint GET /api/products devuelve exactamente la misma estructura que products.js
 para que el frontend funcione sin cambios en el carrito ni en la tienda.
 """
-from flask import Blueprint, jsonify, request
-from src.models.user import db
-from src.models.web_product import WebProduct
+from flask import Blueprint, Response, jsonify, request
+from src.services.catalog_cache import CARD_FIELDS, get_catalog, lookup_products, resolve_projection
+
+BATCH_MAX = 100
 
 product_bp = Blueprint('products', __name__)
 
@@ -15,48 +16,113 @@ def get_products():
     """
     Devuelve el catálogo completo de productos activos.
     Formato idéntico al antiguo products.js para compatibilidad total.
+    Se sirve desde el snapshot en memoria (ver catalog_cache).
+    
+    Query params:
+    - lang: 'es' (default) o 'en'
+    - view: 'full' (default) o 'card' (solo los campos de las tarjetas del listado)
+    - fields: claves concretas separadas por comas (p.ej. fields=name,price,image)
     """
     lang = request.args.get('lang', 'es')
-    products = WebProduct.query.filter_by(active=True).order_by(WebProduct.display_order).all()
+    projection = resolve_projection(request.args.get('view'), request.args.get('fields'))
+    catalog = get_catalog(lang, projection)
+    response = Response(catalog['payload'], mimetype='application/json')
+    response.set_etag(catalog['etag'])
+    return response.make_conditional(request)
+
+
+@product_bp.route('/products/batch', methods=['GET'])
+def get_products_batch():
+    """
+    Varios productos en una sola petición (carrito, productos relacionados).
+    Se resuelven con el índice del snapshot, sin tocar la DB.
     
-    products_list = [p.to_frontend_dict(lang=lang) for p in products]
+    Query params:
+    - slugs: slugs separados por comas
+    - ids: ids separados por comas
+    - lang, view, fields: como en GET /api/products
     
-    # También devolver categories y tags como antes
-    if lang == 'en':
-        categories = [
-            {"id": "all", "name": "All", "slug": "all"},
-            {"id": "conservas", "name": "Preserves", "slug": "conservas"},
-            {"id": "aceites", "name": "Olive Oils", "slug": "aceites"},
-            {"id": "packs", "name": "Packs", "slug": "packs"}
-        ]
-    else:
-        categories = [
-            {"id": "all", "name": "Todos", "slug": "all"},
-            {"id": "conservas", "name": "Conservas", "slug": "conservas"},
-            {"id": "aceites", "name": "Aceites", "slug": "aceites"},
-            {"id": "packs", "name": "Packs", "slug": "packs"}
-        ]
+    Devuelve los productos en el orden pedido (primero los de slugs, después
+    los de ids) y en 'missing' los que no existen o no están activos.
+    """
+    lang = request.args.get('lang', 'es')
+    slugs = [s.strip() for s in request.args.get('slugs', '').split(',') if s.strip()]
+    try:
+        ids = [int(i) for i in request.args.get('ids', '').split(',') if i.strip()]
+    except ValueError:
+        return jsonify({'error': 'ids debe ser una lista de números separados por comas'}), 400
+    if not slugs and not ids:
+        return jsonify({'error': 'Indica slugs o ids'}), 400
+    if len(slugs) + len(ids) > BATCH_MAX:
+        return jsonify({'error': f'Máximo {BATCH_MAX} productos por petición'}), 400
     
-    tags = [
-        "Vegano", "Sin Gluten", "Artesanal", "Local", "Prensado en Frío",
-        "Ecológico", "Premiado", "Alto en Polifenoles", "Versátil", "Regalo",
-        "Premium", "Degustación", "Sin Filtrar", "Edición Limitada",
-        "Alto en Fruta", "Formato Familiar", "Uso Cotidiano", "Presentación",
-        "Navidad", "Pack Completo"
-    ]
+    projection = resolve_projection(request.args.get('view'), request.args.get('fields'))
+    products, missing = lookup_products(lang, slugs + ids, projection)
     
-    return jsonify({
-        'products': products_list,
-        'categories': categories,
-        'tags': tags
-    })
+    return jsonify({'products': products, 'missing': missing})
+
+
+@product_bp.route('/products/search', methods=['GET'])
+def search_products():
+    """
+    Búsqueda y filtros del catálogo con conteos por faceta (ver catalog_search).
+
+    Query params:
+    - q: texto (nombre, descripción y tags en es/en, sin tildes, por prefijo)
+    - category: una o varias categorías separadas por comas
+    - tags: tags separados por comas (el producto debe tenerlos todos)
+    - min_price, max_price
+    - featured, free_shipping, sold_out: 1/true o 0/false
+    - sort: relevance (default), price_asc, price_desc, name
+    - limit (default 24, máx 100), offset
+    - lang, view, fields: como en GET /api/products
+    """
+    from src.services.catalog_search import SORTS, search
+
+    args = request.args
+    try:
+        min_price = float(args['min_price']) if args.get('min_price') else None
+        max_price = float(args['max_price']) if args.get('max_price') else None
+        limit = min(max(int(args.get('limit', 24)), 1), BATCH_MAX)
+        offset = max(int(args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'error': 'min_price, max_price, limit y offset deben ser números'}), 400
+    sort = args.get('sort', 'relevance')
+    if sort not in SORTS:
+        return jsonify({'error': f"sort debe ser uno de: {', '.join(SORTS)}"}), 400
+
+    flags = {}
+    for param, flag in (('featured', 'featured'), ('free_shipping', 'freeShipping'), ('sold_out', 'soldOut')):
+        if args.get(param):
+            flags[flag] = args[param].lower() in ('1', 'true', 'yes')
+
+    result = search(
+        q=args.get('q', '').strip(),
+        categories=[c.strip() for c in args.get('category', '').split(',') if c.strip() and c.strip() != 'all'],
+        tags=[t.strip() for t in args.get('tags', '').split(',') if t.strip()],
+        min_price=min_price,
+        max_price=max_price,
+        flags=flags,
+        sort=sort,
+        limit=limit,
+        offset=offset,
+        lang=args.get('lang', 'es'),
+        projection=resolve_projection(args.get('view'), args.get('fields')),
+    )
+    return jsonify({**result, 'limit': limit, 'offset': offset})
 
 
 @product_bp.route('/products/<slug>', methods=['GET'])
 def get_product_by_slug(slug):
-    """Devuelve un producto por su slug."""
+    """
+    Devuelve un producto por su slug.
+    Incluye 'related': los productos de relatedProducts ya resueltos (vista card),
+    para no pedir cada uno por separado.
+    """
     lang = request.args.get('lang', 'es')
-    product = WebProduct.query.filter_by(slug=slug, active=True).first()
+    product = get_catalog(lang)['by_slug'].get(slug)
     if not product:
         return jsonify({'error': 'Producto no encontrado'}), 404
-    return jsonify(product.to_frontend_dict(lang=lang))
+    cards = get_catalog(lang, CARD_FIELDS)['by_slug']
+    related = [cards[s] for s in product.get('relatedProducts') or [] if s in cards]
+    return jsonify({**product, 'related': related})
@@ -3,14 +3,20 @@ Rutas de Reseñas para Mikel's Earth
 - POST /api/reviews: Crear una nueva reseña (genera cupón de agradecimiento)
 - GET /api/reviews: Listar reseñas públicas (con filtros)
 - GET /api/reviews/stats: Estadísticas de reseñas
+- GET /api/reviews/stats/bulk: Estadísticas de varios productos
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from src.models.user import db
 from src.models.review import Review
+from src.models.review_stats import ReviewStats
 from src.models.order import Order
 from src.models.coupon import Coupon
 from src.services.klaviyo_service import send_klaviyo_event
+from src.services.review_cache import FEATURED_MAX, get_featured
+from src.services.review_translator import schedule_review_translation
 from datetime import datetime
+import base64
+import json
 import os
 import re
 import random
@@ -59,7 +65,8 @@ def create_review():
         "rating": 5,
         "title": "Título opcional",
         "comment": "Texto de la reseña",
-        "order_number": "MKE-XXXX" (opcional)
+        "order_number": "MKE-XXXX" (opcional),
+        "lang": "es" | "en" (idioma en que está escrita, default "es")
     }
     """
     try:
@@ -148,6 +155,7 @@ def create_review():
             rating=rating,
             title=data.get('title', '').strip() if data.get('title') else None,
             comment=comment,
+            lang='en' if data.get('lang') == 'en' else 'es',
             status='approved',  # Auto-aprobada
             is_verified_purchase=is_verified,
             order_number=order_number if order_number else None,
@@ -169,6 +177,9 @@ def create_review():
         
         db.session.commit()
         
+        # Traducir en segundo plano (la página de producto la mostrará ya traducida)
+        schedule_review_translation(current_app._get_current_object())
+        
         # Enviar evento a Klaviyo para email de agradecimiento con cupón
         try:
             send_klaviyo_event(
@@ -203,6 +214,43 @@ def create_review():
         return jsonify({'error': 'Error interno del servidor', 'detail': str(e)}), 500
 
 
+def _encode_cursor(review, sort):
+    """Cursor opaco con la clave de orden de la última reseña devuelta."""
+    key = [review.created_at.isoformat(), review.id]
+    if sort in ('highest', 'lowest'):
+        key.insert(0, review.rating)
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor, sort):
+    """Devuelve (rating, created_at, id); ValueError si el cursor no es válido."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        rating = int(key.pop(0)) if sort in ('highest', 'lowest') else None
+        created_at, review_id = key
+        return rating, datetime.fromisoformat(created_at), int(review_id)
+    except Exception:
+        raise ValueError('Cursor inválido')
+
+
+def _after_cursor(query, sort, cursor):
+    """
+    Filtra las reseñas posteriores al cursor (keyset): en vez de saltar
+    `offset` filas, el índice arranca directamente en la última devuelta.
+    Orden: (rating, created_at desc, id desc); newest ignora rating.
+    """
+    rating, created_at, review_id = _decode_cursor(cursor, sort)
+    newer = db.or_(
+        Review.created_at < created_at,
+        db.and_(Review.created_at == created_at, Review.id < review_id)
+    )
+    if sort == 'highest':
+        return query.filter(db.or_(Review.rating < rating, db.and_(Review.rating == rating, newer)))
+    if sort == 'lowest':
+        return query.filter(db.or_(Review.rating > rating, db.and_(Review.rating == rating, newer)))
+    return query.filter(newer)
+
+
 @review_bp.route('', methods=['GET'])
 def get_reviews():
     """
@@ -211,14 +259,18 @@ def get_reviews():
     Query params:
     - product_slug: Filtrar por producto
     - limit: Número máximo de reseñas (default 20)
-    - offset: Paginación
+    - cursor: Paginación; se pasa el next_cursor de la página anterior
+    - offset: Paginación antigua (solo si no hay cursor)
     - sort: 'newest' (default), 'highest', 'lowest'
+    - include: 'stats' y/o 'featured' (separados por comas) para añadirlos a la respuesta
     """
     try:
         product_slug = request.args.get('product_slug')
         limit = min(int(request.args.get('limit', 20)), 100)
         offset = int(request.args.get('offset', 0))
+        cursor = request.args.get('cursor')
         sort = request.args.get('sort', 'newest')
+        include = set(request.args.get('include', '').split(','))
         
         # Base query: solo reseñas aprobadas
         query = Review.query.filter_by(status='approved')
@@ -227,26 +279,45 @@ def get_reviews():
         if product_slug:
             query = query.filter_by(product_slug=product_slug)
         
-        # Ordenar
+        # Ordenar (id desempata reseñas con la misma fecha para que el cursor sea estable)
         if sort == 'highest':
-            query = query.order_by(Review.rating.desc(), Review.created_at.desc())
+            query = query.order_by(Review.rating.desc(), Review.created_at.desc(), Review.id.desc())
         elif sort == 'lowest':
-            query = query.order_by(Review.rating.asc(), Review.created_at.desc())
+            query = query.order_by(Review.rating.asc(), Review.created_at.desc(), Review.id.desc())
         else:  # newest
-            query = query.order_by(Review.created_at.desc())
-        
-        # Contar total
-        total = query.count()
+            sort = 'newest'
+            query = query.order_by(Review.created_at.desc(), Review.id.desc())
         
         # Aplicar paginación
-        reviews = query.offset(offset).limit(limit).all()
-        
-        return jsonify({
+        if cursor:
+            try:
+                query = _after_cursor(query, sort, cursor)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            offset = 0
+        elif offset:
+            query = query.offset(offset)
+        # Una de más para saber si hay otra página
+        reviews = query.limit(limit + 1).all()
+        has_more = len(reviews) > limit
+        reviews = reviews[:limit]
+        
+        # Total desde review_stats (mantenido al escribir) en vez de query.count()
+        stats = ReviewStats.approved(product_slug)
+        
+        response = {
             'reviews': [r.to_public_dict() for r in reviews],
-            'total': total,
+            'total': stats.review_count,
             'limit': limit,
-            'offset': offset
-        }), 200
+            'offset': offset,
+            'next_cursor': _encode_cursor(reviews[-1], sort) if has_more else None
+        }
+        if 'stats' in include:
+            response['stats'] = stats.to_dict()
+        if 'featured' in include:
+            response['featured'] = get_featured()
+        
+        return jsonify(response), 200
         
     except Exception as e:
         print(f"❌ Error obteniendo reseñas: {str(e)}")
@@ -256,7 +327,7 @@ def get_reviews():
 @review_bp.route('/stats', methods=['GET'])
 def get_review_stats():
     """
-    Obtener estadísticas de reseñas.
+    Obtener estadísticas de reseñas (desde review_stats, sin recorrer las reseñas).
     
     Query params:
     - product_slug: Filtrar por producto (opcional)
@@ -264,35 +335,38 @@ def get_review_stats():
     try:
         product_slug = request.args.get('product_slug')
         
-        # Base query: solo reseñas aprobadas
-        query = Review.query.filter_by(status='approved')
-        
-        if product_slug:
-            query = query.filter_by(product_slug=product_slug)
+        # Sin producto se suman las filas de todos los productos
+        totals = ReviewStats.approved(product_slug)
         
-        reviews = query.all()
-        total = len(reviews)
+        return jsonify(totals.to_dict()), 200
         
-        if total == 0:
-            return jsonify({
-                'total_reviews': 0,
-                'average_rating': 0,
-                'rating_distribution': {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-            }), 200
+    except Exception as e:
+        print(f"❌ Error obteniendo estadísticas: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+
+@review_bp.route('/stats/bulk', methods=['GET'])
+def get_review_stats_bulk():
+    """
+    Estadísticas de varios productos en una sola petición.
+    
+    Query params:
+    - slugs: Lista separada por comas (opcional; sin ella, todos los productos con reseñas)
+    """
+    try:
+        slugs = [s.strip() for s in request.args.get('slugs', '').split(',') if s.strip()]
         
-        # Calcular estadísticas
-        ratings = [r.rating for r in reviews]
-        average = sum(ratings) / len(ratings)
+        query = ReviewStats.query.filter_by(status='approved')
+        if slugs:
+            query = query.filter(ReviewStats.product_slug.in_(slugs))
         
-        distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-        for r in ratings:
-            distribution[r] += 1
+        result = {stats.product_slug: stats.to_dict() for stats in query.all()}
+        # Los productos pedidos sin reseñas aparecen con ceros
+        empty = {'total_reviews': 0, 'average_rating': 0, 'rating_distribution': {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}}
+        for slug in slugs:
+            result.setdefault(slug, empty)
         
-        return jsonify({
-            'total_reviews': total,
-            'average_rating': round(average, 1),
-            'rating_distribution': distribution
-        }), 200
+        return jsonify({'stats': result}), 200
         
     except Exception as e:
         print(f"❌ Error obteniendo estadísticas: {str(e)}")
@@ -303,21 +377,16 @@ def get_review_stats():
 def get_featured_reviews():
     """
     Obtener reseñas destacadas para el carrusel del homepage.
-    Devuelve las mejores reseñas (4-5 estrellas) más recientes.
+    Devuelve las mejores reseñas (4-5 estrellas) más recientes (lista precalculada, ver review_cache).
     
     Query params:
     - limit: Número máximo (default 8)
     """
     try:
-        limit = min(int(request.args.get('limit', 8)), 20)
-        
-        reviews = Review.query.filter(
-            Review.status == 'approved',
-            Review.rating >= 4
-        ).order_by(Review.created_at.desc()).limit(limit).all()
+        limit = min(int(request.args.get('limit', 8)), FEATURED_MAX)
         
         return jsonify({
-            'reviews': [r.to_public_dict() for r in reviews]
+            'reviews': get_featured(limit)
         }), 200
         
     except Exception as e:
@@ -378,8 +447,9 @@ def update_review(review_id):
             review.product_slug = data['product_slug']
         if 'product_name' in data:
             review.product_name = data['product_name']
-        if 'comment' in data:
+        if 'comment' in data and data['comment'] != review.comment:
             review.comment = data['comment']
+            review.clear_translations()
         if 'rating' in data:
             review.rating = data['rating']
         if 'customer_name' in data:
@@ -387,6 +457,9 @@ def update_review(review_id):
         
         db.session.commit()
         
+        if review.status == 'approved' and review.translated_at is None:
+            schedule_review_translation(current_app._get_current_object())
+        
         return jsonify({'success': True, 'review': review.to_dict()}), 200
         
     except Exception as e:
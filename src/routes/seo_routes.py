@@ -0,0 +1,44 @@
+"""
+Rutas para crawlers: sitemap del frontend (productos, blog y páginas fijas).
+- GET /sitemap.xml: urlset, o índice de shards si supera SITEMAP_MAX_URLS
+- GET /sitemap-<n>.xml: shard n del índice
+
+Las respuestas son bytes pre-renderizados (ver services/sitemap.py) con
+ETag/304 y Cache-Control para el CDN.
+"""
+from flask import Blueprint, jsonify
+
+from src.services.http_cache import cached_response
+from src.services.sitemap import (
+    SITEMAP_CACHE,
+    SITEMAP_TTL,
+    render_sitemap,
+    render_sitemap_shard,
+)
+
+seo_bp = Blueprint('seo', __name__)
+
+
+@seo_bp.route('/sitemap.xml', methods=['GET'])
+def sitemap():
+    try:
+        return cached_response(SITEMAP_CACHE, 'index', render_sitemap, 'application/xml',
+                               surrogate_keys=('sitemap',), ttl=SITEMAP_TTL,
+                               max_age=3600, s_maxage=3600)
+    except Exception as e:
+        print(f"❌ Error generando sitemap: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+
+@seo_bp.route('/sitemap-<int:number>.xml', methods=['GET'])
+def sitemap_shard(number):
+    try:
+        response = cached_response(SITEMAP_CACHE, f'shard:{number}', lambda: render_sitemap_shard(number),
+                                   'application/xml', surrogate_keys=('sitemap',), ttl=SITEMAP_TTL,
+                                   max_age=3600, s_maxage=3600)
+        if response is None:
+            return jsonify({'error': 'Sitemap no encontrado'}), 404
+        return response
+    except Exception as e:
+        print(f"❌ Error generando sitemap: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
@@ -1,15 +1,23 @@
 from flask import Blueprint, request, jsonify
-import stripe
 import os
 from datetime import datetime
 import secrets
 from src.services.whatsapp_service import notify_new_order, notify_new_subscription
 from src.services.email_dispatcher import dispatch_order_notification, dispatch_order_confirmation, dispatch_subscription_notification, dispatch_started_checkout_event
+from src.services.tax_rates import rate_for
 
 stripe_bp = Blueprint('stripe', __name__, url_prefix='/api/stripe')
 
-# Configurar Stripe
-stripe.api_key = os.getenv('STRIPE_SECRET_KEY')
+
+def _stripe():
+    """
+    Importa stripe bajo demanda: el SDK tarda casi un segundo en importarse y
+    dominaba el arranque de cada worker. Configura la API key en cada uso.
+    """
+    import stripe
+    stripe.api_key = os.getenv('STRIPE_SECRET_KEY')
+    return stripe
+
 
 def generate_order_number():
     """Generate unique order number"""
@@ -33,6 +41,7 @@ def get_config():
 @stripe_bp.route('/create-checkout-session', methods=['POST'])
 def create_checkout_session():
     """Create Stripe Checkout session for one-time purchase"""
+    stripe = _stripe()
     try:
         data = request.json
         
@@ -71,6 +80,11 @@ def create_checkout_session():
                     })
                     # Corregir el precio al actual de la DB
                     item['price'] = float(db_product.price)
+                # Producto, SKU e IVA resueltos: viajan en los metadatos de Stripe
+                # hasta el webhook (líneas del pedido, inventario, facturación)
+                item['product_id'] = db_product.id
+                item['sku'] = db_product.sku
+                item['tax_rate'] = rate_for(db_product.sku, db_product.category, db_product.name)
             # Si no se encuentra el producto, se permite (puede ser envío, etc.)
         
         if price_errors:
@@ -98,6 +112,11 @@ def create_checkout_session():
                     'product_data': {
                         'name': item['name'],
                         'description': f"{item.get('weight', '')}",
+                        'metadata': {
+                            'product_id': str(item.get('product_id') or ''),
+                            'sku': item.get('sku') or '',
+                            'tax_rate': str(item.get('tax_rate') or ''),
+                        },
                     },
                     'unit_amount': int(item['price'] * 100),  # Convert to cents
                 },
@@ -197,6 +216,7 @@ def create_checkout_session():
 @stripe_bp.route('/create-subscription-checkout', methods=['POST'])
 def create_subscription_checkout():
     """Create Stripe Checkout session for subscription"""
+    stripe = _stripe()
     try:
         data = request.json
         
@@ -275,6 +295,7 @@ def create_subscription_checkout():
 @stripe_bp.route('/webhook', methods=['POST'])
 def stripe_webhook():
     """Handle Stripe webhooks"""
+    stripe = _stripe()
     payload = request.data
     sig_header = request.headers.get('Stripe-Signature')
     webhook_secret = os.getenv('STRIPE_WEBHOOK_SECRET')
@@ -302,17 +323,26 @@ def stripe_webhook():
             
             # Obtener detalles del pedido
             try:
-                line_items = stripe.checkout.Session.list_line_items(session['id'], limit=100)
+                line_items = stripe.checkout.Session.list_line_items(
+                    session['id'], limit=100, expand=['data.price.product']
+                )
                 items = []
                 for item in line_items.data:
                     # amount_total es el total de la línea (precio × cantidad)
                     # Guardamos el precio unitario para que el desglose sea correcto
                     unit_price = (item.amount_total / 100) / item.quantity if item.quantity else item.amount_total / 100
-                    items.append({
+                    order_item = {
                         'name': item.description,
                         'quantity': item.quantity,
                         'price': round(unit_price, 2)
-                    })
+                    }
+                    # Producto, SKU e IVA guardados en el producto de Stripe al crear la sesión
+                    product = getattr(getattr(item, 'price', None), 'product', None)
+                    metadata = getattr(product, 'metadata', None) or {}
+                    for key in ('product_id', 'sku', 'tax_rate'):
+                        if metadata.get(key):
+                            order_item[key] = metadata[key]
+                    items.append(order_item)
                 
                 # Extraer dirección de envío de Stripe shipping_details (prioridad)
                 # Esto funciona cuando el cliente usa Link o rellena en Stripe Checkout
@@ -403,6 +433,7 @@ def stripe_webhook():
                 } if needs_invoice else None
                 
                 # Guardar pedido en la base de datos
+                saved = False
                 try:
                     from src.models.order import Order
                     from src.models.user import db
@@ -432,13 +463,30 @@ def stripe_webhook():
                         fiscal_postal_code=fiscal_postal_code if needs_invoice else None
                     )
                     new_order.paid_at = datetime.utcnow()
+                    # Líneas con producto, SKU e IVA (completa lo que no traigan los metadatos)
+                    from src.services.order_lines import set_order_lines
+                    items = set_order_lines(new_order, items)
                     db.session.add(new_order)
                     db.session.commit()
+                    saved = True
                     print(f"✅ Order {order_number} saved to database (invoice: {needs_invoice})")
                 except Exception as db_error:
+                    from src.models.user import db
+                    db.session.rollback()
                     print(f"⚠️ Error saving order to database: {str(db_error)}")
                     # No fallar el webhook por error de BBDD
                 
+                # Descontar el pedido del inventario local (idempotente por order_number).
+                # Solo si el pedido está en la DB: si no, pending_units no podría contarlo
+                if saved:
+                    try:
+                        from src.services.inventory import record_sale
+                        record_sale(order_number, items)
+                    except Exception as stock_err:
+                        from src.models.user import db
+                        db.session.rollback()
+                        print(f"⚠️ Error updating inventory for order {order_number}: {stock_err}")
+                
                 # Enviar notificaciones por WhatsApp
                 notify_new_order(order_data)
                 
@@ -562,6 +610,9 @@ def stripe_webhook():
                 order.admin_notes = (order.admin_notes or '') + f'\nReembolso Stripe: {amount_refunded}€ de {amount_total}€ ({"total" if is_full_refund else "parcial"}) - {datetime.utcnow().strftime("%d/%m/%Y %H:%M")}'
                 db.session.commit()
                 print(f"✅ Order {order.order_number} marked as {'refunded' if is_full_refund else 'partially_refunded'}")
+                if is_full_refund:
+                    from src.services.inventory import release_order
+                    release_order(order.order_number)
             else:
                 print(f"⚠️ No order found for payment_intent: {payment_intent_id}")
         except Exception as refund_err:
@@ -601,6 +652,7 @@ def stripe_webhook():
 @stripe_bp.route('/session-status/<session_id>', methods=['GET'])
 def get_session_status(session_id):
     """Get checkout session status"""
+    stripe = _stripe()
     try:
         session = stripe.checkout.Session.retrieve(session_id)
         
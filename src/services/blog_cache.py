@@ -0,0 +1,74 @@
+"""
+Versión del contenido del blog e invalidación de sus respuestas cacheadas.
+
+Cualquier escritura de BlogPost (admin, webhook de Brevo, scripts):
+1. Incrementa la versión 'blog' en cache_versions en la misma transacción
+   (forma parte del ETag de las respuestas, ver http_cache).
+2. Al confirmarse, vacía la caché BLOG_CACHE (y la sección del blog del
+   sitemap) en todos los workers (cache_bus) y purga en el CDN las
+   surrogate keys afectadas.
+"""
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from src.models.blog import BlogPost
+from src.models.cache_version import CacheVersion
+from src.models.user import db
+from src.services.cache import get_cache
+from src.services.cache_bus import bump_version, publish
+from src.services.http_cache import purge
+from src.services.sitemap import SITEMAP_BLOG_CACHE, SITEMAP_CACHE
+
+BLOG_CACHE = 'blog_http'
+BLOG_CACHE_TTL = 600
+
+KEY_ALL = 'blog'
+KEY_POSTS = 'blog-posts'
+KEY_CATEGORIES = 'blog-categories'
+
+
+def post_key(slug):
+    return f'blog-post-{slug}'
+
+
+def blog_version():
+    """Versión actual del contenido del blog (0 si nunca se ha escrito)."""
+    table = CacheVersion.__table__
+    version = db.session.execute(select(table.c.version).where(table.c.name == 'blog')).scalar()
+    return f'b{version or 0}'
+
+
+def published_categories():
+    """Categorías con algún post publicado (en BLOG_CACHE: se vacía con cada escritura)."""
+    def load():
+        rows = db.session.query(BlogPost.category).filter(
+            BlogPost.status == 'published', BlogPost.category.isnot(None)
+        ).distinct()
+        return frozenset(category for (category,) in rows)
+    return get_cache(BLOG_CACHE, BLOG_CACHE_TTL).get_or_load('category_names', load)
+
+
+def _post_written(mapper, connection, target):
+    bump_version(connection, 'blog')
+    keys = Session.object_session(target).info.setdefault('blog_changed', set())
+    keys.update({KEY_POSTS, KEY_CATEGORIES, post_key(target.slug)})
+    # Si cambió el slug, purgar también la URL antigua
+    history = db.inspect(target).attrs.slug.history
+    keys.update(post_key(slug) for slug in history.deleted or ())
+
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(BlogPost, _event_name, _post_written)
+
+
+@event.listens_for(Session, 'after_commit')
+def _blog_committed(session):
+    keys = session.info.pop('blog_changed', None)
+    if keys:
+        publish(BLOG_CACHE, SITEMAP_BLOG_CACHE, SITEMAP_CACHE)
+        purge(keys)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _blog_rolled_back(session):
+    session.info.pop('blog_changed', None)
@@ -0,0 +1,180 @@
+"""
+Ingesta de posts del blog.
+
+El HTML que llega (webhook de Brevo, panel admin) se parsea una sola vez con
+lxml y de ahí salen todos los campos derivados que guardamos en blog_posts:
+
+- content: HTML saneado (sin scripts, bloques <style>, formularios ni
+  atributos on*; iframes solo de YouTube/Vimeo). Los atributos style de las
+  newsletters se conservan, quitando las declaraciones CSS peligrosas. Los
+  h2/h3 reciben un id para el índice.
+- content_source: el HTML original, para poder volver a ingerirlo sin perder
+  nada si cambian las reglas de saneado.
+- content_text: texto plano (búsqueda, ver blog_search).
+- excerpt, reading_time (minutos) y toc ([{level, id, text}]).
+- featured_image: la primera imagen del contenido si el post no tiene una.
+
+Así los endpoints de lectura sirven campos ya calculados y los listados no
+necesitan leer content.
+"""
+import math
+import re
+
+from src.models.user import db
+from src.models.blog import BlogPost
+
+WORDS_PER_MINUTE = 200
+EXCERPT_LENGTH = 200
+TOC_TAGS = ('h2', 'h3')
+
+# Bloques tras los que se inserta un salto para que el texto no junte palabras
+_BLOCK_TAGS = {
+    'p', 'div', 'br', 'li', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'blockquote', 'pre', 'table', 'tr', 'td', 'th', 'figure', 'figcaption', 'section', 'article',
+}
+
+# lxml se importa al primer uso: este módulo se carga con blog_routes al arrancar
+_cleaner = None
+
+# Declaraciones CSS que se eliminan de los atributos style (el formato de las newsletters se conserva)
+_UNSAFE_CSS_RE = re.compile(r'expression|javascript:|vbscript:|behavior|-moz-binding|@import|position\s*:\s*fixed', re.I)
+_CSS_URL_RE = re.compile(r'url\(\s*([\'"]?)(.*?)\1\s*\)', re.I)
+
+
+def _get_cleaner():
+    global _cleaner
+    if _cleaner is None:
+        from lxml.html.clean import Cleaner
+        _cleaner = Cleaner(
+            scripts=True, javascript=True, style=True, inline_style=False, forms=True, frames=True,
+            embedded=True, host_whitelist=('www.youtube.com', 'www.youtube-nocookie.com', 'player.vimeo.com'),
+            safe_attrs_only=True, safe_attrs=Cleaner.safe_attrs | {'style'}, page_structure=False,
+        )
+    return _cleaner
+
+
+def _clean_style(style):
+    """Atributo style sin declaraciones peligrosas; url() solo con http(s)."""
+    declarations = []
+    for declaration in style.split(';'):
+        prop, _, value = declaration.partition(':')
+        if not prop.strip() or not value.strip() or _UNSAFE_CSS_RE.search(declaration):
+            continue
+        if any(not url.strip().lower().startswith(('http://', 'https://'))
+               for _, url in _CSS_URL_RE.findall(declaration)):
+            continue
+        declarations.append(declaration.strip())
+    return '; '.join(declarations)
+
+
+def _excerpt(text, max_length=EXCERPT_LENGTH):
+    # Mismo recorte que BlogPost.generate_excerpt
+    if len(text) > max_length:
+        text = text[:max_length].rsplit(' ', 1)[0] + '...'
+    return text
+
+
+def _anchor(text, used):
+    base = BlogPost.generate_slug(text) or 'seccion'
+    anchor, counter = base, 2
+    while anchor in used:
+        anchor = f"{base}-{counter}"
+        counter += 1
+    used.add(anchor)
+    return anchor
+
+
+def ingest_html(html):
+    """
+    Parsea el HTML una vez y devuelve los campos derivados:
+    {'content', 'content_text', 'excerpt', 'reading_time', 'toc', 'first_image'}.
+    """
+    if not html or not html.strip():
+        return {'content': '', 'content_text': '', 'excerpt': '', 'reading_time': 0,
+                'toc': [], 'first_image': None}
+
+    import lxml.html
+
+    root = lxml.html.fragment_fromstring(html, create_parent='div')
+    _get_cleaner()(root)
+    for element in root.iter():
+        style = element.get('style')
+        if style is not None:
+            cleaned = _clean_style(style)
+            if cleaned:
+                element.set('style', cleaned)
+            else:
+                del element.attrib['style']
+
+    toc = []
+    # Los ids que ya trae el HTML no se pueden repetir en los anclas generados
+    used = {element.get('id') for element in root.iter() if element.get('id')}
+    claimed = set()
+    for heading in root.iter(*TOC_TAGS):
+        title = ' '.join(heading.text_content().split())
+        if not title:
+            continue
+        anchor = heading.get('id')
+        if not anchor or anchor in claimed:
+            anchor = _anchor(title, used)
+        claimed.add(anchor)
+        heading.set('id', anchor)
+        toc.append({'level': int(heading.tag[1]), 'id': anchor, 'text': title})
+
+    first_image = next((img.get('src') for img in root.iter('img') if img.get('src')), None)
+
+    # HTML saneado: el contenido del div contenedor
+    content = (root.text or '') + ''.join(
+        lxml.html.tostring(child, encoding='unicode') for child in root
+    )
+
+    # Texto: separar bloques antes de extraerlo (el árbol ya está serializado)
+    for element in root.iter(*_BLOCK_TAGS):
+        element.tail = '\n' + (element.tail or '')
+    text = ' '.join(root.text_content().split())
+    words = len(text.split())
+
+    return {
+        'content': content,
+        'content_text': text,
+        'excerpt': _excerpt(text),
+        'reading_time': max(1, math.ceil(words / WORDS_PER_MINUTE)) if words else 0,
+        'toc': toc,
+        'first_image': first_image,
+    }
+
+
+def apply_ingest(post, html):
+    """Asigna al post el contenido saneado y sus campos derivados."""
+    derived = ingest_html(html)
+    post.content_source = html
+    post.content = derived['content']
+    post.content_text = derived['content_text']
+    post.excerpt = derived['excerpt']
+    post.reading_time = derived['reading_time']
+    post.toc = derived['toc']
+    if not post.featured_image and derived['first_image']:
+        post.featured_image = derived['first_image']
+    return post
+
+
+def unique_slug(title, exclude_id=None):
+    """
+    Slug libre para el título: base, o base-N con el menor N libre.
+    Una sola consulta por prefijo en vez de una por colisión.
+    """
+    base = BlogPost.generate_slug(title)
+    query = db.session.query(BlogPost.slug).filter(
+        db.or_(BlogPost.slug == base, BlogPost.slug.like(f"{base}-%"))
+    )
+    if exclude_id is not None:
+        query = query.filter(BlogPost.id != exclude_id)
+    taken = {slug for (slug,) in query}
+    if base not in taken:
+        return base
+    suffix_re = re.compile(rf'^{re.escape(base)}-(\d+)$')
+    used = {int(m.group(1)) for m in map(suffix_re.match, taken) if m}
+    counter = 1
+    while counter in used:
+        counter += 1
+    return f"{base}-{counter}"
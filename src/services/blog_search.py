@@ -0,0 +1,83 @@
+"""
+Búsqueda de texto completo en los posts publicados del blog.
+
+- PostgreSQL: columna generada blog_posts.search_vector (tsvector español +
+  inglés, índice GIN) y ranking con ts_rank_cd.
+- SQLite (local): tabla FTS5 blog_posts_fts y ranking bm25.
+
+Ambas se crean en la migración 0009 y las mantiene la propia base de datos a
+partir de title, excerpt, tags y content_text, así que cualquier camino que
+escriba posts (admin, webhook de Brevo) queda indexado. La consulta devuelve
+ids y ranking; de los posts solo se cargan las columnas del resumen.
+"""
+import re
+
+from sqlalchemy import text
+from sqlalchemy.orm import load_only
+
+from src.models.user import db
+from src.models.blog import BlogPost, SUMMARY_COLUMNS
+
+_PG_SEARCH = text("""
+    WITH q AS (
+        SELECT websearch_to_tsquery('spanish', :q) || websearch_to_tsquery('english', :q) AS query
+    )
+    SELECT id, ts_rank_cd(search_vector, q.query) AS rank, COUNT(*) OVER () AS total
+    FROM blog_posts, q
+    WHERE status = 'published' AND search_vector @@ q.query
+    ORDER BY rank DESC, published_at DESC
+    LIMIT :limit OFFSET :offset
+""")
+
+# bm25 devuelve valores negativos (más negativo = más relevante); pesos por columna.
+# FTS5 no admite bm25() junto a funciones ventana: se calcula en una subconsulta.
+_SQLITE_SEARCH = text("""
+    SELECT p.id, m.rank, COUNT(*) OVER () AS total
+    FROM (
+        SELECT rowid AS id, -bm25(blog_posts_fts, 10.0, 4.0, 4.0, 1.0) AS rank
+        FROM blog_posts_fts
+        WHERE blog_posts_fts MATCH :q
+    ) AS m
+    JOIN blog_posts p ON p.id = m.id
+    WHERE p.status = 'published'
+    ORDER BY m.rank DESC, p.published_at DESC
+    LIMIT :limit OFFSET :offset
+""")
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _fts5_query(query):
+    """Términos del usuario como prefijos entre comillas (evita la sintaxis de FTS5)."""
+    return ' '.join(f'"{word}"*' for word in _WORD_RE.findall(query))
+
+
+def search_published_posts(query, limit=10, offset=0):
+    """
+    Returns:
+        (posts, total): posts es [to_summary() + 'rank'] ordenado por relevancia.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        statement, params = _PG_SEARCH, {'q': query}
+    else:
+        fts_query = _fts5_query(query)
+        if not fts_query:
+            return [], 0
+        statement, params = _SQLITE_SEARCH, {'q': fts_query}
+
+    rows = db.session.execute(statement, {**params, 'limit': limit, 'offset': offset}).fetchall()
+    if not rows:
+        return [], 0
+
+    posts = BlogPost.query.options(load_only(*SUMMARY_COLUMNS)).filter(
+        BlogPost.id.in_([row.id for row in rows])
+    ).all()
+    by_id = {post.id: post for post in posts}
+
+    results = []
+    for row in rows:
+        if row.id in by_id:
+            summary = by_id[row.id].to_summary()
+            summary['rank'] = round(float(row.rank), 6)
+            results.append(summary)
+    return results, rows[0].total
@@ -0,0 +1,118 @@
+"""
+Cachés en memoria del proceso (cada worker de gunicorn tiene las suyas).
+
+Cada caché tiene un nombre (namespace), un TTL y un máximo de entradas.
+invalidate(name) vacía la caché de ese namespace en este proceso.
+"""
+import threading
+import time
+
+# Las claves pueden venir de la petición (página, slug...): el tamaño siempre está acotado
+DEFAULT_MAX_ENTRIES = 1000
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class TTLCache:
+    """
+    Diccionario con caducidad por entrada. Seguro entre threads.
+
+    get_or_load() calcula cada clave una sola vez aunque la pidan varios
+    threads a la vez, y descarta el resultado si la clave se invalidó
+    mientras se calculaba (el loader pudo leer datos anteriores a la escritura).
+    """
+
+    def __init__(self, name, ttl, max_entries=DEFAULT_MAX_ENTRIES):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+        # Generación: invalidate() la incrementa; un set() con una generación anterior se descarta
+        self._epoch = 0
+        self._key_generations = {}
+        self._load_locks = {}
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return default
+        return entry[1]
+
+    def generation(self, key):
+        """Marca para set(..., generation=): deja de coincidir si se invalida `key`."""
+        with self._lock:
+            return (self._epoch, self._key_generations.get(key, 0))
+
+    def set(self, key, value, generation=None):
+        """Guarda `value`. Con generation, no lo guarda si `key` se invalidó desde entonces."""
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._key_generations.get(key, 0)):
+                return False
+            self._data.pop(key, None)
+            if len(self._data) >= self.max_entries:
+                self._evict()
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            return True
+
+    def _evict(self):
+        """Con la caché llena: quita las entradas caducadas y, si no basta, las más antiguas."""
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._data.items() if expires < now]:
+            del self._data[key]
+        while len(self._data) >= self.max_entries:
+            # El dict conserva el orden de inserción: la primera es la más antigua
+            del self._data[next(iter(self._data))]
+
+    def get_or_load(self, key, loader):
+        """Devuelve el valor cacheado o lo calcula con loader() y lo guarda."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            # Otro thread puede haberlo calculado mientras esperábamos
+            value = self.get(key)
+            if value is None:
+                generation = self.generation(key)
+                try:
+                    value = loader()
+                finally:
+                    with self._lock:
+                        self._load_locks.pop(key, None)
+                self.set(key, value, generation)
+        return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._data.clear()
+                self._key_generations.clear()
+                self._epoch += 1
+            else:
+                self._data.pop(key, None)
+                self._key_generations[key] = self._key_generations.get(key, 0) + 1
+
+
+def get_cache(name, ttl=300, max_entries=DEFAULT_MAX_ENTRIES):
+    """Devuelve (creándola si no existe) la caché del namespace `name`."""
+    cache = _registry.get(name)
+    if cache is None:
+        with _registry_lock:
+            cache = _registry.setdefault(name, TTLCache(name, ttl, max_entries))
+    return cache
+
+
+def invalidate(name, key=None):
+    """Vacía la caché `name` (o solo `key`) en este proceso."""
+    cache = _registry.get(name)
+    if cache is not None:
+        cache.invalidate(key)
+
+
+def invalidate_all():
+    """Vacía todas las cachés de este proceso."""
+    for cache in list(_registry.values()):
+        cache.invalidate()
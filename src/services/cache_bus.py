@@ -0,0 +1,117 @@
+"""
+Bus de invalidación de cachés entre workers.
+
+Cada worker de gunicorn tiene sus propias cachés en memoria (ver cache.py).
+Cuando un worker modifica datos cacheados llama a publish(namespace): vacía
+su caché local y avisa al resto.
+
+- PostgreSQL: NOTIFY en el canal cache_invalidation; cada worker tiene un
+  thread con LISTEN que vacía el namespace recibido. Si la conexión se
+  pierde, al reconectar se vacían todas las cachés (pudo perderse un aviso).
+- SQLite: publish incrementa la versión del namespace en cache_versions y
+  el thread del worker sondea la tabla cada CACHE_BUS_POLL_SECONDS.
+
+Así los TTL siguen siendo largos sin servir datos obsoletos en otros workers.
+"""
+import os
+import select
+import threading
+import time
+
+from sqlalchemy import select as sa_select, text
+
+from src.models.cache_version import CacheVersion
+from src.services.cache import invalidate, invalidate_all
+
+CHANNEL = 'cache_invalidation'
+POLL_SECONDS = float(os.getenv('CACHE_BUS_POLL_SECONDS', '2'))
+
+_engine = None
+_listener = None
+
+
+def publish(*names):
+    """Vacía los namespaces en este worker y lo notifica a los demás."""
+    for name in names:
+        invalidate(name)
+    if _engine is None:
+        return
+    try:
+        with _engine.begin() as conn:
+            for name in names:
+                if _engine.dialect.name == 'postgresql':
+                    conn.execute(text('SELECT pg_notify(:channel, :name)'), {'channel': CHANNEL, 'name': name})
+                else:
+                    bump_version(conn, name)
+    except Exception as e:
+        # La caché local ya está vacía; los demás workers caducarán por TTL
+        print(f"[CacheBus] Error publicando {names}: {e}")
+
+
+def bump_version(conn, name):
+    """Incrementa la versión del namespace (dentro de la transacción de `conn`)."""
+    table = CacheVersion.__table__
+    updated = conn.execute(
+        table.update().where(table.c.name == name).values(version=table.c.version + 1)
+    ).rowcount
+    if not updated:
+        conn.execute(table.insert().values(name=name, version=1))
+
+
+def _listen_postgres():
+    reconnecting = False
+    while True:
+        raw = None
+        try:
+            raw = _engine.raw_connection()
+            conn = raw.driver_connection
+            conn.autocommit = True
+            conn.cursor().execute(f'LISTEN {CHANNEL}')
+            if reconnecting:
+                invalidate_all()
+            while True:
+                if select.select([conn], [], [], 60) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    invalidate(conn.notifies.pop(0).payload)
+        except Exception as e:
+            print(f"[CacheBus] LISTEN perdido, reconectando: {e}")
+            reconnecting = True
+            time.sleep(5)
+        finally:
+            if raw is not None:
+                try:
+                    raw.invalidate()
+                except Exception:
+                    pass
+
+
+def _poll_versions():
+    table = CacheVersion.__table__
+    seen = None
+    while True:
+        try:
+            with _engine.connect() as conn:
+                current = dict(conn.execute(sa_select(table.c.name, table.c.version)).all())
+            if seen is not None:
+                for name, version in current.items():
+                    if seen.get(name) != version:
+                        invalidate(name)
+            seen = current
+        except Exception as e:
+            print(f"[CacheBus] Error sondeando cache_versions: {e}")
+        time.sleep(POLL_SECONDS)
+
+
+def start_listener(app):
+    """Arranca (una vez por proceso) el thread que recibe invalidaciones."""
+    global _engine, _listener
+    if _listener is not None and _listener.is_alive():
+        return
+    with app.app_context():
+        from src.models.user import db
+        _engine = db.engine
+    target = _listen_postgres if _engine.dialect.name == 'postgresql' else _poll_versions
+    _listener = threading.Thread(target=target, name='cache-bus', daemon=True)
+    _listener.start()
@@ -0,0 +1,209 @@
+"""
+Snapshot en memoria del catálogo público (GET /api/products).
+
+Por idioma y vista (full o card, ver VIEWS) se guarda la respuesta ya
+serializada (bytes) y los productos indexados por slug, de modo que ni el
+listado ni el detalle tocan la DB mientras el snapshot esté vigente. Las
+proyecciones a medida (fields=...) no se cachean: se recortan en memoria a
+partir del snapshot completo, así ninguna combinación de parámetros provoca
+consultas ni ocupa la caché. Cualquier escritura en web_products debe
+llamar a invalidate_catalog(), que lo invalida también en los demás workers
+(junto con el índice de búsqueda de catalog_search, que vive en la misma caché).
+
+El stock (y soldOut) sale del inventario local (services/inventory) para los
+SKUs que tienen fila en inventory_levels; los demás usan la columna stock.
+
+Cada producto incluye 'rating' (media y número de reseñas aprobadas) leído de
+review_stats; al confirmar una transacción que cambia reseñas el snapshot se
+invalida solo (ver _review_stats_committed).
+"""
+import hashlib
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session, load_only
+
+from src.models.review_stats import ReviewStats
+from src.models.web_product import FRONTEND_FIELDS, WebProduct
+from src.services.cache import get_cache
+from src.services.cache_bus import publish
+from src.services.sitemap import SITEMAP_CACHE, SITEMAP_PRODUCTS_CACHE
+
+CATALOG_CACHE = 'catalog'
+CATALOG_TTL = 300
+LANGUAGES = ('es', 'en')
+
+CATEGORIES = {
+    'es': [
+        {"id": "all", "name": "Todos", "slug": "all"},
+        {"id": "conservas", "name": "Conservas", "slug": "conservas"},
+        {"id": "aceites", "name": "Aceites", "slug": "aceites"},
+        {"id": "packs", "name": "Packs", "slug": "packs"}
+    ],
+    'en': [
+        {"id": "all", "name": "All", "slug": "all"},
+        {"id": "conservas", "name": "Preserves", "slug": "conservas"},
+        {"id": "aceites", "name": "Olive Oils", "slug": "aceites"},
+        {"id": "packs", "name": "Packs", "slug": "packs"}
+    ],
+}
+
+TAGS = [
+    "Vegano", "Sin Gluten", "Artesanal", "Local", "Prensado en Frío",
+    "Ecológico", "Premiado", "Alto en Polifenoles", "Versátil", "Regalo",
+    "Premium", "Degustación", "Sin Filtrar", "Edición Limitada",
+    "Alto en Fruta", "Formato Familiar", "Uso Cotidiano", "Presentación",
+    "Navidad", "Pack Completo"
+]
+
+
+# Campos que usan las tarjetas del listado (view=card)
+CARD_FIELDS = frozenset({
+    'id', 'name', 'slug', 'description', 'price', 'currency', 'image', 'category', 'tags',
+    'stock', 'weight', 'rating', 'soldOut', 'soldOutMessage', 'originalPrice', 'badges',
+    'featured', 'freeShipping', 'limitedEdition', 'award', 'subscriptionAvailable',
+})
+VIEWS = {'full': None, 'card': CARD_FIELDS}
+_KNOWN_FIELDS = frozenset(key for key, _, _, _ in FRONTEND_FIELDS)
+
+
+def resolve_projection(view=None, fields=None):
+    """
+    Proyección pedida: None (producto completo) o frozenset de claves del frontend.
+    fields= (lista separada por comas) tiene prioridad sobre view=; id y slug van siempre.
+    """
+    if fields:
+        requested = {f.strip() for f in fields.split(',')} & _KNOWN_FIELDS
+        return frozenset(requested | {'id', 'slug'})
+    return VIEWS.get(view or 'full')
+
+
+def _build_snapshot(projection=None):
+    """Una sola consulta para los dos idiomas, cargando solo las columnas de la proyección."""
+    query = WebProduct.query.filter_by(active=True).order_by(WebProduct.display_order)
+    if projection is not None:
+        query = query.options(load_only(*WebProduct.columns_for(projection)))
+    products = query.all()
+    ratings = {}
+    if projection is None or 'rating' in projection:
+        ratings = {
+            stats.product_slug: {'average': stats.average_rating, 'count': stats.review_count}
+            for stats in ReviewStats.query.filter_by(status='approved')
+        }
+    stock = {}
+    if projection is None or {'stock', 'soldOut'} & projection:
+        from src.services.inventory import available_stock
+        stock = available_stock()
+    snapshot = {}
+    for lang in LANGUAGES:
+        products_list = [
+            p.to_frontend_dict(lang=lang, rating=ratings.get(p.slug), fields=projection, stock=stock.get(p.sku))
+            for p in products
+        ]
+        body = {
+            'products': products_list,
+            'categories': CATEGORIES[lang],
+            'tags': TAGS
+        }
+        # Mismos bytes que devolvería jsonify(body)
+        payload = current_app.json.response(body).get_data()
+        snapshot[lang] = {
+            'payload': payload,
+            # ETag: validación condicional y clave de la caché de compresión
+            'etag': hashlib.sha1(payload).hexdigest()[:20],
+            'by_slug': {p['slug']: p for p in products_list},
+            'by_id': {p['id']: p for p in products_list},
+        }
+    return snapshot
+
+
+def _is_view(projection):
+    return projection is None or projection in VIEWS.values()
+
+
+def project(product, projection):
+    """El producto con solo las claves de `projection` (None = completo)."""
+    if projection is None:
+        return product
+    return {key: value for key, value in product.items() if key in projection}
+
+
+def _projected_catalog(catalog, lang, projection):
+    """Catálogo de una proyección a medida a partir del snapshot completo (sin DB ni caché)."""
+    products_list = [project(p, projection) for p in catalog['by_id'].values()]
+    payload = current_app.json.response({
+        'products': products_list,
+        'categories': CATEGORIES[lang],
+        'tags': TAGS
+    }).get_data()
+    return {
+        'payload': payload,
+        'etag': hashlib.sha1(payload).hexdigest()[:20],
+        'by_slug': {p['slug']: p for p in products_list},
+        'by_id': {p['id']: p for p in products_list},
+    }
+
+
+def get_catalog(lang='es', projection=None):
+    """
+    Devuelve {'payload': bytes, 'etag': str, 'by_slug': {...}, 'by_id': {...}} del idioma pedido.
+    Solo las vistas (VIEWS) tienen snapshot propio; cualquier otra proyección
+    se recorta del snapshot completo en cada llamada.
+    """
+    if lang not in LANGUAGES:
+        lang = 'es'
+    if not _is_view(projection):
+        return _projected_catalog(get_catalog(lang), lang, projection)
+    key = 'snapshot' if projection is None else ('snapshot', 'card')
+    cache = get_cache(CATALOG_CACHE, CATALOG_TTL)
+    return cache.get_or_load(key, lambda: _build_snapshot(projection))[lang]
+
+
+def indexed_products(lang='es', projection=None):
+    """
+    (by_id, proyección pendiente) para resolver productos sueltos: con una
+    proyección a medida se lee el snapshot completo y se recorta cada
+    producto con project(), sin serializar todo el catálogo.
+    """
+    if _is_view(projection):
+        return get_catalog(lang, projection), None
+    return get_catalog(lang), projection
+
+
+def lookup_products(lang='es', refs=(), projection=None):
+    """
+    Resuelve varios productos con el índice del snapshot (sin consultas).
+
+    Args:
+        refs: slugs (str) e ids (int), mezclados, en el orden en que se quieren.
+    Returns:
+        (productos en el orden de refs sin duplicados, slugs/ids no encontrados o inactivos)
+    """
+    catalog, pending = indexed_products(lang, projection)
+    products, missing, seen = [], [], set()
+    for ref in refs:
+        index = catalog['by_id'] if isinstance(ref, int) else catalog['by_slug']
+        product = index.get(ref)
+        if product is None:
+            missing.append(ref)
+        elif product['id'] not in seen:
+            seen.add(product['id'])
+            products.append(project(product, pending))
+    return products, missing
+
+
+def invalidate_catalog():
+    """Vacía el snapshot (y la sección de productos del sitemap) en todos los workers (ver cache_bus)."""
+    publish(CATALOG_CACHE, SITEMAP_PRODUCTS_CACHE, SITEMAP_CACHE)
+
+
+@event.listens_for(Session, 'after_commit')
+def _review_stats_committed(session):
+    # review_stats marca la sesión cuando cambian las reseñas (ver _mark_changed)
+    if session.info.pop('review_stats_changed', None):
+        publish(CATALOG_CACHE)  # el sitemap no depende de las reseñas
+
+
+@event.listens_for(Session, 'after_rollback')
+def _review_stats_rolled_back(session):
+    session.info.pop('review_stats_changed', None)
@@ -0,0 +1,174 @@
+"""
+Búsqueda y filtros del catálogo (GET /api/products/search).
+
+Se construye un índice invertido a partir del snapshot del catálogo (los dos
+idiomas) y se guarda en la misma caché CATALOG_CACHE: invalidate_catalog()
+lo descarta junto con el snapshot y se reconstruye en la siguiente búsqueda.
+
+- Texto: nombre, descripción y tags en español e inglés, sin tildes y por
+  prefijo ("acei" encuentra "aceite"). Todas las palabras deben aparecer.
+- Facetas: category y tags (conteos), flags featured/freeShipping/soldOut
+  y rango de precios, calculadas con los conjuntos de ids del índice.
+"""
+import bisect
+import re
+import unicodedata
+
+from src.services.cache import get_cache
+from src.services.catalog_cache import (
+    CATALOG_CACHE,
+    CATALOG_TTL,
+    LANGUAGES,
+    get_catalog,
+    indexed_products,
+    project,
+)
+
+# Peso de cada campo en la relevancia
+FIELD_WEIGHTS = (('name', 3), ('tags', 2), ('description', 1))
+FLAGS = ('featured', 'freeShipping', 'soldOut')
+SORTS = ('relevance', 'price_asc', 'price_desc', 'name')
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """Palabras en minúsculas y sin tildes."""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii')
+    return _WORD_RE.findall(text.lower())
+
+
+def category_slug(category):
+    """'Conservas' -> 'conservas': mismo slug que CATEGORIES (filtro y faceta)."""
+    return '-'.join(tokenize(category))
+
+
+def _build_index():
+    postings = {}  # token -> {product_id: peso}
+    products = {}
+    for lang in LANGUAGES:
+        for product_id, product in get_catalog(lang)['by_id'].items():
+            products.setdefault(product_id, product)
+            for field, weight in FIELD_WEIGHTS:
+                value = product.get(field)
+                text = ' '.join(value) if isinstance(value, list) else value
+                for token in set(tokenize(text)):
+                    scores = postings.setdefault(token, {})
+                    scores[product_id] = max(scores.get(product_id, 0), weight)
+
+    by_category, by_tag = {}, {}
+    by_flag = {flag: set() for flag in FLAGS}
+    for product_id, product in products.items():
+        if product.get('category'):
+            by_category.setdefault(category_slug(product['category']), set()).add(product_id)
+        for tag in product.get('tags') or []:
+            by_tag.setdefault(tag, set()).add(product_id)
+        for flag in FLAGS:
+            if product.get(flag):
+                by_flag[flag].add(product_id)
+
+    return {
+        'tokens': sorted(postings),
+        'postings': postings,
+        'all': set(products),
+        'by_category': by_category,
+        'by_tag': by_tag,
+        'by_flag': by_flag,
+        'price': {product_id: product.get('price') or 0 for product_id, product in products.items()},
+        'name': {product_id: (product.get('name') or '').lower() for product_id, product in products.items()},
+        'order': {product_id: position for position, product_id in enumerate(get_catalog('es')['by_id'])},
+    }
+
+
+def get_index():
+    return get_cache(CATALOG_CACHE, CATALOG_TTL).get_or_load('search_index', _build_index)
+
+
+def _match_text(index, query):
+    """{product_id: puntuación} de los productos que contienen todas las palabras (por prefijo)."""
+    scores = None
+    for term in tokenize(query):
+        term_scores = {}
+        tokens = index['tokens']
+        position = bisect.bisect_left(tokens, term)
+        while position < len(tokens) and tokens[position].startswith(term):
+            for product_id, weight in index['postings'][tokens[position]].items():
+                # Coincidencia exacta puntúa más que por prefijo
+                score = weight * (2 if tokens[position] == term else 1)
+                term_scores[product_id] = max(term_scores.get(product_id, 0), score)
+            position += 1
+        if scores is None:
+            scores = term_scores
+        else:
+            scores = {pid: scores[pid] + s for pid, s in term_scores.items() if pid in scores}
+        if not scores:
+            break
+    return scores
+
+
+def search(q=None, categories=(), tags=(), min_price=None, max_price=None, flags=None,
+           sort='relevance', limit=24, offset=0, lang='es', projection=None):
+    """
+    Args:
+        categories: slugs de CATEGORIES, cualquiera de ellas (OR); tags: todas (AND).
+        flags: {'featured': True, 'soldOut': False, ...}
+    Returns:
+        dict con products (página), total y facets.
+    """
+    index = get_index()
+    scores = _match_text(index, q) if q and tokenize(q) else None
+    base = set(scores) if scores is not None else set(index['all'])
+
+    for tag in tags:
+        base &= index['by_tag'].get(tag, set())
+
+    def apply_flags(ids, skip=None):
+        for flag, wanted in (flags or {}).items():
+            if flag == skip:
+                continue
+            flagged = index['by_flag'][flag]
+            ids = ids & flagged if wanted else ids - flagged
+        return ids
+
+    def in_price(product_id):
+        price = index['price'][product_id]
+        return (min_price is None or price >= min_price) and (max_price is None or price <= max_price)
+
+    # Categorías, precio y cada flag se cuentan sin su propio filtro, para
+    # poder cambiar de opción. Las etiquetas se combinan con AND: se cuentan
+    # dentro de los resultados (cuántos quedarían al añadir la etiqueta).
+    in_categories = None
+    if categories:
+        in_categories = set().union(*(index['by_category'].get(category_slug(c), set()) for c in categories))
+    priced = {pid for pid in base if in_price(pid)}
+    without_category = apply_flags(priced)
+    without_price = apply_flags(base)
+    if in_categories is not None:
+        without_price = without_price & in_categories
+        priced = priced & in_categories
+    matches = without_price & without_category
+
+    prices = [index['price'][pid] for pid in without_price]
+    facets = {
+        'category': {c: len(ids & without_category) for c, ids in index['by_category'].items() if ids & without_category},
+        'tags': {t: len(ids & matches) for t, ids in index['by_tag'].items() if ids & matches},
+        'flags': {flag: len(index['by_flag'][flag] & apply_flags(priced, skip=flag)) for flag in FLAGS},
+        'price': {'min': min(prices), 'max': max(prices)} if prices else {'min': None, 'max': None},
+    }
+
+    if sort == 'price_asc':
+        ordered = sorted(matches, key=lambda pid: (index['price'][pid], index['order'].get(pid, 0)))
+    elif sort == 'price_desc':
+        ordered = sorted(matches, key=lambda pid: (-index['price'][pid], index['order'].get(pid, 0)))
+    elif sort == 'name':
+        ordered = sorted(matches, key=lambda pid: index['name'][pid])
+    elif scores is not None:
+        ordered = sorted(matches, key=lambda pid: (-scores[pid], index['order'].get(pid, 0)))
+    else:
+        # Sin texto: el orden del catálogo (display_order)
+        ordered = sorted(matches, key=lambda pid: index['order'].get(pid, 0))
+
+    catalog, pending = indexed_products(lang, projection)
+    by_id = catalog['by_id']
+    page = [project(by_id[pid], pending) for pid in ordered[offset:offset + limit] if pid in by_id]
+    return {'products': page, 'total': len(ordered), 'facets': facets}
@@ -0,0 +1,162 @@
+"""
+Compresión de respuestas (after_request) negociada con Accept-Encoding.
+
+- brotli si el cliente lo acepta y el paquete brotli está instalado; si no, gzip.
+- Solo tipos de texto (JSON, HTML, XML, RSS, JS, CSS) y cuerpos de al menos
+  COMPRESS_MIN_SIZE bytes; nunca respuestas ya codificadas ni parciales.
+- Respuestas en streaming (generadores): se comprimen trozo a trozo con gzip
+  y flush por trozo, sin leerlas enteras en memoria. Los ficheros enviados
+  con direct_passthrough (static_assets, que ya tiene variantes
+  precomprimidas) no se tocan.
+- Respuestas cacheables (con ETag fuerte, p.ej. catálogo, blog, sitemap):
+  los bytes comprimidos se guardan en un LRU por (codificación, ETag), así el
+  mismo payload se comprime una vez por worker y no en cada petición.
+
+El ETag de la respuesta comprimida pasa a ser débil (W/"..."): la
+representación cambia pero If-None-Match sigue validando contra él.
+"""
+import gzip
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli se negocia solo gzip
+    brotli = None
+
+MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', '5'))
+# Las respuestas cacheadas se comprimen una sola vez: compensa apretar más
+CACHED_GZIP_LEVEL = 9
+CACHED_BROTLI_QUALITY = 9
+CACHE_MAX_BYTES = int(os.getenv('COMPRESS_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/xml', 'application/rss+xml', 'application/javascript',
+    'text/html', 'text/plain', 'text/css', 'text/xml', 'text/javascript', 'text/csv',
+    'image/svg+xml',
+}
+
+
+class _CompressedCache:
+    """LRU acotado por tamaño total de los bytes comprimidos."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._data[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._size -= len(evicted)
+
+
+_cache = _CompressedCache(CACHE_MAX_BYTES)
+
+
+def _negotiate(request, streamed=False):
+    if brotli is not None and not streamed and request.accept_encodings['br']:
+        return 'br'
+    if request.accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress(data, encoding, cached=False):
+    if encoding == 'br':
+        return brotli.compress(data, quality=CACHED_BROTLI_QUALITY if cached else BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=CACHED_GZIP_LEVEL if cached else GZIP_LEVEL, mtime=0)
+
+
+def _gzip_stream(chunks):
+    # Cabecera gzip (wbits=31) y Z_SYNC_FLUSH por trozo: el cliente recibe
+    # cada trozo en cuanto se genera
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        if chunk:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def _compressible(response):
+    return (
+        200 <= response.status_code < 300
+        and response.status_code not in (204, 206)
+        and response.mimetype in COMPRESSIBLE_TYPES
+        and 'Content-Encoding' not in response.headers
+        and not response.direct_passthrough
+    )
+
+
+def compress_response(response, request):
+    """Comprime `response` si procede (se usa como after_request)."""
+    if not _compressible(response):
+        return response
+    response.vary.add('Accept-Encoding')
+
+    if response.is_streamed:
+        encoding = _negotiate(request, streamed=True)
+        if encoding is None:
+            return response
+        response.response = _gzip_stream(response.response)
+        response.headers.pop('Content-Length', None)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    encoding = _negotiate(request)
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < MIN_SIZE:
+        return response
+
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        key = (encoding, etag, len(data))
+        compressed = _cache.get(key)
+        if compressed is None:
+            compressed = _compress(data, encoding, cached=True)
+            _cache.set(key, compressed)
+    else:
+        compressed = _compress(data, encoding)
+
+    if len(compressed) >= len(data):
+        return response
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    if etag:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """Registra la compresión en la app (COMPRESS_RESPONSES=0 la desactiva)."""
+    if os.getenv('COMPRESS_RESPONSES', '1') == '0':
+        return
+    from flask import request
+
+    @app.after_request
+    def _compress_after_request(response):
+        return compress_response(response, request)
@@ -0,0 +1,490 @@
+"""
+Facturas y tickets de Holded para los pedidos web.
+
+- create_order_document(): un pedido (botón "Facturar" del admin). Usa el
+  mismo lock y la misma búsqueda de documentos existentes que los lotes.
+- invoice_orders(): muchos pedidos a la vez (cierre de mes). Sin llamadas
+  repetidas a Holded:
+  1. Una sola descarga de contactos (ContactIndex); un solo alta/PUT por
+     cliente aunque tenga varios pedidos en el lote.
+  2. Documentos creados con como mucho HOLDED_INVOICE_CONCURRENCY peticiones
+     en paralelo y HOLDED_RATE_PER_SECOND peticiones por segundo.
+  3. holded_invoice_id/holded_doc_number se guardan cada
+     HOLDED_INVOICE_COMMIT_EVERY documentos.
+
+Idempotencia: solo se procesan pedidos sin holded_invoice_id y, antes de
+crear nada, se buscan en Holded los documentos del periodo cuyas notas
+mencionan el pedido ("pedido web #<número>"): si el proceso se cortó entre
+crear el documento y guardarlo en la DB, la siguiente ejecución lo adopta en
+lugar de duplicarlo. Dos facturaciones a la vez (lotes o un pedido suelto)
+se excluyen con un advisory lock (PostgreSQL) o un lock del proceso (SQLite).
+
+Los PDF de los documentos creados se precargan en la caché en disco
+(pdf_cache.prefetch) para que la primera descarga ya no vaya a Holded.
+
+Cierre de mes: flask --app src.main invoice-orders --month 2026-09
+"""
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import requests
+from sqlalchemy import func, or_, text
+
+from src.models.order import Order
+from src.models.user import db
+from src.services.holded_service import (
+    HEADERS,
+    HOLDED_BASE_URL,
+    holded_create_contact,
+    holded_create_invoice,
+    holded_create_salesreceipt,
+    holded_get_contacts,
+    holded_update_contact,
+)
+from src.services.order_lines import holded_document_items
+from src.services.pdf_cache import prefetch
+
+CONCURRENCY = int(os.getenv('HOLDED_INVOICE_CONCURRENCY', '4'))
+RATE_PER_SECOND = float(os.getenv('HOLDED_RATE_PER_SECOND', '5'))
+COMMIT_EVERY = int(os.getenv('HOLDED_INVOICE_COMMIT_EVERY', '20'))
+
+# Pedidos que se facturan: cobrados y no cancelados
+BILLABLE_PAYMENT_STATUSES = ('paid', 'partially_refunded')
+
+# Clave arbitraria (fija) del advisory lock de facturación
+INVOICING_LOCK_KEY = 7422049
+
+_NOTES_ORDER_RE = re.compile(r'pedido web #(\S+)')
+_local_lock = threading.Lock()
+
+
+class InvoicingBusy(Exception):
+    """Ya hay una facturación en curso."""
+
+
+class RateLimiter:
+    """Como mucho `rate` llamadas por segundo entre todos los threads."""
+
+    def __init__(self, rate):
+        self._interval = 1.0 / rate if rate > 0 else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self._interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# ============================================================
+# DATOS DEL DOCUMENTO
+# ============================================================
+
+def document_type(order):
+    """'invoice' (F) si el cliente pide factura con NIF, si no 'salesreceipt' (T)."""
+    return 'invoice' if (order.needs_invoice and order.fiscal_nif) else 'salesreceipt'
+
+
+def document_notes(order, doc_type):
+    # El número de pedido en las notas permite encontrar el documento en Holded (idempotencia)
+    if doc_type == 'invoice':
+        return f'Factura pedido web #{order.order_number} | NIF: {order.fiscal_nif}'
+    return f'Ticket pedido web #{order.order_number}'
+
+
+def contact_data(order):
+    """(nombre, dirección) del contacto: razón social y dirección fiscal si pide factura."""
+    name = order.fiscal_name if (order.needs_invoice and order.fiscal_name) else order.customer_name
+    if order.needs_invoice and order.fiscal_address:
+        address_data = {
+            'address': order.fiscal_address,
+            'city': order.fiscal_city or order.shipping_city or '',
+            'postal_code': order.fiscal_postal_code or order.shipping_postal_code or '',
+            'country': 'España'
+        }
+    else:
+        address_data = {
+            'address': order.shipping_address or '',
+            'city': order.shipping_city or '',
+            'postal_code': order.shipping_postal_code or '',
+            'country': order.shipping_country or 'España'
+        }
+    return name, address_data
+
+
+def _doc_number(data):
+    return data.get('docNumber', '') or data.get('invoiceNum', '') or data.get('num', '')
+
+
+def fetch_doc_number(doc_type, doc_id):
+    """docNumber de un documento (la respuesta del alta no siempre lo incluye)."""
+    try:
+        response = requests.get(f'{HOLDED_BASE_URL}/documents/{doc_type}/{doc_id}', headers=HEADERS, timeout=10)
+        if response.status_code == 200:
+            return _doc_number(response.json())
+    except Exception as e:
+        print(f"[Holded] No se pudo obtener docNumber de {doc_id}: {e}")
+    return ''
+
+
+def create_document(doc_type, contact_id, items, notes, limiter=None):
+    """
+    Crea la factura o el ticket en Holded.
+
+    Returns:
+        (True, doc_id, doc_number) o (False, None, error)
+    """
+    create = holded_create_invoice if doc_type == 'invoice' else holded_create_salesreceipt
+    if limiter:
+        limiter.wait()
+    success, result = create(contact_id=contact_id, items=items, notes=notes)
+    if not success:
+        return False, None, result
+    doc_id = result.get('id', '')
+    doc_number = _doc_number(result)
+    if not doc_number and doc_id:
+        if limiter:
+            limiter.wait()
+        doc_number = fetch_doc_number(doc_type, doc_id)
+    return True, doc_id, doc_number
+
+
+# ============================================================
+# CONTACTOS
+# ============================================================
+
+class ContactIndex:
+    """Contactos de Holded por email y por nombre, con una sola descarga."""
+
+    def __init__(self, contacts):
+        self.by_email, self.by_name = {}, {}
+        for contact in contacts or []:
+            self._add(contact)
+
+    def _add(self, contact):
+        email = (contact.get('email') or '').strip().lower()
+        name = (contact.get('name') or '').strip().lower()
+        if email:
+            self.by_email.setdefault(email, contact)
+        if name:
+            self.by_name.setdefault(name, contact)
+
+    def find(self, email, name):
+        """Mismo criterio que holded_get_or_create_contact: primero email, después nombre."""
+        contact = self.by_email.get((email or '').strip().lower())
+        if contact is None and name:
+            contact = self.by_name.get(name.strip().lower())
+        return contact
+
+    def resolve(self, email, name, phone='', address_data=None, vatnumber=None, limiter=None):
+        """
+        ID del contacto, actualizándolo (un solo PUT, NIF incluido) o creándolo.
+        No es thread-safe para un mismo cliente: invoice_orders() agrupa los pedidos por cliente.
+        """
+        update_data = {'email': email, 'phone': phone, 'vatnumber': vatnumber}
+        if address_data:
+            update_data.update({
+                'address': address_data.get('address', ''),
+                'city': address_data.get('city', ''),
+                'postal_code': address_data.get('postal_code', ''),
+                'country': address_data.get('country', 'España'),
+            })
+
+        existing = self.find(email, name)
+        if existing:
+            if limiter:
+                limiter.wait()
+            holded_update_contact(existing['id'], update_data)
+            return existing['id']
+
+        data = {'name': name, 'email': email, 'phone': phone}
+        if address_data:
+            data.update(address_data)
+        if limiter:
+            limiter.wait()
+        created = holded_create_contact(data)
+        if not created or not created.get('id'):
+            return None
+        if vatnumber:
+            if limiter:
+                limiter.wait()
+            holded_update_contact(created['id'], {'vatnumber': vatnumber})
+        self._add({'id': created['id'], 'email': email, 'name': name})
+        return created['id']
+
+
+# ============================================================
+# UN PEDIDO
+# ============================================================
+
+def create_order_document(order):
+    """
+    Crea la factura/ticket de un pedido y guarda la referencia (commit). Si el
+    documento ya existe en Holded (notas "pedido web #<número>") lo adopta.
+
+    Returns:
+        (True, {'doc_type', 'doc_number', 'holded_id', 'adopted'}) o (False, mensaje de error)
+    Raises:
+        InvoicingBusy si hay otra facturación en curso.
+    """
+    with _InvoicingLock():
+        # Dentro del lock: otra petición puede haberlo facturado mientras tanto
+        db.session.refresh(order)
+        if order.holded_invoice_id:
+            return True, {'doc_type': document_type(order), 'doc_number': order.holded_doc_number,
+                          'holded_id': order.holded_invoice_id, 'adopted': True}
+
+        since = (order.paid_at or order.created_at or datetime.now()) - timedelta(days=1)
+        existing = _existing_documents(since, RateLimiter(RATE_PER_SECOND)).get(order.order_number)
+        if existing:
+            doc_type, doc_id, doc_number = existing
+            print(f"[Holded] Pedido {order.order_number}: {doc_type} {doc_number} ya existía, se adopta")
+            return _save_document(order, doc_type, doc_id, doc_number, adopted=True)
+        return _create_order_document(order)
+
+
+def _create_order_document(order):
+    from src.services.holded_service import holded_get_or_create_contact
+
+    doc_type = document_type(order)
+    name, address_data = contact_data(order)
+    contact_id = holded_get_or_create_contact(
+        email=order.customer_email,
+        name=name,
+        phone=order.customer_phone or '',
+        address_data=address_data
+    )
+    if not contact_id:
+        return False, 'No se pudo crear/encontrar el contacto en Holded'
+    if doc_type == 'invoice':
+        # No bloquear si falla actualizar el NIF
+        holded_update_contact(contact_id, {'vatnumber': order.fiscal_nif})
+
+    success, doc_id, doc_number = create_document(
+        doc_type, contact_id, holded_document_items(order), document_notes(order, doc_type)
+    )
+    if not success:
+        label = 'factura' if doc_type == 'invoice' else 'ticket'
+        return False, f'Error creando {label} en Holded: {doc_number}'
+    return _save_document(order, doc_type, doc_id, doc_number)
+
+
+def _save_document(order, doc_type, doc_id, doc_number, adopted=False):
+    order.holded_invoice_id = doc_id
+    order.holded_doc_number = doc_number
+    try:
+        db.session.commit()
+        print(f"✅ Order {order.order_number} - {doc_type} {'adopted' if adopted else 'created'} in Holded: {doc_number}")
+    except Exception as db_err:
+        db.session.rollback()
+        print(f"⚠️ Error saving holded ref to DB: {db_err}")
+    prefetch([(doc_type, doc_id)])
+    return True, {'doc_type': doc_type, 'doc_number': doc_number, 'holded_id': doc_id, 'adopted': adopted}
+
+
+# ============================================================
+# LOTES
+# ============================================================
+
+def pending_orders_query(order_ids=None, month=None, date_from=None, date_to=None):
+    """
+    Pedidos cobrados, no cancelados y sin documento en Holded.
+
+    Args:
+        order_ids: lista de ids de pedido (opcional)
+        month: 'YYYY-MM' por fecha de cobro (o de creación si no hay)
+        date_from/date_to: datetime, [date_from, date_to)
+    """
+    paid_on = func.coalesce(Order.paid_at, Order.created_at)
+    query = Order.query.filter(
+        or_(Order.holded_invoice_id.is_(None), Order.holded_invoice_id == ''),
+        Order.payment_status.in_(BILLABLE_PAYMENT_STATUSES),
+        or_(Order.order_status.is_(None), Order.order_status != 'cancelled'),
+    )
+    if order_ids is not None:
+        query = query.filter(Order.id.in_(order_ids))
+    if month:
+        start = datetime.strptime(month, '%Y-%m')
+        date_from = start
+        date_to = (start + timedelta(days=32)).replace(day=1)
+    if date_from:
+        query = query.filter(paid_on >= date_from)
+    if date_to:
+        query = query.filter(paid_on < date_to)
+    return query.order_by(paid_on, Order.id)
+
+
+def _existing_documents(since, limiter):
+    """{order_number: (doc_type, doc_id, doc_number)} de los documentos de Holded desde `since`."""
+    params = {'starttmp': int(since.timestamp()), 'endtmp': int(datetime.now().timestamp()) + 86400}
+    found = {}
+    for doc_type in ('invoice', 'salesreceipt'):
+        limiter.wait()
+        response = requests.get(
+            f'{HOLDED_BASE_URL}/documents/{doc_type}', headers=HEADERS, params=params, timeout=30
+        )
+        if response.status_code != 200:
+            # Sin esta lista no se puede garantizar que no haya duplicados
+            raise RuntimeError(f'Holded no ha devuelto los documentos {doc_type}: HTTP {response.status_code}')
+        for doc in response.json():
+            match = _NOTES_ORDER_RE.search(doc.get('notes') or doc.get('desc') or '')
+            if match:
+                found.setdefault(match.group(1), (doc_type, doc.get('id'), _doc_number(doc)))
+    return found
+
+
+class _InvoicingLock:
+    """Excluye dos facturaciones a la vez (en todos los workers si hay PostgreSQL)."""
+
+    def __enter__(self):
+        if not _local_lock.acquire(blocking=False):
+            raise InvoicingBusy('Ya hay una facturación en curso')
+        self._conn = None
+        if db.engine.dialect.name == 'postgresql':
+            self._conn = db.engine.connect()
+            locked = self._conn.execute(
+                text('SELECT pg_try_advisory_lock(:key)'), {'key': INVOICING_LOCK_KEY}
+            ).scalar()
+            if not locked:
+                self._conn.close()
+                _local_lock.release()
+                raise InvoicingBusy('Ya hay una facturación en curso')
+        return self
+
+    def __exit__(self, *exc):
+        if self._conn is not None:
+            self._conn.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': INVOICING_LOCK_KEY})
+            self._conn.close()
+        _local_lock.release()
+
+
+def _contact_key(order):
+    return (order.customer_email or '').strip().lower() or (contact_data(order)[0] or '').strip().lower()
+
+
+def invoice_orders(orders, time_budget=None, dry_run=False):
+    """
+    Crea en Holded las facturas/tickets de `orders` (ver pending_orders_query).
+
+    Args:
+        time_budget: segundos; al agotarse no se empiezan más pedidos (quedan
+            en 'remaining' para la siguiente ejecución). None = sin límite.
+        dry_run: solo devuelve lo que se haría, sin llamar a Holded.
+    Returns:
+        dict con created, adopted, failed, remaining, documents y errors.
+    Raises:
+        InvoicingBusy si ya hay otra ejecución en curso.
+    """
+    orders = [o for o in orders if not o.holded_invoice_id]
+    summary = {'total': len(orders), 'created': 0, 'adopted': 0, 'failed': 0, 'remaining': 0,
+               'documents': [], 'errors': []}
+    if dry_run:
+        summary['documents'] = [
+            {'order_id': o.id, 'order_number': o.order_number, 'doc_type': document_type(o)} for o in orders
+        ]
+        return summary
+    if not orders:
+        return summary
+
+    with _InvoicingLock():
+        started = time.monotonic()
+        limiter = RateLimiter(RATE_PER_SECOND)
+
+        # Dentro del lock: otra ejecución puede haber facturado mientras esperábamos
+        db.session.expire_all()
+        orders = [o for o in orders if not o.holded_invoice_id]
+        by_id = {o.id: o for o in orders}
+        pending_commit = 0
+
+        def record(order, doc_type, doc_id, doc_number, adopted=False):
+            nonlocal pending_commit
+            order.holded_invoice_id = doc_id
+            order.holded_doc_number = doc_number
+            summary['adopted' if adopted else 'created'] += 1
+            summary['documents'].append({
+                'order_id': order.id, 'order_number': order.order_number, 'doc_type': doc_type,
+                'doc_number': doc_number, 'holded_id': doc_id, 'adopted': adopted
+            })
+            pending_commit += 1
+            if pending_commit >= COMMIT_EVERY:
+                db.session.commit()
+                pending_commit = 0
+
+        # 1. Documentos que ya existen en Holded (ejecución anterior interrumpida)
+        since = min(o.paid_at or o.created_at or datetime.now() for o in orders) - timedelta(days=1)
+        existing = _existing_documents(since, limiter)
+        jobs = {}  # {clave de contacto: [pedidos]}
+        for order in orders:
+            if order.order_number in existing:
+                doc_type, doc_id, doc_number = existing[order.order_number]
+                record(order, doc_type, doc_id, doc_number, adopted=True)
+            else:
+                jobs.setdefault(_contact_key(order), []).append(order)
+
+        # 2. Datos de cada cliente calculados aquí: los threads no tocan la sesión de la DB
+        index = ContactIndex(holded_get_contacts(use_cache=False))
+        tasks = []
+        for group in jobs.values():
+            latest = group[-1]
+            name, address_data = contact_data(latest)
+            nif = next((o.fiscal_nif for o in reversed(group) if document_type(o) == 'invoice'), None)
+            contact = {
+                'email': latest.customer_email, 'name': name, 'phone': latest.customer_phone or '',
+                'address_data': address_data, 'vatnumber': nif,
+            }
+            documents = [{
+                'order_id': o.id,
+                'doc_type': document_type(o),
+                'items': holded_document_items(o),
+                'notes': document_notes(o, document_type(o)),
+            } for o in group]
+            tasks.append((contact, documents))
+
+        def run(task):
+            """Contacto y documentos de un cliente, en orden. [(order_id, doc_type, ok, doc_id, número/error)]"""
+            contact, documents = task
+            if time_budget is not None and time.monotonic() - started > time_budget:
+                return [(d['order_id'], d['doc_type'], None, None, None) for d in documents]
+            contact_id = index.resolve(limiter=limiter, **contact)
+            results = []
+            for document in documents:
+                if not contact_id:
+                    results.append((document['order_id'], document['doc_type'], False, None,
+                                    'No se pudo crear/encontrar el contacto en Holded'))
+                    continue
+                ok, doc_id, detail = create_document(
+                    document['doc_type'], contact_id, document['items'], document['notes'], limiter
+                )
+                results.append((document['order_id'], document['doc_type'], ok, doc_id, detail))
+            return results
+
+        # 3. Altas en paralelo; la DB solo se toca en este thread
+        try:
+            if tasks:
+                with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+                    for future in as_completed([executor.submit(run, task) for task in tasks]):
+                        for order_id, doc_type, ok, doc_id, detail in future.result():
+                            order = by_id[order_id]
+                            if ok is None:
+                                summary['remaining'] += 1
+                            elif ok:
+                                record(order, doc_type, doc_id, detail)
+                            else:
+                                summary['failed'] += 1
+                                summary['errors'].append({'order_number': order.order_number, 'error': str(detail)})
+        finally:
+            db.session.commit()
+            prefetch([(d['doc_type'], d['holded_id']) for d in summary['documents']])
+
+    print(f"[Holded] Facturación por lotes: {summary['created']} creados, {summary['adopted']} adoptados, "
+          f"{summary['failed']} con error, {summary['remaining']} pendientes")
+    return summary
@@ -5,6 +5,8 @@ Gestiona productos, contactos, pedidos de venta y facturación.
 import os
 import requests
 from datetime import datetime
+from src.services.cache import get_cache
+from src.services.cache_bus import publish
 
 HOLDED_API_KEY = os.environ.get('HOLDED_API_KEY', '5bd8629be1127486298dfd61cb296943')
 HOLDED_BASE_URL = 'https://api.holded.com/api/invoicing/v1'
@@ -14,17 +16,31 @@ HEADERS = {
     'Content-Type': 'application/json'
 }
 
+# Los listados completos de productos y contactos tardan varios segundos:
+# se cachean por worker y se invalidan (en todos los workers) cuando escribimos en Holded.
+HOLDED_PRODUCTS_CACHE = 'holded_products'
+HOLDED_CONTACTS_CACHE = 'holded_contacts'
+HOLDED_CACHE_TTL = 300
+
 
 # ============================================================
 # PRODUCTOS
 # ============================================================
 
-def holded_get_products():
-    """Obtiene todos los productos de Holded"""
+def holded_get_products(use_cache=True):
+    """Obtiene todos los productos de Holded (use_cache=False fuerza la descarga)"""
+    cache = get_cache(HOLDED_PRODUCTS_CACHE, HOLDED_CACHE_TTL)
+    if use_cache:
+        cached = cache.get('all')
+        if cached is not None:
+            return cached
+    generation = cache.generation('all')
     try:
         response = requests.get(f'{HOLDED_BASE_URL}/products', headers=HEADERS, timeout=15)
         if response.status_code == 200:
-            return response.json()
+            products = response.json()
+            cache.set('all', products, generation)
+            return products
         return []
     except Exception as e:
         print(f"[Holded] Error obteniendo productos: {e}")
@@ -52,6 +68,7 @@ def holded_update_product(product_id, data):
             json=data,
             timeout=10
         )
+        publish(HOLDED_PRODUCTS_CACHE)
         return response.status_code == 200, response.json() if response.status_code == 200 else response.text
     except Exception as e:
         print(f"[Holded] Error actualizando producto {product_id}: {e}")
@@ -62,12 +79,20 @@ def holded_update_product(product_id, data):
 # CONTACTOS
 # ============================================================
 
-def holded_get_contacts():
-    """Obtiene todos los contactos de Holded"""
+def holded_get_contacts(use_cache=True):
+    """Obtiene todos los contactos de Holded (use_cache=False fuerza la descarga)"""
+    cache = get_cache(HOLDED_CONTACTS_CACHE, HOLDED_CACHE_TTL)
+    if use_cache:
+        cached = cache.get('all')
+        if cached is not None:
+            return cached
+    generation = cache.generation('all')
     try:
         response = requests.get(f'{HOLDED_BASE_URL}/contacts', headers=HEADERS, timeout=15)
         if response.status_code == 200:
-            return response.json()
+            contacts = response.json()
+            cache.set('all', contacts, generation)
+            return contacts
         return []
     except Exception as e:
         print(f"[Holded] Error obteniendo contactos: {e}")
@@ -134,6 +159,7 @@ def holded_update_contact(contact_id, data):
             json=update_payload,
             timeout=10
         )
+        publish(HOLDED_CONTACTS_CACHE)
         if response.status_code in [200, 201]:
             print(f"[Holded] Contacto {contact_id} actualizado con: {list(update_payload.keys())}")
             return True
@@ -171,6 +197,7 @@ def holded_create_contact(data):
             json=contact_payload,
             timeout=10
         )
+        publish(HOLDED_CONTACTS_CACHE)
         if response.status_code in [200, 201]:
             return response.json()
         print(f"[Holded] Error creando contacto: {response.status_code} - {response.text}")
@@ -318,20 +345,43 @@ def holded_create_salesreceipt(contact_id, items, notes=''):
         return False, str(e)
 
 
-def holded_get_invoice_pdf(document_id):
-    """Obtiene el PDF de una factura de Holded"""
+def holded_download_document_pdf(doc_type, doc_id, fileobj):
+    """
+    Descarga el PDF de un documento de Holded (invoice, salesreceipt...) en `fileobj`
+    por bloques, sin cargarlo entero en memoria. Devuelve True si se ha escrito un PDF.
+    """
     try:
-        response = requests.get(
-            f'{HOLDED_BASE_URL}/documents/invoice/{document_id}/pdf',
+        with requests.get(
+            f'{HOLDED_BASE_URL}/documents/{doc_type}/{doc_id}/pdf',
             headers=HEADERS,
-            timeout=15
-        )
-        if response.status_code == 200:
-            return response.content  # bytes del PDF
-        return None
+            timeout=30,
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                print(f"[Holded] Error obteniendo PDF {doc_type} {doc_id}: {response.status_code}")
+                return False
+            if 'json' in response.headers.get('Content-Type', ''):
+                # La API v1 puede devolver {"status": 1, "data": "<PDF en base64>"}
+                import base64
+                data = response.json().get('data') or ''
+                fileobj.write(base64.b64decode(data))
+                return bool(data)
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                fileobj.write(chunk)
+            return True
     except Exception as e:
-        print(f"[Holded] Error obteniendo PDF factura {document_id}: {e}")
+        print(f"[Holded] Error obteniendo PDF {doc_type} {doc_id}: {e}")
+        return False
+
+
+def holded_get_invoice_pdf(document_id):
+    """Obtiene el PDF de una factura de Holded (bytes), a través de la caché en disco"""
+    from src.services.pdf_cache import open_pdf
+    fileobj = open_pdf('invoice', document_id)
+    if not fileobj:
         return None
+    with fileobj:
+        return fileobj.read()
 
 
 def holded_send_document_email(doc_type, doc_id, emails, subject=None, message=None):
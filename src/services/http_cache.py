@@ -0,0 +1,114 @@
+"""
+Caché de respuestas HTTP para endpoints públicos de solo lectura.
+
+cached_response()/cached_json() guardan en una caché en memoria (ver
+cache.py) los bytes ya serializados de la respuesta junto con su ETag, y
+responden con:
+
+- 304 si el If-None-Match del cliente coincide con el ETag.
+- Cache-Control público (navegador: max_age; CDN: s_maxage y
+  stale-while-revalidate) para que el CDN absorba los picos de tráfico.
+- Surrogate-Key / Cache-Tag con las claves del contenido, para purgar en el
+  CDN solo lo que cambió: purge(keys) llama a los hooks registrados con
+  register_purge_hook(). Si CDN_PURGE_URL está definido se registra uno que
+  hace POST {"keys": [...]} a esa URL (con CDN_PURGE_TOKEN como Bearer).
+"""
+import hashlib
+import os
+import threading
+
+from flask import Response, current_app, request
+
+from src.services.cache import get_cache
+
+DEFAULT_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', '60'))
+DEFAULT_S_MAXAGE = int(os.getenv('HTTP_CACHE_S_MAXAGE', '300'))
+STALE_WHILE_REVALIDATE = int(os.getenv('HTTP_CACHE_STALE_WHILE_REVALIDATE', '600'))
+
+CDN_PURGE_URL = os.getenv('CDN_PURGE_URL', '')
+CDN_PURGE_TOKEN = os.getenv('CDN_PURGE_TOKEN', '')
+
+_purge_hooks = []
+
+
+def cache_control(max_age=DEFAULT_MAX_AGE, s_maxage=DEFAULT_S_MAXAGE):
+    return f'public, max-age={max_age}, s-maxage={s_maxage}, stale-while-revalidate={STALE_WHILE_REVALIDATE}'
+
+
+def cached_response(cache_name, key, build, mimetype, surrogate_keys=(), version='0', ttl=300,
+                    max_age=DEFAULT_MAX_AGE, s_maxage=DEFAULT_S_MAXAGE, store=True):
+    """
+    Devuelve la respuesta cacheada para `key` (o la construye con build()).
+
+    Args:
+        build: función que devuelve el cuerpo ya serializado (bytes) o None si no existe.
+        version: versión del contenido; forma parte del ETag (callable o valor).
+        store: False para variantes poco pedidas (páginas altas...): misma
+            respuesta y cabeceras, pero sin ocupar la caché del worker.
+    Returns:
+        Response (200 o 304), o None si build() devolvió None (el endpoint
+        decide el 404, que no se cachea).
+    """
+    cache = get_cache(cache_name, ttl)
+    entry = cache.get(key) if store else None
+    if entry is None:
+        generation = cache.generation(key)
+        data = build()
+        if data is None:
+            return None
+        current_version = version() if callable(version) else version
+        entry = {
+            'data': data,
+            'etag': f'{current_version}-{hashlib.sha1(data).hexdigest()[:16]}',
+        }
+        if store:
+            cache.set(key, entry, generation)
+
+    response = Response(entry['data'], mimetype=mimetype)
+    response.set_etag(entry['etag'])
+    response.headers['Cache-Control'] = cache_control(max_age, s_maxage)
+    if surrogate_keys:
+        keys = ' '.join(surrogate_keys)
+        response.headers['Surrogate-Key'] = keys
+        response.headers['Cache-Tag'] = keys.replace(' ', ',')
+    # 304 sin cuerpo si el cliente ya tiene esta versión
+    return response.make_conditional(request)
+
+
+def cached_json(cache_name, key, build, **kwargs):
+    """cached_response() para un build() que devuelve un dict (o None)."""
+    def build_bytes():
+        body = build()
+        return None if body is None else current_app.json.response(body).get_data()
+    return cached_response(cache_name, key, build_bytes, 'application/json', **kwargs)
+
+
+def register_purge_hook(hook):
+    """hook(keys) se llama tras cada cambio con las surrogate keys afectadas."""
+    _purge_hooks.append(hook)
+
+
+def purge(keys):
+    """Avisa a los hooks (CDN) de que el contenido con estas claves cambió."""
+    keys = sorted(set(keys))
+    for hook in _purge_hooks:
+        try:
+            hook(keys)
+        except Exception as e:
+            print(f"[HttpCache] Error en hook de purga: {e}")
+
+
+def _purge_cdn(keys):
+    def send():
+        import requests
+        headers = {'Authorization': f'Bearer {CDN_PURGE_TOKEN}'} if CDN_PURGE_TOKEN else {}
+        try:
+            requests.post(CDN_PURGE_URL, json={'keys': keys}, headers=headers, timeout=10)
+        except Exception as e:
+            print(f"[HttpCache] Error purgando CDN {keys}: {e}")
+    # Fuera del request: la purga no debe retrasar la respuesta del admin
+    threading.Thread(target=send, name='cdn-purge', daemon=True).start()
+
+
+if CDN_PURGE_URL:
+    register_purge_hook(_purge_cdn)
@@ -0,0 +1,212 @@
+"""
+Inventario local (inventory_levels + inventory_ledger).
+
+- record_sale(): el webhook de Stripe descuenta el pedido pagado (packs
+  desglosados con pack_bom) con un upsert atómico por SKU, en la misma
+  transacción que sus movimientos. Es idempotente por número de pedido.
+- release_order(): devuelve al stock lo vendido en un pedido reembolsado.
+- reconcile_from_holded(): Holded es la referencia. El stock local pasa a ser
+  el de Holded menos lo vendido en pedidos que aún no se han facturado en
+  Holded (holded_invoice_id vacío), que Holded todavía no ha descontado.
+  Se ejecuta con `flask --app src.main sync-stock` (cron) o desde el admin.
+  En PostgreSQL toma un advisory lock exclusivo antes de calcular lo
+  pendiente; las ventas y ajustes toman el mismo lock compartido, así
+  ninguna venta queda fuera de lo pendiente y a la vez sobrescrita.
+- available_stock(): {sku: unidades} con una sola lectura de inventory_levels,
+  para el snapshot del catálogo. Sin llamadas a Holded.
+"""
+from datetime import datetime
+
+from sqlalchemy import func, text
+from sqlalchemy.exc import IntegrityError
+
+from src.models.inventory import InventoryLevel, InventoryMovement
+from src.models.user import db
+from src.services.pack_bom import explode, get_bom
+
+# Clave arbitraria (fija) del advisory lock del inventario
+INVENTORY_LOCK_KEY = 7422046
+
+
+def _lock_inventory(shared=True):
+    """
+    Advisory lock de la transacción actual (PostgreSQL): ventas, devoluciones y
+    ajustes lo toman compartido (no se bloquean entre sí) y la reconciliación
+    exclusivo. Se libera con el commit/rollback.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        function = 'pg_advisory_xact_lock_shared' if shared else 'pg_advisory_xact_lock'
+        db.session.execute(text(f'SELECT {function}(:key)'), {'key': INVENTORY_LOCK_KEY})
+
+
+def _insert():
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(InventoryLevel.__table__)
+
+
+def _apply(sku, delta):
+    """Suma `delta` al stock de `sku` en una sola sentencia, creando la fila si no existe."""
+    _lock_inventory(shared=True)
+    table = InventoryLevel.__table__
+    now = datetime.utcnow()
+    stmt = _insert().values(sku=sku, on_hand=delta, updated_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['sku'],
+        set_={'on_hand': table.c.on_hand + delta, 'updated_at': now}
+    )
+    db.session.execute(stmt)
+
+
+def _set_level(sku, on_hand, holded_stock, now):
+    """Fija el stock de `sku` (upsert): no falla si otra transacción acaba de crear la fila."""
+    values = {'on_hand': on_hand, 'holded_stock': holded_stock, 'synced_at': now, 'updated_at': now}
+    stmt = _insert().values(sku=sku, **values)
+    db.session.execute(stmt.on_conflict_do_update(index_elements=['sku'], set_=values))
+
+
+def order_units(items):
+    """
+    {sku: unidades} que consume una lista de artículos de pedido (packs desglosados).
+    Los artículos sin 'sku' (pedidos antiguos) se resuelven con order_lines.
+    """
+    if any(not item.get('sku') for item in items or []):
+        from src.services.order_lines import resolve_items
+        items = resolve_items(items)
+
+    units = {}
+    for item in items or []:
+        sku = item.get('sku')
+        if not sku:
+            print(f"[Inventory] Artículo sin SKU conocido: {item.get('name')}")
+            continue
+        for leaf, quantity in explode(sku, int(item.get('quantity') or 1)).items():
+            units[leaf] = units.get(leaf, 0) + quantity
+    return units
+
+
+def _record_order(order_number, units, reason):
+    try:
+        for sku, delta in units.items():
+            _apply(sku, delta)
+            db.session.add(InventoryMovement(sku=sku, delta=delta, reason=reason, order_number=order_number))
+        db.session.commit()
+    except IntegrityError:
+        # Otro worker ha procesado el mismo pedido a la vez (índice único del libro)
+        db.session.rollback()
+        return False
+
+    from src.services.catalog_cache import invalidate_catalog
+    invalidate_catalog()
+    return True
+
+
+def record_sale(order_number, items):
+    """
+    Descuenta del stock los artículos de un pedido pagado.
+
+    Returns:
+        False si el pedido ya estaba descontado (reintento del webhook).
+    """
+    if InventoryMovement.query.filter_by(order_number=order_number, reason='sale').first():
+        return False
+    units = {sku: -quantity for sku, quantity in order_units(items).items()}
+    if not units:
+        return False
+    recorded = _record_order(order_number, units, 'sale')
+    if recorded:
+        print(f"[Inventory] Pedido {order_number}: {units}")
+    return recorded
+
+
+def release_order(order_number):
+    """Devuelve al stock lo descontado por un pedido (reembolso o cancelación)."""
+    if InventoryMovement.query.filter_by(order_number=order_number, reason='release').first():
+        return False
+    sales = InventoryMovement.query.filter_by(order_number=order_number, reason='sale').all()
+    if not sales:
+        return False
+    return _record_order(order_number, {m.sku: -m.delta for m in sales}, 'release')
+
+
+def adjust(sku, delta, reason='manual'):
+    """Ajuste manual del stock de un SKU."""
+    _apply(sku, delta)
+    db.session.add(InventoryMovement(sku=sku, delta=delta, reason=reason))
+    db.session.commit()
+
+    from src.services.catalog_cache import invalidate_catalog
+    invalidate_catalog()
+
+
+def pending_units():
+    """{sku: unidades} vendidas en pedidos que Holded aún no ha descontado (sin factura en Holded)."""
+    from src.models.order import Order
+
+    rows = (
+        db.session.query(InventoryMovement.sku, func.sum(InventoryMovement.delta))
+        .join(Order, Order.order_number == InventoryMovement.order_number)
+        .filter(InventoryMovement.reason.in_(('sale', 'release')), Order.holded_invoice_id.is_(None))
+        .group_by(InventoryMovement.sku)
+    )
+    return {sku: -int(total or 0) for sku, total in rows if total}
+
+
+def reconcile_from_holded(holded_products=None):
+    """
+    Alinea inventory_levels con el stock de Holded (productos con hasStock).
+
+    Returns:
+        {'skus': n, 'adjusted': n} o None si Holded no ha devuelto productos.
+    """
+    if holded_products is None:
+        from src.services.holded_service import holded_get_products
+        holded_products = holded_get_products(use_cache=False)
+    if not holded_products:
+        return None
+
+    # Primero el lock y después lo pendiente: una venta confirmada antes cuenta
+    # como pendiente y una posterior espera y se aplica sobre el nuevo stock
+    _lock_inventory(shared=False)
+    pending = pending_units()
+    current = dict(db.session.query(InventoryLevel.sku, InventoryLevel.on_hand))
+    now = datetime.utcnow()
+    synced = adjusted = 0
+    for product in holded_products:
+        sku = product.get('sku')
+        if not sku or not product.get('hasStock'):
+            continue
+        holded_stock = int(product.get('stock') or 0)
+        target = holded_stock - pending.get(sku, 0)
+        on_hand = current.get(sku, 0)
+        if target != on_hand:
+            db.session.add(InventoryMovement(sku=sku, delta=target - on_hand, reason='reconcile'))
+            adjusted += 1
+        _set_level(sku, target, holded_stock, now)
+        synced += 1
+    db.session.commit()
+
+    if adjusted:
+        from src.services.catalog_cache import invalidate_catalog
+        invalidate_catalog()
+    print(f"[Inventory] Reconciliado con Holded: {synced} SKUs, {adjusted} ajustados")
+    return {'skus': synced, 'adjusted': adjusted}
+
+
+def available_stock():
+    """
+    {sku: unidades disponibles} para el catálogo, con una sola consulta.
+    Un pack vale lo que su componente más escaso; los SKUs sin fila no aparecen.
+    """
+    levels = dict(db.session.query(InventoryLevel.sku, InventoryLevel.on_hand))
+    if not levels:
+        return {}
+    available = {sku: max(on_hand, 0) for sku, on_hand in levels.items()}
+    bom = get_bom()
+    for pack_sku in bom:
+        units = explode(pack_sku, bom=bom)
+        if units != {pack_sku: 1} and all(sku in available for sku in units):
+            available[pack_sku] = min(available[sku] // quantity for sku, quantity in units.items())
+    return available
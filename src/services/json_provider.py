@@ -0,0 +1,81 @@
+"""
+Proveedor JSON de la app (app.json): orjson si está instalado, stdlib si no.
+
+- Las fechas (datetime/date) se serializan en ISO 8601 en ambos casos, así
+  los to_dict() de los modelos pueden devolverlas tal cual (el proveedor por
+  defecto de Flask las convertiría a fecha HTTP).
+- Mismo comportamiento que el proveedor de Flask: claves ordenadas
+  (sort_keys), claves no-string (p.ej. rating_distribution {1: ..}) como
+  texto e indentación en modo debug.
+- UTF-8 sin escapar (ensure_ascii=False) también con la stdlib, como orjson:
+  los bytes de la respuesta (y su ETag) no dependen de si orjson está instalado.
+- Si orjson no puede con un objeto (enteros de más de 64 bits, tipos
+  raros) se reintenta con la stdlib.
+
+Benchmark: python bench_json.py
+"""
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson se usa json de la stdlib
+    orjson = None
+
+
+def _default(o):
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    default = staticmethod(_default)
+    ensure_ascii = False
+
+    def _orjson_options(self, indent=False):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def _dump_bytes(self, obj, indent=False):
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._orjson_options(indent))
+            except (TypeError, orjson.JSONEncodeError):
+                pass
+        return json.dumps(
+            obj, default=self.default, ensure_ascii=self.ensure_ascii, sort_keys=self.sort_keys,
+            indent=2 if indent else None, separators=None if indent else (',', ':'),
+        ).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        # Con opciones explícitas (cls, indent...) se respeta la ruta de la stdlib
+        if kwargs:
+            kwargs.setdefault('default', self.default)
+            return super().dumps(obj, **kwargs)
+        return self._dump_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self._dump_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
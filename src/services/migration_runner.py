@@ -0,0 +1,129 @@
+"""
+Runner de migraciones versionadas.
+
+Sustituye a los ALTER/seeds que se ejecutaban en el primer request de cada
+worker. Las migraciones viven en migrations/versions/ con el formato
+NNNN_descripcion.sql o NNNN_descripcion.py (este último con una función
+upgrade(conn) que recibe una conexión SQLAlchemy dentro de la transacción).
+
+- La tabla schema_version guarda qué versiones se han aplicado.
+- Cada migración se aplica en su propia transacción junto con su fila en
+  schema_version: si falla, no queda a medias ni marcada como aplicada.
+- En PostgreSQL se toma un advisory lock para que dos despliegues (o dos
+  réplicas) no apliquen migraciones a la vez.
+
+Uso: flask --app src.main migrate [--status]
+"""
+import importlib.util
+import os
+import re
+
+from sqlalchemy import inspect, text
+
+MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'migrations', 'versions'
+)
+
+# Clave arbitraria (fija) del advisory lock de migraciones
+MIGRATION_LOCK_KEY = 4827150019
+
+_FILENAME_RE = re.compile(r'^(\d{4})_([a-z0-9_]+)\.(sql|py)$')
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """Devuelve [(version, name, path)] ordenado por versión."""
+    migrations = []
+    seen = {}
+    for filename in os.listdir(directory):
+        match = _FILENAME_RE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in seen:
+            raise RuntimeError(f"Versión de migración duplicada {version}: {seen[version]} y {filename}")
+        seen[version] = filename
+        migrations.append((version, match.group(2), os.path.join(directory, filename)))
+    return sorted(migrations)
+
+
+def column_exists(conn, table, column):
+    """Para migraciones .py: ADD COLUMN IF NOT EXISTS no existe en SQLite."""
+    return column in {c['name'] for c in inspect(conn).get_columns(table)}
+
+
+def _split_sql(sql):
+    """Separa un fichero .sql en sentencias (ignora comentarios de línea)."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [stmt.strip() for stmt in '\n'.join(lines).split(';') if stmt.strip()]
+
+
+def _apply(conn, path):
+    if path.endswith('.sql'):
+        with open(path, encoding='utf-8') as f:
+            for statement in _split_sql(f.read()):
+                conn.execute(text(statement))
+        return
+
+    spec = importlib.util.spec_from_file_location(f"migration_{os.path.basename(path)[:-3]}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.upgrade(conn)
+
+
+def _ensure_version_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE IF NOT EXISTS schema_version ('
+            'version INTEGER PRIMARY KEY, '
+            'name VARCHAR(200) NOT NULL, '
+            'applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)'
+        ))
+
+
+def applied_versions(engine):
+    _ensure_version_table(engine)
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(text('SELECT version FROM schema_version'))}
+
+
+def pending_migrations(engine):
+    applied = applied_versions(engine)
+    return [m for m in discover_migrations() if m[0] not in applied]
+
+
+def run_migrations(engine):
+    """
+    Aplica las migraciones pendientes en orden.
+
+    Returns:
+        Lista de versiones aplicadas en esta ejecución.
+    """
+    is_postgres = engine.dialect.name == 'postgresql'
+    applied_now = []
+
+    with engine.connect() as lock_conn:
+        if is_postgres:
+            lock_conn.execute(text('SELECT pg_advisory_lock(:key)'), {'key': MIGRATION_LOCK_KEY})
+            lock_conn.commit()
+        try:
+            # Recalcular dentro del lock: otro proceso puede haber migrado mientras esperábamos
+            for version, name, path in pending_migrations(engine):
+                print(f"[Migrations] Aplicando {version:04d}_{name}...")
+                with engine.begin() as conn:
+                    _apply(conn, path)
+                    conn.execute(
+                        text('INSERT INTO schema_version (version, name) VALUES (:v, :n)'),
+                        {'v': version, 'n': name}
+                    )
+                applied_now.append(version)
+        finally:
+            if is_postgres:
+                lock_conn.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': MIGRATION_LOCK_KEY})
+                lock_conn.commit()
+
+    if applied_now:
+        print(f"[Migrations] {len(applied_now)} migraciones aplicadas")
+    else:
+        print("[Migrations] Esquema al día")
+    return applied_now
@@ -0,0 +1,133 @@
+"""
+Líneas de pedido resueltas: producto, SKU e IVA de cada artículo.
+
+El checkout guarda product_id, sku y tax_rate en los metadatos del producto
+de Stripe; el webhook los lee y set_order_lines() completa lo que falte
+(pedidos antiguos, artículos sin metadatos) con una sola consulta a
+web_products: por id, por SKU y, en último caso, por nombre.
+
+La facturación en Holded (holded_document_items) y el inventario trabajan
+sobre estas líneas, sin adivinar por el nombre del artículo.
+"""
+import json
+
+from sqlalchemy.orm import load_only
+
+from src.models.order import OrderLine
+from src.services.tax_rates import holded_tax_id, net_price, rate_for
+
+
+def build_product_index(products):
+    """(por id, por SKU, por nombre) de objetos con id, sku, name, name_en y category."""
+    by_id, by_sku, by_name = {}, {}, {}
+    for product in products:
+        by_id[product.id] = product
+        if product.sku:
+            by_sku[product.sku] = product
+        for name in (product.name, product.name_en):
+            if name:
+                by_name.setdefault(name.strip().lower(), product)
+    return by_id, by_sku, by_name
+
+
+def _product_index():
+    from src.models.web_product import WebProduct
+
+    columns = (WebProduct.id, WebProduct.sku, WebProduct.name, WebProduct.name_en, WebProduct.category)
+    return build_product_index(WebProduct.query.options(load_only(*columns)))
+
+
+def _parse_items(items):
+    if isinstance(items, str):
+        items = json.loads(items)
+    return [item for item in items or [] if isinstance(item, dict)]
+
+
+def resolve_items(items, index=None):
+    """
+    Artículos de pedido ({name, quantity, price, ...}) con product_id, sku y
+    tax_rate resueltos. Los valores que ya trae el artículo tienen prioridad.
+    index: build_product_index() ya construido (si no, se consulta web_products).
+    """
+    items = _parse_items(items)
+    if not items:
+        return []
+    by_id, by_sku, by_name = index or _product_index()
+
+    resolved = []
+    for item in items:
+        product = None
+        try:
+            product_id = int(item['product_id']) if item.get('product_id') not in (None, '') else None
+        except (TypeError, ValueError):
+            product_id = None
+        if product_id is not None:
+            product = by_id.get(product_id)
+        if product is None and item.get('sku'):
+            product = by_sku.get(item['sku'])
+        if product is None:
+            product = by_name.get((item.get('name') or '').strip().lower())
+
+        sku = item.get('sku') or (product.sku if product else None)
+        tax_rate = item.get('tax_rate')
+        try:
+            tax_rate = float(tax_rate) if tax_rate not in (None, '') else None
+        except (TypeError, ValueError):
+            tax_rate = None
+        if tax_rate is None:
+            tax_rate = rate_for(sku, product.category if product else None, item.get('name'))
+
+        resolved.append({
+            **item,
+            'product_id': product.id if product else product_id,
+            'sku': sku,
+            'quantity': int(item.get('quantity') or 1),
+            'price': item.get('price', 0),
+            'tax_rate': tax_rate,
+        })
+    return resolved
+
+
+def set_order_lines(order, items):
+    """
+    Resuelve `items`, los guarda en order.items y sustituye order.lines (sin commit).
+
+    Returns:
+        Los artículos resueltos.
+    """
+    resolved = resolve_items(items)
+    order.items = resolved
+    order.lines = [
+        OrderLine(
+            position=position,
+            product_id=item['product_id'],
+            sku=item['sku'],
+            name=item.get('name') or item['sku'] or '',
+            quantity=item['quantity'],
+            unit_price=item['price'] or 0,
+            tax_rate=item['tax_rate'],
+        )
+        for position, item in enumerate(resolved)
+    ]
+    return resolved
+
+
+def order_line_dicts(order):
+    """Líneas del pedido: las guardadas o, en pedidos anteriores a order_lines, resueltas al vuelo."""
+    if order.lines:
+        return [line.to_dict() for line in order.lines]
+    return resolve_items(order.items)
+
+
+def holded_document_items(order):
+    """
+    Items para los documentos de Holded (pedido de venta, factura, ticket).
+    El precio de la línea es CON IVA (Stripe); Holded espera el unitario SIN IVA en 'subtotal'.
+    """
+    return [{
+        'name': line.get('name', ''),
+        'units': line.get('quantity', 1),
+        'subtotal': net_price(line.get('price', 0), line['tax_rate']),
+        'tax': holded_tax_id(line['tax_rate']),
+        'sku': line.get('sku') or ''
+    } for line in order_line_dicts(order)]
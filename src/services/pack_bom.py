@@ -0,0 +1,232 @@
+"""
+Composición (BOM) de los packs y coste de cada pack.
+
+La composición y los costes manuales viven en la DB (pack_components,
+component_costs) y se cargan en la caché PACK_BOM_CACHE; cualquier escritura
+pasa por set_pack_components()/set_component_cost(), que la invalidan en
+todos los workers (cache_bus). Nada se lee ni se escribe en ficheros.
+
+- explode(): unidades con stock propio que consume un pack (inventario).
+- pack_costs()/pack_breakdown(): coste de los packs a partir de los costes de
+  Holded y los manuales, resolviendo los packs anidados (MIKEST01 dentro de
+  MIKPACKTP). El resultado se memoriza por combinación de costes de Holded:
+  solo se recalcula si cambia la composición, un coste manual o un coste en
+  Holded.
+
+Los ciclos (un pack que acaba conteniéndose a sí mismo) se rechazan al
+guardar y, si aun así llegan a la DB, al resolver.
+"""
+import hashlib
+
+from src.models.pack_component import ComponentCost, PackComponent
+from src.models.user import db
+from src.services.cache import get_cache
+from src.services.cache_bus import publish
+
+PACK_BOM_CACHE = 'pack_bom'
+PACK_BOM_TTL = 3600
+
+
+def _load():
+    bom = {}
+    for row in PackComponent.query.order_by(PackComponent.pack_sku, PackComponent.position, PackComponent.id):
+        bom.setdefault(row.pack_sku, []).append(row.to_dict())
+    return {
+        'bom': bom,
+        'manual_costs': {row.component: row.cost or 0 for row in ComponentCost.query},
+    }
+
+
+def _state():
+    return get_cache(PACK_BOM_CACHE, PACK_BOM_TTL).get_or_load('bom', _load)
+
+
+def get_bom():
+    """{pack_sku: [componentes]} con componentes {'sku', 'name', 'quantity'} o {'id', ..., 'manual': True}."""
+    return _state()['bom']
+
+
+def get_manual_costs():
+    return _state()['manual_costs']
+
+
+def find_cycle(bom):
+    """Primer ciclo de la composición como lista de SKUs, o None."""
+    done = set()
+
+    def visit(sku, path):
+        if sku in path:
+            return list(path[path.index(sku):]) + [sku]
+        if sku in done or sku not in bom:
+            return None
+        for component in bom[sku]:
+            if component.get('sku') and not component.get('manual'):
+                cycle = visit(component['sku'], path + (sku,))
+                if cycle:
+                    return cycle
+        done.add(sku)
+        return None
+
+    for pack_sku in bom:
+        cycle = visit(pack_sku, ())
+        if cycle:
+            return cycle
+    return None
+
+
+def _cycle_error(path):
+    return ValueError(f"Ciclo en la composición de packs: {' -> '.join(path)}")
+
+
+def explode(sku, quantity=1, bom=None, _path=()):
+    """
+    Unidades de cada SKU con stock propio que consume `quantity` del producto `sku`.
+
+    Los componentes que son a su vez packs se resuelven recursivamente; los
+    manuales (sin SKU) no llevan stock. Un pack sin componentes con SKU es él
+    mismo la unidad de stock.
+    """
+    if bom is None:
+        bom = get_bom()
+    if sku in _path:
+        raise _cycle_error(_path + (sku,))
+    tracked = [c for c in bom.get(sku, []) if c.get('sku') and not c.get('manual')]
+    if not tracked:
+        return {sku: quantity}
+    units = {}
+    for component in tracked:
+        leaves = explode(component['sku'], quantity * component.get('quantity', 1), bom, _path + (sku,))
+        for leaf, leaf_quantity in leaves.items():
+            units[leaf] = units.get(leaf, 0) + leaf_quantity
+    return units
+
+
+def _rollup(bom, manual_costs, cost_by_sku):
+    """Coste y desglose de todos los packs (packs anidados incluidos)."""
+    totals = {}
+
+    def component_cost(component, path):
+        """(coste unitario, origen, editable) de un componente."""
+        if component.get('manual'):
+            return manual_costs.get(component.get('id', ''), 0), 'manual', True
+        sku = component.get('sku', '')
+        # Un componente que es un pack vale lo que sus componentes
+        if sku in bom and pack_total(sku, path) > 0:
+            return totals[sku], 'pack', False
+        # Si Holded tiene coste > 0, usarlo. Si no, buscar coste manual.
+        holded_cost = cost_by_sku.get(sku, 0)
+        if holded_cost > 0:
+            return holded_cost, 'holded', False
+        cost = manual_costs.get(sku, 0)
+        return cost, 'manual' if cost > 0 else 'sin_coste', True
+
+    def pack_total(pack_sku, path=()):
+        if pack_sku in totals:
+            return totals[pack_sku]
+        if pack_sku in path:
+            raise _cycle_error(path + (pack_sku,))
+        total = sum(
+            component_cost(c, path + (pack_sku,))[0] * c.get('quantity', 1) for c in bom[pack_sku]
+        )
+        totals[pack_sku] = round(total, 2)
+        return totals[pack_sku]
+
+    breakdown = {}
+    for pack_sku, components in bom.items():
+        detail = []
+        for component in components:
+            cost, source, editable = component_cost(component, (pack_sku,))
+            key = component.get('id') if component.get('manual') else component.get('sku')
+            item = {
+                'id': key,  # SKU o id manual: clave para guardar el coste manual
+                'name': component.get('name', ''),
+                'quantity': component.get('quantity', 1),
+                'cost': cost,
+                'source': source,
+                'editable': editable
+            }
+            if not component.get('manual'):
+                item['sku'] = key
+            detail.append(item)
+        breakdown[pack_sku] = {'components': detail, 'total_cost': pack_total(pack_sku)}
+    return {'totals': totals, 'breakdown': breakdown}
+
+
+def _costs(holded_products):
+    cost_by_sku = {}
+    for p in holded_products or []:
+        if p.get('sku'):
+            cost_by_sku[p['sku']] = p.get('cost', 0) or 0
+    fingerprint = hashlib.sha1(repr(sorted(cost_by_sku.items())).encode('utf-8')).hexdigest()
+    state = _state()
+    cache = get_cache(PACK_BOM_CACHE, PACK_BOM_TTL)
+    return cache.get_or_load(
+        ('costs', fingerprint), lambda: _rollup(state['bom'], state['manual_costs'], cost_by_sku)
+    )
+
+
+def pack_costs(holded_products):
+    """{pack_sku: coste} con los costes de Holded de `holded_products` y los manuales."""
+    return _costs(holded_products)['totals']
+
+
+def pack_breakdown(holded_products):
+    """{pack_sku: {'components': [...], 'total_cost'}} para el panel admin."""
+    return _costs(holded_products)['breakdown']
+
+
+def invalidate_bom():
+    """Descarta la composición y los costes memorizados en todos los workers."""
+    # La disponibilidad de los packs en el catálogo depende de su composición
+    from src.services.catalog_cache import CATALOG_CACHE
+    publish(PACK_BOM_CACHE, CATALOG_CACHE)
+
+
+def set_component_cost(component, cost):
+    """Guarda el coste manual de un componente (id manual o SKU sin coste en Holded)."""
+    row = db.session.get(ComponentCost, component)
+    if row is None:
+        row = ComponentCost(component=component)
+        db.session.add(row)
+    row.cost = cost
+    db.session.commit()
+    publish(PACK_BOM_CACHE)
+
+
+def set_pack_components(pack_sku, components):
+    """
+    Sustituye la composición de un pack.
+
+    Args:
+        components: [{'sku': ..., 'name', 'quantity'}] o [{'id': ..., 'name', 'quantity', 'manual': True}]
+    Raises:
+        ValueError si algún componente es inválido o la composición crea un ciclo.
+    """
+    rows, seen = [], set()
+    for position, component in enumerate(components):
+        manual = bool(component.get('manual'))
+        key = (component.get('id') if manual else component.get('sku')) or ''
+        key = key.strip()
+        quantity = int(component.get('quantity', 1))
+        if not key or quantity < 1:
+            raise ValueError('Cada componente necesita sku (o id si es manual) y cantidad >= 1')
+        if key in seen:
+            raise ValueError(f'Componente repetido: {key}')
+        seen.add(key)
+        rows.append(PackComponent(
+            pack_sku=pack_sku, component=key, name=component.get('name') or key,
+            quantity=quantity, manual=manual, position=position
+        ))
+
+    bom = dict(get_bom())
+    bom[pack_sku] = [row.to_dict() for row in rows]
+    if not rows:
+        bom.pop(pack_sku)
+    cycle = find_cycle(bom)
+    if cycle:
+        raise _cycle_error(cycle)
+
+    PackComponent.query.filter_by(pack_sku=pack_sku).delete()
+    db.session.add_all(rows)
+    db.session.commit()
+    invalidate_bom()
@@ -0,0 +1,216 @@
+"""
+Caché en disco de los PDF de facturas, tickets y abonos de Holded.
+
+Un documento emitido (CACHEABLE_TYPES) no cambia, así que su PDF se
+descarga una sola vez y se sirve desde disco (send_file, sin cargarlo en
+memoria). Pedidos, presupuestos, proformas y albaranes se pueden editar en
+Holded: se descargan en cada petición y no se guardan.
+
+    <HOLDED_PDF_CACHE_DIR>/
+        blobs/ab/<sha256>.pdf     contenido, direccionado por su hash
+        refs/<tipo>-<id>          sha256 del PDF de cada documento
+
+Los ficheros se escriben en tmp/ y se mueven con os.replace: los workers
+comparten el directorio sin ver nunca un PDF a medias. Cuando los blobs
+superan HOLDED_PDF_CACHE_MAX_MB se borran los menos usados (cada acierto
+actualiza el mtime del blob); una referencia a un blob borrado se trata
+como fallo y se vuelve a descargar. open_pdf() devuelve el fichero ya
+abierto, así que borrar un blob no corta una descarga en curso.
+
+prefetch() descarga en segundo plano los PDF de los documentos recién
+creados (ver holded_invoicing).
+"""
+import hashlib
+import os
+import re
+import tempfile
+import threading
+
+CACHE_DIR = os.getenv('HOLDED_PDF_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'holded-pdfs')
+MAX_BYTES = int(float(os.getenv('HOLDED_PDF_CACHE_MAX_MB', '256')) * 1024 * 1024)
+
+# Documentos que no cambian una vez emitidos: se guardan en disco
+CACHEABLE_TYPES = ('invoice', 'salesreceipt', 'creditnote')
+# Documentos editables en Holded: se sirven siempre recién descargados
+DOC_TYPES = CACHEABLE_TYPES + ('salesorder', 'estimate', 'proform', 'waybill')
+
+# Los PDF que no se guardan se descargan en memoria hasta este tamaño y después a un temporal
+_SPOOL_BYTES = 1024 * 1024
+_ID_RE = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+_download_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _check(doc_type, doc_id):
+    if doc_type not in DOC_TYPES or not _ID_RE.match(doc_id or ''):
+        raise ValueError(f'Documento inválido: {doc_type}/{doc_id}')
+
+
+def is_cacheable(doc_type):
+    return doc_type in CACHEABLE_TYPES
+
+
+def _ref_path(doc_type, doc_id):
+    return os.path.join(CACHE_DIR, 'refs', f'{doc_type}-{doc_id}')
+
+
+def _blob_path(digest):
+    return os.path.join(CACHE_DIR, 'blobs', digest[:2], f'{digest}.pdf')
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'w') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _open_cached(doc_type, doc_id):
+    """
+    PDF de la caché abierto para lectura o None. Se devuelve el fichero ya
+    abierto: si evict() lo borra mientras se envía, se sigue pudiendo leer.
+    """
+    try:
+        with open(_ref_path(doc_type, doc_id)) as f:
+            blob = _blob_path(f.read().strip())
+        fileobj = open(blob, 'rb')
+    except FileNotFoundError:
+        return None
+    try:
+        os.utime(blob)  # LRU: marca el blob como recién usado
+    except FileNotFoundError:
+        pass
+    return fileobj
+
+
+def _is_pdf(fileobj, doc_type, doc_id):
+    fileobj.seek(0)
+    if fileobj.read(5) != b'%PDF-':
+        print(f"[PdfCache] Holded no ha devuelto un PDF para {doc_type} {doc_id}")
+        return False
+    fileobj.seek(0)
+    return True
+
+
+def _download(doc_type, doc_id):
+    """Descarga el PDF a la caché y lo devuelve abierto (antes de que evict() pueda borrarlo)."""
+    from src.services.holded_service import holded_download_document_pdf
+
+    tmp_dir = os.path.join(CACHE_DIR, 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=tmp_dir, suffix='.pdf')
+    fileobj = None
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if not holded_download_document_pdf(doc_type, doc_id, f):
+                return None
+        fileobj = open(tmp, 'rb')
+        if not _is_pdf(fileobj, doc_type, doc_id):
+            fileobj.close()
+            return None
+        digest = hashlib.sha256()
+        for block in iter(lambda: fileobj.read(64 * 1024), b''):
+            digest.update(block)
+        fileobj.seek(0)
+        blob = _blob_path(digest.hexdigest())
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        os.replace(tmp, blob)
+        _write_atomic(_ref_path(doc_type, doc_id), digest.hexdigest())
+    except Exception:
+        if fileobj:
+            fileobj.close()
+        raise
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    evict()
+    return fileobj
+
+
+def _download_uncached(doc_type, doc_id):
+    from src.services.holded_service import holded_download_document_pdf
+
+    fileobj = tempfile.SpooledTemporaryFile(max_size=_SPOOL_BYTES)
+    if not holded_download_document_pdf(doc_type, doc_id, fileobj) or not _is_pdf(fileobj, doc_type, doc_id):
+        fileobj.close()
+        return None
+    return fileobj
+
+
+def open_pdf(doc_type, doc_id):
+    """
+    PDF del documento abierto en modo binario (lo cierra quien lo usa). Los
+    tipos de CACHEABLE_TYPES se descargan de Holded solo la primera vez; el
+    resto se descarga en cada llamada.
+
+    Returns:
+        Fichero abierto o None si Holded no lo ha devuelto.
+    Raises:
+        ValueError si doc_type/doc_id no son válidos.
+    """
+    _check(doc_type, doc_id)
+    if not is_cacheable(doc_type):
+        return _download_uncached(doc_type, doc_id)
+
+    fileobj = _open_cached(doc_type, doc_id)
+    if fileobj:
+        return fileobj
+
+    # Una sola descarga por documento aunque lo pidan varios threads a la vez
+    key = (doc_type, doc_id)
+    with _locks_guard:
+        lock = _download_locks.setdefault(key, threading.Lock())
+    with lock:
+        try:
+            return _open_cached(doc_type, doc_id) or _download(doc_type, doc_id)
+        finally:
+            with _locks_guard:
+                _download_locks.pop(key, None)
+
+
+def evict(max_bytes=None):
+    """Borra los blobs menos usados hasta quedar por debajo de max_bytes. Devuelve los borrados."""
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    blobs = []
+    for root, _, files in os.walk(os.path.join(CACHE_DIR, 'blobs')):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            blobs.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in blobs)
+    removed = 0
+    for _, size, path in sorted(blobs):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    if removed:
+        print(f"[PdfCache] {removed} PDF eliminados de la caché ({total // 1024} KB en uso)")
+    return removed
+
+
+def prefetch(documents):
+    """Descarga en segundo plano los PDF de [(doc_type, doc_id)] cacheables que no estén en caché."""
+    documents = [(doc_type, doc_id) for doc_type, doc_id in documents if doc_id and is_cacheable(doc_type)]
+    if not documents:
+        return
+
+    def run():
+        for doc_type, doc_id in documents:
+            try:
+                fileobj = open_pdf(doc_type, doc_id)
+                if fileobj:
+                    fileobj.close()
+            except Exception as e:
+                print(f"[PdfCache] Error precargando {doc_type} {doc_id}: {e}")
+
+    # Fuera del request: la descarga no debe retrasar la respuesta del admin
+    threading.Thread(target=run, name='pdf-prefetch', daemon=True).start()
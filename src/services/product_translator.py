@@ -0,0 +1,143 @@
+"""
+Traducción ES -> EN del catálogo (name_en, description_en, long_description_en).
+
+translate_missing_products() busca los productos con algún campo EN vacío y:
+1. Reutiliza traducciones ya hechas de translation_cache (hash por campo).
+2. Agrupa el resto en lotes de PRODUCT_TRANSLATE_BATCH productos por llamada
+   a OpenAI, con como mucho PRODUCT_TRANSLATE_CONCURRENCY llamadas a la vez.
+3. Escribe todos los productos en una sola transacción.
+"""
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from src.models.user import db
+from src.models.web_product import WebProduct
+from src.services.translation_service import (
+    content_hash,
+    load_stored_translation,
+    openai_chat,
+    store_translation,
+)
+
+BATCH_SIZE = int(os.getenv('PRODUCT_TRANSLATE_BATCH', '4'))
+CONCURRENCY = int(os.getenv('PRODUCT_TRANSLATE_CONCURRENCY', '3'))
+
+# (campo origen, campo EN, etiqueta en el prompt)
+FIELDS = [
+    ('name', 'name_en', 'Name'),
+    ('description', 'description_en', 'Short description'),
+    ('long_description', 'long_description_en', 'Long description'),
+]
+
+SYSTEM_PROMPT = (
+    "You are a professional translator for a premium artisanal food brand (olive oils, fruit preserves). "
+    "Translate the following product information from Spanish to English. Maintain the premium, artisanal tone. "
+    "Keep it natural and appealing for English-speaking customers. "
+)
+
+_BLOCK_RE = re.compile(r'^### PRODUCT (\d+)\s*$', re.MULTILINE)
+_LABEL_RE = re.compile(r'^(Name|Short description|Long description):', re.MULTILINE)
+
+
+def parse_labeled_fields(text):
+    """
+    Parsea 'Name: ... / Short description: ... / Long description: ...'
+    (cada valor puede ocupar varias líneas). Devuelve {etiqueta: texto}.
+    """
+    parts = _LABEL_RE.split(text)
+    return {label: value.strip() for label, value in zip(parts[1::2], parts[2::2])}
+
+
+def _field_hash(label, source):
+    # La etiqueta forma parte de la clave: el mismo texto como nombre o descripción
+    return content_hash(source, label)
+
+
+def _translate_batch(batch):
+    """
+    batch: [(product_id, {etiqueta: texto ES})]
+    Devuelve {product_id: {etiqueta: texto EN}}.
+    """
+    prompt = '\n\n'.join(
+        f"### PRODUCT {product_id}\n" + '\n'.join(f"{label}: {text}" for label, text in fields.items())
+        for product_id, fields in batch
+    )
+    messages = [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT + (
+                "Each product starts with a line '### PRODUCT <id>'. Reply with the same structure: "
+                "the unchanged '### PRODUCT <id>' line followed by the same labels "
+                "('Name:', 'Short description:', 'Long description:') with the translated text."
+            )
+        },
+        {"role": "user", "content": prompt}
+    ]
+    reply = openai_chat(messages, max_tokens=1000 * len(batch), timeout=60)
+    if not reply:
+        return {}
+    parts = _BLOCK_RE.split(reply)
+    return {int(pid): parse_labeled_fields(block) for pid, block in zip(parts[1::2], parts[2::2])}
+
+
+def translate_missing_products():
+    """
+    Traduce todos los campos EN que falten en web_products.
+
+    Returns:
+        dict con el resumen (productos actualizados, aciertos de caché, llamadas a OpenAI).
+    """
+    products = WebProduct.query.order_by(WebProduct.id).all()
+
+    # {product_id: {etiqueta: texto ES}} con lo que falta por traducir
+    pending = {}
+    resolved = {}  # {product_id: {etiqueta: texto EN}}
+    cache_hits = 0
+    for product in products:
+        for source_field, en_field, label in FIELDS:
+            source = getattr(product, source_field)
+            if not source or getattr(product, en_field):
+                continue
+            stored = load_stored_translation(_field_hash(label, source), 'en')
+            if stored:
+                resolved.setdefault(product.id, {})[label] = stored[0]
+                cache_hits += 1
+            else:
+                pending.setdefault(product.id, {})[label] = source
+
+    items = list(pending.items())
+    batches = [items[i:i + BATCH_SIZE] for i in range(0, len(items), BATCH_SIZE)]
+    new_translations = []
+    if batches:
+        with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+            for result in executor.map(_translate_batch, batches):
+                for product_id, fields in result.items():
+                    for label, translated in fields.items():
+                        if translated and label in pending.get(product_id, {}):
+                            resolved.setdefault(product_id, {})[label] = translated
+                            new_translations.append((label, pending[product_id][label], translated))
+
+    by_id = {p.id: p for p in products}
+    updated = 0
+    for product_id, fields in resolved.items():
+        product = by_id[product_id]
+        for _, en_field, label in FIELDS:
+            if label in fields:
+                setattr(product, en_field, fields[label])
+        updated += 1
+    db.session.commit()
+
+    for label, source, translated in new_translations:
+        store_translation(_field_hash(label, source), 'en', translated)
+
+    missing = sum(len(fields) for fields in pending.values()) - len(new_translations)
+    print(f"[ProductTranslator] {updated} productos, {cache_hits} desde caché, "
+          f"{len(batches)} llamadas a OpenAI, {missing} campos sin traducir")
+    return {
+        'updated_products': updated,
+        'cache_hits': cache_hits,
+        'translated_fields': len(new_translations),
+        'openai_calls': len(batches),
+        'untranslated_fields': missing,
+    }
@@ -0,0 +1,51 @@
+"""
+Lista precalculada de reseñas destacadas (/api/reviews/featured y el
+include=featured de GET /api/reviews).
+
+Se guarda ya serializada en la caché 'reviews_featured' y se invalida en
+todos los workers cuando se confirma una transacción que inserta, modifica o
+borra reseñas (incluidas las traducciones del ReviewTranslator).
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.models.review import Review
+from src.services.cache import get_cache
+from src.services.cache_bus import publish
+
+FEATURED_CACHE = 'reviews_featured'
+FEATURED_TTL = 300
+FEATURED_MAX = 20  # límite máximo que acepta /featured
+
+
+def _build_featured():
+    reviews = Review.query.filter(
+        Review.status == 'approved',
+        Review.rating >= 4
+    ).order_by(Review.created_at.desc(), Review.id.desc()).limit(FEATURED_MAX).all()
+    return [r.to_public_dict() for r in reviews]
+
+
+def get_featured(limit=8):
+    """Mejores reseñas (4-5 estrellas) más recientes, ya serializadas."""
+    featured = get_cache(FEATURED_CACHE, FEATURED_TTL).get_or_load('featured', _build_featured)
+    return featured[:limit]
+
+
+def _mark_changed(mapper, connection, target):
+    Session.object_session(target).info['reviews_changed'] = True
+
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Review, _event_name, _mark_changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _reviews_committed(session):
+    if session.info.pop('reviews_changed', None):
+        publish(FEATURED_CACHE)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _reviews_rolled_back(session):
+    session.info.pop('reviews_changed', None)
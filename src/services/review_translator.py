@@ -0,0 +1,209 @@
+"""
+Traducción en segundo plano de reseñas aprobadas.
+
+Cuando se aprueba una reseña se programa schedule_review_translation(): un
+thread del worker espera unos segundos (para agrupar reseñas que llegan
+juntas), reserva las reseñas aprobadas sin traducir y las traduce en lotes de
+REVIEW_TRANSLATE_BATCH reseñas por llamada a OpenAI. Cada reserva cuenta como
+intento: si la traducción falla, la reseña se reintenta pasados
+REVIEW_TRANSLATE_RETRY_AFTER segundos (como mucho REVIEW_TRANSLATE_MAX_ATTEMPTS
+veces) y el resto de reseñas sigue adelante. El resultado se guarda
+en title_en/comment_en (o _es si la reseña está en inglés) y en
+translation_cache, así /api/translate tampoco vuelve a llamar a OpenAI.
+
+Formato del lote (pedido y respuesta):
+    ### REVIEW <id>
+    Title: ...
+    Text: ...
+
+Para backfill: flask --app src.main translate-reviews
+"""
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+
+from src.models.user import db
+from src.models.review import Review
+from src.services.translation_service import (
+    content_hash,
+    load_stored_translation,
+    openai_chat,
+    store_translation,
+)
+
+BATCH_SIZE = int(os.getenv('REVIEW_TRANSLATE_BATCH', '8'))
+DELAY_SECONDS = float(os.getenv('REVIEW_TRANSLATE_DELAY', '3'))
+# Una reseña cuya traducción falla se reintenta pasado este tiempo, hasta MAX_ATTEMPTS veces
+RETRY_AFTER_SECONDS = int(os.getenv('REVIEW_TRANSLATE_RETRY_AFTER', '900'))
+MAX_ATTEMPTS = int(os.getenv('REVIEW_TRANSLATE_MAX_ATTEMPTS', '5'))
+
+_BLOCK_RE = re.compile(r'^### REVIEW (\d+)\s*$', re.MULTILINE)
+
+_worker = None
+_rerun = False
+_worker_lock = threading.Lock()
+
+
+def _target_lang(review):
+    return 'es' if review.lang == 'en' else 'en'
+
+
+def translate_batch(items, target_lang):
+    """
+    Traduce varias reseñas en una sola llamada.
+
+    Args:
+        items: [(id, title, comment)]
+    Returns:
+        {id: (translated_title, translated_comment)} con las que se pudieron parsear.
+    """
+    target_name = 'English' if target_lang == 'en' else 'Spanish'
+    prompt = '\n\n'.join(
+        f"### REVIEW {review_id}\nTitle: {title or ''}\nText: {comment}"
+        for review_id, title, comment in items
+    )
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                f"You are a professional translator. Translate each product review below to {target_name}. "
+                "Each review starts with a line '### REVIEW <id>' followed by a 'Title:' line and a 'Text:' section. "
+                "Reply with exactly the same structure for every review: the unchanged '### REVIEW <id>' line, "
+                "then 'Title: <translated title>' (empty if the title is empty) and 'Text: <translated text>'. "
+                "Do not add anything else. Maintain the tone and style of the original."
+            )
+        },
+        {"role": "user", "content": prompt}
+    ]
+    reply = openai_chat(messages, max_tokens=400 * len(items), timeout=60)
+    if not reply:
+        return {}
+
+    # split con grupo de captura: ['', id1, bloque1, id2, bloque2, ...]
+    parts = _BLOCK_RE.split(reply)
+    results = {}
+    for review_id, block in zip(parts[1::2], parts[2::2]):
+        if 'Text:' not in block:
+            continue
+        title_part, text_part = block.split('Text:', 1)
+        title = title_part.strip()
+        if title.startswith('Title:'):
+            title = title[len('Title:'):].strip()
+        results[int(review_id)] = (title, text_part.strip())
+    return results
+
+
+def _apply(review, title, comment):
+    if not review.title:
+        title = None
+    if _target_lang(review) == 'en':
+        review.title_en, review.comment_en = title or None, comment
+    else:
+        review.title_es, review.comment_es = title or None, comment
+    review.translated_at = datetime.utcnow()
+
+
+def _claim_batch(limit):
+    """
+    Reserva un lote de reseñas pendientes: cuenta el intento y hace commit
+    (libera los locks) antes de la llamada a OpenAI, que puede tardar un minuto.
+    Una reseña reservada no se vuelve a tomar hasta pasados RETRY_AFTER_SECONDS,
+    así un lote que falla no bloquea las reseñas más nuevas.
+    """
+    now = datetime.utcnow()
+    query = Review.query.filter(
+        Review.status == 'approved',
+        Review.translated_at.is_(None),
+        Review.translation_attempts < MAX_ATTEMPTS,
+        or_(
+            Review.translation_attempted_at.is_(None),
+            Review.translation_attempted_at < now - timedelta(seconds=RETRY_AFTER_SECONDS)
+        )
+    ).order_by(Review.translation_attempts, Review.created_at)
+    # En PostgreSQL, SKIP LOCKED evita que dos workers reserven las mismas reseñas
+    if db.engine.dialect.name == 'postgresql':
+        query = query.with_for_update(skip_locked=True)
+    reviews = query.limit(limit).all()
+    for review in reviews:
+        review.translation_attempts = (review.translation_attempts or 0) + 1
+        review.translation_attempted_at = now
+    db.session.commit()
+    return reviews
+
+
+def translate_pending_reviews(limit=BATCH_SIZE):
+    """
+    Traduce un lote de reseñas aprobadas pendientes.
+
+    Returns:
+        (reservadas, traducidas). reservadas == 0 cuando no queda ninguna por intentar.
+    """
+    reviews = _claim_batch(limit)
+    if not reviews:
+        return 0, 0
+
+    translated = 0
+    for target_lang in ('en', 'es'):
+        group = [r for r in reviews if _target_lang(r) == target_lang]
+        pending = []
+        for review in group:
+            stored = load_stored_translation(content_hash(review.comment, review.title), target_lang)
+            if stored:
+                _apply(review, stored[1], stored[0])
+                translated += 1
+            else:
+                pending.append(review)
+        if not pending:
+            continue
+
+        results = translate_batch([(r.id, r.title, r.comment) for r in pending], target_lang)
+        for review in pending:
+            if review.id in results:
+                title, comment = results[review.id]
+                _apply(review, title, comment)
+                translated += 1
+
+    db.session.commit()
+
+    # Guardar también en translation_cache (mismo hash que usa /api/translate)
+    for review in reviews:
+        translation = review.translations().get(_target_lang(review))
+        if translation:
+            store_translation(content_hash(review.comment, review.title), _target_lang(review),
+                              translation['comment'], translation['title'])
+
+    print(f"[ReviewTranslator] {translated}/{len(reviews)} reseñas traducidas")
+    return len(reviews), translated
+
+
+def _run(app):
+    global _worker, _rerun
+    while True:
+        time.sleep(DELAY_SECONDS)
+        try:
+            with app.app_context():
+                while translate_pending_reviews()[0]:
+                    pass
+        except Exception as e:
+            print(f"[ReviewTranslator] Error: {e}")
+        with _worker_lock:
+            # Si se aprobó otra reseña mientras traducíamos, dar otra vuelta
+            if not _rerun:
+                _worker = None
+                return
+            _rerun = False
+
+
+def schedule_review_translation(app):
+    """Lanza el thread de traducción si no hay uno en marcha en este worker."""
+    global _worker, _rerun
+    with _worker_lock:
+        if _worker is not None:
+            _rerun = True
+            return
+        _worker = threading.Thread(target=_run, args=(app,), name='review-translator', daemon=True)
+        _worker.start()
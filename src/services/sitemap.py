@@ -0,0 +1,145 @@
+"""
+Sitemap (/sitemap.xml) y feed RSS del blog (/api/blog/rss.xml).
+
+Cada sección (páginas fijas, productos activos, posts publicados) se
+renderiza a fragmentos <url> ya serializados y se guarda en su propia caché:
+
+- SITEMAP_PRODUCTS_CACHE se invalida con invalidate_catalog().
+- SITEMAP_BLOG_CACHE se invalida con cualquier escritura de posts (blog_cache).
+
+Así un cambio en un producto no vuelve a renderizar el blog y viceversa. Las
+respuestas finales (bytes) se cachean en SITEMAP_CACHE, que se invalida junto
+con cualquiera de las dos secciones. Si hay más de SITEMAP_MAX_URLS URLs,
+/sitemap.xml pasa a ser un índice de shards /sitemap-<n>.xml.
+"""
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+from src.models.blog import BlogPost
+from src.models.web_product import WebProduct
+from src.services.cache import get_cache
+
+SITE_URL = os.getenv('SITE_URL', 'https://www.mikels.es').rstrip('/')
+SITEMAP_MAX_URLS = int(os.getenv('SITEMAP_MAX_URLS', '50000'))  # límite del protocolo
+RSS_ITEMS = 50
+
+SITEMAP_CACHE = 'sitemap'
+SITEMAP_PRODUCTS_CACHE = 'sitemap_products'
+SITEMAP_BLOG_CACHE = 'sitemap_blog'
+SITEMAP_TTL = 3600
+
+# Páginas fijas del frontend
+STATIC_PAGES = ['/', '/productos', '/blog']
+
+_URLSET_OPEN = b'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+_URLSET_CLOSE = b'</urlset>\n'
+
+
+def _url_entry(path, lastmod=None):
+    """(bytes del <url>, lastmod)"""
+    xml = f'<url><loc>{escape(SITE_URL + path)}</loc>'
+    if lastmod:
+        xml += f'<lastmod>{lastmod.strftime("%Y-%m-%d")}</lastmod>'
+    return (xml + '</url>\n').encode(), lastmod
+
+
+def _product_entries():
+    rows = WebProduct.query.with_entities(WebProduct.slug, WebProduct.updated_at).filter_by(
+        active=True
+    ).order_by(WebProduct.display_order).all()
+    return [_url_entry(f'/producto/{slug}', updated_at) for slug, updated_at in rows]
+
+
+def _blog_entries():
+    rows = BlogPost.query.with_entities(
+        BlogPost.slug, BlogPost.updated_at, BlogPost.published_at
+    ).filter_by(status='published').order_by(BlogPost.published_at.desc()).all()
+    return [_url_entry(f'/blog/{slug}', updated_at or published_at) for slug, updated_at, published_at in rows]
+
+
+def _all_entries():
+    pages = [_url_entry(path) for path in STATIC_PAGES]
+    products = get_cache(SITEMAP_PRODUCTS_CACHE, SITEMAP_TTL).get_or_load('entries', _product_entries)
+    posts = get_cache(SITEMAP_BLOG_CACHE, SITEMAP_TTL).get_or_load('entries', _blog_entries)
+    return pages + products + posts
+
+
+def _shards(entries):
+    return [entries[i:i + SITEMAP_MAX_URLS] for i in range(0, len(entries), SITEMAP_MAX_URLS)] or [[]]
+
+
+def _urlset(entries):
+    return _URLSET_OPEN + b''.join(xml for xml, _ in entries) + _URLSET_CLOSE
+
+
+def render_sitemap():
+    """urlset si cabe en un fichero; si no, índice de shards."""
+    shards = _shards(_all_entries())
+    if len(shards) == 1:
+        return _urlset(shards[0])
+
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for number, shard in enumerate(shards, start=1):
+        lastmods = [lastmod for _, lastmod in shard if lastmod]
+        entry = f'<sitemap><loc>{escape(SITE_URL)}/sitemap-{number}.xml</loc>'
+        if lastmods:
+            entry += f'<lastmod>{max(lastmods).strftime("%Y-%m-%d")}</lastmod>'
+        lines.append(entry + '</sitemap>')
+    lines.append('</sitemapindex>')
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def render_sitemap_shard(number):
+    """Shard `number` (desde 1) o None si no existe."""
+    shards = _shards(_all_entries())
+    if len(shards) == 1 or not 1 <= number <= len(shards):
+        return None
+    return _urlset(shards[number - 1])
+
+
+def _rfc822(value):
+    # Las fechas se guardan en UTC sin zona
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def render_blog_rss():
+    """RSS 2.0 con los últimos RSS_ITEMS posts publicados (sin leer content)."""
+    posts = BlogPost.query.with_entities(
+        BlogPost.title, BlogPost.slug, BlogPost.excerpt, BlogPost.category,
+        BlogPost.author, BlogPost.published_at
+    ).filter_by(status='published').order_by(BlogPost.published_at.desc()).limit(RSS_ITEMS).all()
+
+    items = []
+    for post in posts:
+        link = f'{SITE_URL}/blog/{post.slug}'
+        item = [
+            f'<title>{escape(post.title)}</title>',
+            f'<link>{escape(link)}</link>',
+            f'<guid isPermaLink="true">{escape(link)}</guid>',
+            f'<description>{escape(post.excerpt or "")}</description>',
+        ]
+        if post.category:
+            item.append(f'<category>{escape(post.category)}</category>')
+        if post.author:
+            item.append(f'<dc:creator>{escape(post.author)}</dc:creator>')
+        if post.published_at:
+            item.append(f'<pubDate>{_rfc822(post.published_at)}</pubDate>')
+        items.append('<item>' + ''.join(item) + '</item>')
+
+    last_build = posts[0].published_at if posts and posts[0].published_at else datetime.utcnow()
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:atom="http://www.w3.org/2005/Atom">\n'
+        '<channel>'
+        "<title>Blog de Mikel's Earth</title>"
+        f'<link>{escape(SITE_URL)}/blog</link>'
+        f'<atom:link href="{escape(SITE_URL)}/api/blog/rss.xml" rel="self" type="application/rss+xml"/>'
+        '<description>Recetas, aceite de oliva y conservas artesanales</description>'
+        '<language>es</language>'
+        f'<lastBuildDate>{_rfc822(last_build)}</lastBuildDate>'
+        + ''.join(items) +
+        '</channel>\n</rss>\n'
+    ).encode()
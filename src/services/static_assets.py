@@ -0,0 +1,141 @@
+"""
+Servidor de ficheros estáticos del frontend (src/static) para main.serve.
+
+El directorio se indexa una sola vez (al arrancar, antes del fork de
+gunicorn): por fichero se guarda tamaño, mtime, ETag, tipo MIME y sus
+variantes precomprimidas (fichero.br / fichero.gz, ver precompress_static.py).
+Servir un fichero no hace ningún stat: se abre y se envía con
+wsgi.file_wrapper (sendfile en gunicorn).
+
+- Accept-Encoding elige la variante .br o .gz si existe (Vary: Accept-Encoding).
+- Assets con hash en el nombre (assets/index-3f9a1c2b.js): caché inmutable de un año.
+- index.html: no-cache (siempre se revalida con ETag).
+- ETag/If-None-Match, Last-Modified y Range mediante make_conditional.
+
+Si se añaden ficheros sin reiniciar: reindex() (en modo debug se reindexa solo
+cuando una ruta no está en el índice).
+"""
+import mimetypes
+import os
+import re
+import threading
+
+from werkzeug.wrappers import Response
+from werkzeug.wsgi import wrap_file
+
+INDEX_FILE = 'index.html'
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE = 'public, max-age=3600'
+INDEX_CACHE = 'no-cache'
+
+# Codificación HTTP -> extensión de la variante precomprimida (por preferencia)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Vite/webpack: nombre-<hash>.ext o nombre.<hash>.ext (hash de 8+ caracteres con algún dígito)
+_HASHED_RE = re.compile(r'[.-](?=[A-Za-z0-9_]*\d)[A-Za-z0-9_]{8,}\.[A-Za-z0-9]+$')
+
+_index = None
+_index_root = None
+_index_lock = threading.Lock()
+
+
+def is_hashed(rel_path):
+    return bool(_HASHED_RE.search(os.path.basename(rel_path)))
+
+
+def _build_index(root):
+    index = {}
+    variant_exts = tuple(ext for _, ext in ENCODINGS)
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(variant_exts):
+                continue
+            full_path = os.path.join(directory, filename)
+            rel_path = os.path.relpath(full_path, root).replace(os.sep, '/')
+            stat = os.stat(full_path)
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            if rel_path == INDEX_FILE:
+                cache_control = INDEX_CACHE
+            elif is_hashed(rel_path):
+                cache_control = IMMUTABLE_CACHE
+            else:
+                cache_control = DEFAULT_CACHE
+
+            variants = {}
+            for encoding, ext in ENCODINGS:
+                if os.path.isfile(full_path + ext):
+                    variants[encoding] = (full_path + ext, os.path.getsize(full_path + ext))
+
+            index[rel_path] = {
+                'path': full_path,
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'etag': f'{int(stat.st_mtime):x}-{stat.st_size:x}',
+                'mimetype': mimetype,
+                'cache_control': cache_control,
+                'variants': variants,
+            }
+    return index
+
+
+def reindex(root):
+    """(Re)construye el índice del directorio estático."""
+    global _index, _index_root
+    index = _build_index(root) if root and os.path.isdir(root) else {}
+    with _index_lock:
+        _index, _index_root = index, root
+    print(f"[Static] {len(index)} ficheros indexados en {root}")
+    return index
+
+
+def get_index(root):
+    if _index is None or _index_root != root:
+        return reindex(root)
+    return _index
+
+
+def _choose_variant(entry, request):
+    for encoding, _ in ENCODINGS:
+        if encoding in entry['variants'] and request.accept_encodings[encoding]:
+            return encoding
+    return None
+
+
+def serve_static(request, root, path, debug=False):
+    """
+    Respuesta para `path` dentro de `root`, o index.html (SPA) si no existe.
+    Devuelve None si tampoco hay index.html.
+    """
+    index = get_index(root)
+    entry = index.get(path) if path else None
+    if entry is None and path and debug:
+        entry = reindex(root).get(path)
+        index = _index
+    if entry is None:
+        entry = index.get(INDEX_FILE)
+        if entry is None:
+            return None
+
+    encoding = _choose_variant(entry, request)
+    if encoding:
+        file_path, size = entry['variants'][encoding]
+        etag = f"{entry['etag']}-{encoding}"
+    else:
+        file_path, size = entry['path'], entry['size']
+        etag = entry['etag']
+
+    response = Response(
+        wrap_file(request.environ, open(file_path, 'rb')),
+        mimetype=entry['mimetype'],
+        direct_passthrough=True,
+    )
+    response.content_length = size
+    response.last_modified = entry['mtime']
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = entry['cache_control']
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if entry['variants']:
+        response.vary.add('Accept-Encoding')
+    return response.make_conditional(request, accept_ranges=True, complete_length=size)
@@ -0,0 +1,78 @@
+"""
+Tipos de IVA de los productos (un solo sitio para checkout, pedidos, Holded y panel admin).
+
+Prioridad: tipo por SKU, después por categoría y, para pedidos antiguos sin
+SKU, por palabras del nombre (la regla que usaba la facturación). Por
+defecto 4% (AOVE).
+
+- Aceites AOVE → 4% (s_iva_4)
+- Conservas (paraguayo, nectarina, mermelada) → 10% (s_iva_10)
+- Estuches/packaging → 21% (s_iva_21)
+- Packs mixtos → 4% (mayoría aceite)
+"""
+
+DEFAULT_RATE = 0.04
+
+TAX_RATES_BY_SKU = {
+    'MIKBIO19': 0.04,    # Aceite ecológico → 4%
+    'MIKVE500': 0.04,    # Aceite equilibrado → 4%
+    'MIKVE5LP': 0.04,    # Aceite 5L → 4%
+    'MIKVET500': 0.04,   # Aceite temprano → 4%
+    'MIKPARA450': 0.10,  # Paraguayo conserva → 10%
+    'MIKNECT450': 0.10,  # Nectarina conserva → 10%
+    'MIKPARJ250': 0.10,  # Mermelada → 10%
+    'MIKPACKYPO': 0.04,  # Pack degustación → 4%
+    'MIKEST01': 0.21,    # Estuche de regalo → 21%
+}
+
+TAX_RATES_BY_CATEGORY = {
+    'aceites': 0.04,
+    'conservas': 0.10,
+    'packs': 0.04,
+}
+
+_NAME_KEYWORDS = (
+    (('paraguayo', 'nectarina', 'mermelada', 'almíbar', 'almibar', 'conserva'), 0.10),
+    (('estuche',), 0.21),
+)
+
+# Identificador del impuesto en Holded por tipo
+HOLDED_TAX_IDS = {0.04: 's_iva_4', 0.10: 's_iva_10', 0.21: 's_iva_21'}
+
+
+def rate_for(sku=None, category=None, name=None):
+    """Tipo de IVA (0.04, 0.10, 0.21) de un producto."""
+    if sku and sku in TAX_RATES_BY_SKU:
+        return TAX_RATES_BY_SKU[sku]
+    if category and category.lower() in TAX_RATES_BY_CATEGORY:
+        return TAX_RATES_BY_CATEGORY[category.lower()]
+    if name:
+        lowered = name.lower()
+        for keywords, rate in _NAME_KEYWORDS:
+            if any(keyword in lowered for keyword in keywords):
+                return rate
+    return DEFAULT_RATE
+
+
+def rate_from_holded_taxes(taxes, default=DEFAULT_RATE):
+    """Tipo de IVA a partir del campo taxes de un producto de Holded."""
+    rate = default
+    for tax in taxes or []:
+        if isinstance(tax, dict):
+            tax_val = str(tax.get('tax', ''))
+            if '10' in tax_val:
+                rate = 0.10
+            elif '21' in tax_val:
+                rate = 0.21
+            elif '4' in tax_val:
+                rate = 0.04
+    return rate
+
+
+def holded_tax_id(rate):
+    return HOLDED_TAX_IDS.get(round(rate or 0, 2), HOLDED_TAX_IDS[DEFAULT_RATE])
+
+
+def net_price(price_with_tax, rate, digits=2):
+    """Precio sin IVA (base imponible) a partir del precio con IVA."""
+    return round((price_with_tax or 0) / (1 + rate), digits)
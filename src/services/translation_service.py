@@ -0,0 +1,221 @@
+"""
+Servicio de traducción con OpenAI (gpt-4o-mini) y caché persistente.
+
+translate_cached() resuelve en este orden:
+1. LRU en memoria del proceso (hash de contenido + idioma).
+2. Tabla translation_cache (compartida entre workers y despliegues).
+3. OpenAI. Si varias peticiones piden a la vez el mismo texto, solo una
+   llama a la API (single-flight) y las demás esperan su resultado.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import requests
+from sqlalchemy.exc import IntegrityError
+
+from src.models.user import db
+from src.models.translation_cache import TranslationCache
+
+LRU_SIZE = int(os.getenv('TRANSLATION_LRU_SIZE', '2048'))
+INFLIGHT_WAIT_SECONDS = 20
+
+_lru = OrderedDict()
+_lru_lock = threading.Lock()
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def translate_with_openai(text, title, target_lang):
+    """Translate text using OpenAI API."""
+    api_key = os.getenv('OPENAI_API_KEY')
+    api_base = os.getenv('OPENAI_API_BASE', 'https://api.openai.com/v1')
+    
+    if not api_key:
+        print("[TRANSLATE] ERROR: OPENAI_API_KEY not found in environment")
+        return None, None
+    
+    print(f"[TRANSLATE] Using API base: {api_base}")
+    print(f"[TRANSLATE] API key starts with: {api_key[:10]}...")
+    
+    target_name = 'English' if target_lang == 'en' else 'Spanish'
+    
+    # Translate text and title together in one call for efficiency
+    prompt_text = text
+    if title:
+        prompt_text = f"Title: {title}\n\nText: {text}"
+    
+    messages = [
+        {
+            "role": "system",
+            "content": f"You are a professional translator. Translate the following to {target_name}. If there is a 'Title:' and 'Text:' section, translate both and return them in the format:\nTitle: [translated title]\nText: [translated text]\n\nIf there is no title section, just return the translation directly. Maintain the tone and style of the original."
+        },
+        {
+            "role": "user",
+            "content": prompt_text
+        }
+    ]
+    
+    try:
+        response = requests.post(
+            f"{api_base}/chat/completions",
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": "gpt-4o-mini",
+                "messages": messages,
+                "temperature": 0.3,
+                "max_tokens": 600
+            },
+            timeout=15
+        )
+        
+        print(f"[TRANSLATE] OpenAI response status: {response.status_code}")
+        
+        if response.status_code == 200:
+            data = response.json()
+            result = data['choices'][0]['message']['content'].strip()
+            
+            # Parse title and text from response
+            translated_title = ''
+            translated_text = result
+            
+            if title and 'Title:' in result and 'Text:' in result:
+                parts = result.split('Text:', 1)
+                title_part = parts[0].replace('Title:', '').strip()
+                text_part = parts[1].strip() if len(parts) > 1 else result
+                translated_title = title_part
+                translated_text = text_part
+            elif title and '\n' in result:
+                # Fallback: first line is title, rest is text
+                lines = result.split('\n', 1)
+                translated_title = lines[0].strip()
+                translated_text = lines[1].strip() if len(lines) > 1 else result
+            
+            return translated_text, translated_title
+        else:
+            print(f"[TRANSLATE] OpenAI error response: {response.text}")
+            return None, None
+            
+    except Exception as e:
+        print(f"[TRANSLATE] Exception: {type(e).__name__}: {e}")
+    
+    return None, None
+
+
+def openai_chat(messages, max_tokens=600, timeout=15):
+    """
+    Llamada genérica a chat/completions (para traducciones por lotes).
+    Devuelve el contenido de la respuesta o None si falla.
+    """
+    api_key = os.getenv('OPENAI_API_KEY')
+    api_base = os.getenv('OPENAI_API_BASE', 'https://api.openai.com/v1')
+    if not api_key:
+        print("[TRANSLATE] ERROR: OPENAI_API_KEY not found in environment")
+        return None
+    try:
+        response = requests.post(
+            f"{api_base}/chat/completions",
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": "gpt-4o-mini",
+                "messages": messages,
+                "temperature": 0.3,
+                "max_tokens": max_tokens
+            },
+            timeout=timeout
+        )
+        if response.status_code == 200:
+            return response.json()['choices'][0]['message']['content'].strip()
+        print(f"[TRANSLATE] OpenAI error response: {response.status_code} {response.text}")
+    except Exception as e:
+        print(f"[TRANSLATE] Exception: {type(e).__name__}: {e}")
+    return None
+
+
+def content_hash(text, title=''):
+    """sha256 del contenido original; el título forma parte de la clave."""
+    return hashlib.sha256(f"{title or ''}\x00{text}".encode('utf-8')).hexdigest()
+
+
+def _lru_get(key):
+    with _lru_lock:
+        value = _lru.get(key)
+        if value is not None:
+            _lru.move_to_end(key)
+        return value
+
+
+def _lru_put(key, value):
+    with _lru_lock:
+        _lru[key] = value
+        _lru.move_to_end(key)
+        while len(_lru) > LRU_SIZE:
+            _lru.popitem(last=False)
+
+
+def load_stored_translation(digest, target_lang):
+    row = TranslationCache.query.filter_by(content_hash=digest, target_lang=target_lang).first()
+    if row:
+        return row.translated_text, row.translated_title or ''
+    return None
+
+
+def store_translation(digest, target_lang, translated_text, translated_title=''):
+    """Guarda una traducción (si otro worker ya la guardó, no hace nada)."""
+    try:
+        db.session.add(TranslationCache(
+            content_hash=digest,
+            target_lang=target_lang,
+            translated_text=translated_text,
+            translated_title=translated_title or ''
+        ))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+    _lru_put((digest, target_lang), (translated_text, translated_title or ''))
+
+
+def translate_cached(text, title, target_lang):
+    """
+    Traduce título + texto usando la caché.
+
+    Returns:
+        (translated_text, translated_title) o (None, None) si OpenAI falla.
+    """
+    key = (content_hash(text, title), target_lang)
+    hit = _lru_get(key)
+    if hit:
+        return hit
+
+    with _inflight_lock:
+        event = _inflight.get(key)
+        leader = event is None
+        if leader:
+            event = _inflight[key] = threading.Event()
+
+    if not leader:
+        # Otra petición está traduciendo este mismo contenido: esperar su resultado
+        event.wait(INFLIGHT_WAIT_SECONDS)
+        return _lru_get(key) or (None, None)
+
+    try:
+        stored = load_stored_translation(*key)
+        if stored:
+            _lru_put(key, stored)
+            return stored
+        translated_text, translated_title = translate_with_openai(text, title, target_lang)
+        if not translated_text:
+            return None, None
+        store_translation(key[0], target_lang, translated_text, translated_title)
+        return translated_text, translated_title or ''
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        event.set()
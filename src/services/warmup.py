@@ -0,0 +1,81 @@
+"""
+Calentamiento del worker antes de recibir tráfico.
+
+Se ejecuta en el post_fork de gunicorn (y al arrancar en local): abre
+conexiones del pool, construye el snapshot del catálogo con las respuestas
+ya serializadas en los dos idiomas y, si WARMUP_HOLDED=1, precarga las
+cachés de productos y contactos de Holded. /api/ready devuelve 503 hasta que
+termina, para que la plataforma solo enrute a workers calientes.
+"""
+import os
+import threading
+import time
+
+from sqlalchemy import text
+
+from src.models.user import db
+
+_ready = threading.Event()
+_lock = threading.Lock()
+last_timings = {}
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def _prime_pool(connections):
+    """Abre `connections` conexiones a la vez y las devuelve al pool."""
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = db.engine.connect()
+            conn.execute(text('SELECT 1'))
+            opened.append(conn)
+    finally:
+        for conn in opened:
+            conn.close()
+
+
+def run_warmup(app):
+    """
+    Ejecuta todas las fases y marca el worker como listo.
+
+    Returns:
+        True si terminó sin errores.
+    """
+    from src.services.catalog_cache import LANGUAGES, get_catalog
+
+    with _lock:
+        if _ready.is_set():
+            return True
+
+        timings = {}
+        start = time.perf_counter()
+        try:
+            with app.app_context():
+                t = time.perf_counter()
+                _prime_pool(int(os.getenv('WARMUP_DB_CONNECTIONS', '2')))
+                timings['db_pool_ms'] = round((time.perf_counter() - t) * 1000, 1)
+
+                t = time.perf_counter()
+                for lang in LANGUAGES:
+                    get_catalog(lang)
+                timings['catalog_ms'] = round((time.perf_counter() - t) * 1000, 1)
+
+                if os.getenv('WARMUP_HOLDED') == '1':
+                    from src.services.holded_service import holded_get_contacts, holded_get_products
+                    t = time.perf_counter()
+                    holded_get_products()
+                    holded_get_contacts()
+                    timings['holded_ms'] = round((time.perf_counter() - t) * 1000, 1)
+        except Exception as e:
+            print(f"[Warmup] Error (el worker seguirá sin marcar como listo): {e}")
+            return False
+
+        timings['total_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        last_timings.clear()
+        last_timings.update(timings)
+        _ready.set()
+        print(f"[Warmup] pid {os.getpid()} listo: {timings}")
+        return True